@@ -0,0 +1,344 @@
+#Offline benchmark: runs the full pipeline against a local website fixture and a stubbed Gemini model
+#Run from the project folder:  python benchmarks/offline.py [--llm-latency 1.0] [--workers 4]
+#
+#Nothing leaves the machine: every OnePager's website is rewritten to a local HTTP server that
+#serves pages built from the OnePager itself, and genai.GenerativeModel returns canned JSON
+#matching RESPONSE_SCHEMA after a configurable delay.
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+os.chdir(PROJECT_DIR)
+
+from scripts.batch import discover_onepagers, run_batch
+from scripts.cache import StageCache
+from scripts.pipeline import company_name_from_path, company_slug
+from scripts.load_private_data import extract_website_from_md
+from scripts.trace import RunTrace, peak_rss_bytes
+from scripts.generate_text import RESPONSE_SCHEMA
+from scripts.validate import BULLET_RANGES
+
+# Paths the fixture serves for every company (the ones the scraper asks for)
+FIXTURE_PAGES = ["", "/about", "/about-us", "/products", "/services"]
+
+# Repeated on every page, like the cookie banners and footers of real sites
+BOILERPLATE = [
+    "We use cookies to improve your experience on our website. By continuing to browse you agree to our use of cookies.",
+    "Copyright All rights reserved. Terms of use, privacy policy and disclaimer apply to all content on this website.",
+]
+
+
+# --- Website fixture ---
+
+#Splits a OnePager into paragraphs (one per bullet / text line) grouped by "##" section
+def _paragraphs_by_section(md_text):
+    sections = []
+    for chunk in re.split(r"^## ", md_text, flags=re.MULTILINE)[1:]:
+        title, _, body = chunk.partition("\n")
+        lines = [l.strip(" -*#") for l in body.splitlines()]
+        paras = [l for l in lines if len(l) > 50 and "|" not in l and l != "Not Available"]
+        if paras:
+            sections.append((title.strip(), paras))
+    return sections
+
+
+#Builds {path: html} for one company, spreading its sections over the fixture pages
+def build_site(md_text):
+    pages = {page: [] for page in FIXTURE_PAGES}
+    for i, (title, paras) in enumerate(_paragraphs_by_section(md_text)):
+        page = FIXTURE_PAGES[i % len(FIXTURE_PAGES)]
+        pages[page].append(f"<h2>{title}</h2>")
+        pages[page].extend(f"<p>{p}</p>" for p in paras)
+
+    site = {}
+    for page, blocks in pages.items():
+        nav = "".join(f'<li><a href="{p or "/"}">{p.strip("/") or "home"}</a></li>' for p in FIXTURE_PAGES)
+        footer = "".join(f"<p>{b}</p>" for b in BOILERPLATE)
+        site[page] = f"<html><body><nav><ul>{nav}</ul></nav>{''.join(blocks)}<footer>{footer}</footer></body></html>"
+    return site
+
+
+class FixtureServer:
+    """
+    Serves http://127.0.0.1:<port>/<company-slug><page> from memory, with optional per-request latency.
+    site_url() gives every company its own port, so per-host politeness limits apply per site as they would online.
+    """
+
+    def __init__(self, sites, latency=0.0):
+        self.sites = sites
+        self.latency = latency
+        self.requests = 0
+        self.handler = self._make_handler()
+        self.httpd = self._listen()
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.extra = []
+
+    def _listen(self):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        return httpd
+
+    def site_url(self, slug):
+        httpd = self._listen()
+        self.extra.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_address[1]}/{slug}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                slug, _, rest = self.path.lstrip("/").partition("/")
+                page = ("/" + rest).rstrip("/") if rest else ""
+                html = server.sites.get(slug, {}).get(page)
+                body = (html or "<html><body>Not found</body></html>").encode("utf-8")
+                self.send_response(200 if html else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for httpd in [self.httpd] + self.extra:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+#Copies the OnePagers into work_dir with their website pointing at the fixture server
+def prepare_corpus(files, server, work_dir):
+    sites = {}
+    prepared = []
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            md_text = f.read()
+        slug = company_slug(company_name_from_path(path))
+        sites[slug] = build_site(md_text)
+
+        original = extract_website_from_md(md_text)
+        local = server.site_url(slug)
+        if original:
+            md_text = md_text.replace(original, local)
+            md_text = md_text.replace(original.rstrip("/"), local)
+
+        new_path = os.path.join(work_dir, os.path.basename(path))
+        with open(new_path, "w", encoding="utf-8") as f:
+            f.write(md_text)
+        prepared.append(new_path)
+    return prepared, sites
+
+
+# --- LLM stand-in ---
+
+#Deterministic value for a (Gemini-style) response schema
+def canned_value(schema, name=""):
+    kind = schema.get("type")
+    if kind == "OBJECT":
+        return {key: canned_value(sub, key) for key, sub in schema.get("properties", {}).items()}
+    if kind == "ARRAY":
+        item = schema.get("items", {})
+        if item.get("type") == "NUMBER":
+            return [10.0, 20.0, 30.0, 40.0]
+        if name == "categories":
+            return ["FY22", "FY23", "FY24", "FY25"]
+        if name == "source_urls":
+            return []
+        # As many bullets as the validator allows, so the benchmark never takes the repair path
+        count = BULLET_RANGES.get(name, (4, 4))[1]
+        return [f"**{name.replace('_', ' ').title()} {i}**: benchmark bullet text for the teaser deck" for i in range(1, count + 1)]
+    if kind == "NUMBER":
+        return 42.0
+    if name == "sector":
+        return "Manufacturing"
+    if name in ("certifications", "icons"):
+        return ""
+    return f"Benchmark text for {name.replace('_', ' ')}."
+
+
+def canned_response():
+    return canned_value(RESPONSE_SCHEMA)
+
+
+class StubResponse:
+    def __init__(self, text, prompt_tokens, chunk_size=64, chunk_delay=0.0):
+        self.text = text
+        self.usage_metadata = types.SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=len(text) // 4,
+            total_token_count=prompt_tokens + len(text) // 4,
+        )
+        self._chunk_size = chunk_size
+        self._chunk_delay = chunk_delay
+
+    # Streaming callers iterate over chunks, like the real SDK response
+    def __iter__(self):
+        for i in range(0, len(self.text), self._chunk_size):
+            time.sleep(self._chunk_delay)
+            yield types.SimpleNamespace(text=self.text[i:i + self._chunk_size], usage_metadata=self.usage_metadata)
+
+
+def make_stub_model(latency):
+
+    class StubModel:
+        def __init__(self, model_name, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+            # Only the fields the request's schema asks for (chart data usually comes from the OnePager)
+            schema = (generation_config or {}).get("response_schema", RESPONSE_SCHEMA)
+            text = json.dumps(canned_value(schema))
+            if not stream:
+                time.sleep(latency)
+                return StubResponse(text, len(str(prompt)) // 4)
+            # Streaming: a fifth of the latency before the first token, the rest spread over the chunks
+            time.sleep(latency * 0.2)
+            chunks = max(1, -(-len(text) // 64))
+            return StubResponse(text, len(str(prompt)) // 4, chunk_delay=latency * 0.8 / chunks)
+
+        def count_tokens(self, contents):
+            return types.SimpleNamespace(total_tokens=len(str(contents)) // 4)
+
+    return StubModel
+
+
+#Points generate_slide_text at the stub; uses stand-in modules when the SDK isn't installed
+def install_llm_stub(latency):
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        google = sys.modules.setdefault("google", types.ModuleType("google"))
+        google.__path__ = getattr(google, "__path__", [])
+        genai = types.ModuleType("google.generativeai")
+        api_core = types.ModuleType("google.api_core")
+        api_core.__path__ = []
+        exceptions = types.ModuleType("google.api_core.exceptions")
+        exceptions.ResourceExhausted = type("ResourceExhausted", (Exception,), {})
+        exceptions.GoogleAPIError = type("GoogleAPIError", (Exception,), {})
+        api_core.exceptions = exceptions
+        google.generativeai = genai
+        google.api_core = api_core
+        sys.modules.update({"google.generativeai": genai, "google.api_core": api_core,
+                            "google.api_core.exceptions": exceptions})
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = make_stub_model(latency)
+
+
+# --- Measurement ---
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_scenario(label, files, workers, work_dir, stream=True):
+    trace = RunTrace(path=os.path.join(work_dir, f"{label}.jsonl"))
+    start = time.perf_counter()
+    results = run_batch(files, max_workers=workers, cache=StageCache(enabled=False), trace=trace,
+                        output_dir=work_dir, stream=stream, log=lambda msg: None)
+    wall = time.perf_counter() - start
+
+    stages = {}
+    first_fields = []
+    for r in trace.records:
+        stages.setdefault(r["stage"], []).append(r["wall_s"])
+        if "first_field_s" in r:
+            first_fields.append(r["first_field_s"])
+
+    ok = sum(1 for r in results if r["status"] == "ok")
+    usage = trace.usage_rows()
+    total = usage[-1] if usage else {}
+    return {
+        "scenario": label,
+        "workers": workers,
+        "companies": len(files),
+        "succeeded": ok,
+        "failures": {r["company"]: r.get("error") for r in results if r["status"] != "ok"},
+        "wall_s": round(wall, 3),
+        "decks_per_minute": round(ok / wall * 60, 2) if wall else 0.0,
+        "end_to_end_s": {r["company"]: round(r["seconds"], 3) for r in results},
+        "stages": {name: {"mean_s": round(statistics.mean(v), 4), "p95_s": round(_percentile(v, 95), 4),
+                          "max_s": round(max(v), 4)} for name, v in stages.items()},
+        "first_field_s": round(statistics.mean(first_fields), 4) if first_fields else None,
+        "llm_calls": total.get("llm_calls", 0),
+        "prompt_tokens": total.get("prompt_tokens", 0),
+        "response_tokens": total.get("response_tokens", 0),
+        "peak_rss_mb": None if peak_rss_bytes() is None else round(peak_rss_bytes() / (1024 * 1024), 1),
+    }
+
+
+def print_report(report):
+    print(f"\n== {report['scenario']} ({report['companies']} companies, {report['workers']} workers) ==")
+    print(f"wall {report['wall_s']:.2f}s  |  {report['decks_per_minute']:.1f} decks/min  |  "
+          f"{report['succeeded']}/{report['companies']} ok  |  peak RSS {report['peak_rss_mb']} MB")
+    if report["first_field_s"] is not None:
+        print(f"first slide field after {report['first_field_s']:.3f}s (streamed)")
+    if report["llm_calls"]:
+        print(f"LLM: {report['llm_calls']} calls, {report['prompt_tokens']} prompt / {report['response_tokens']} response tokens "
+              f"({(report['prompt_tokens'] + report['response_tokens']) // max(1, report['companies'])} per deck)")
+    width = max(len(s) for s in report["stages"]) if report["stages"] else 5
+    print(f"{'Stage'.ljust(width)}  Mean (s)  p95 (s)  Max (s)")
+    for name, s in report["stages"].items():
+        print(f"{name.ljust(width)}  {s['mean_s']:8.3f}  {s['p95_s']:7.3f}  {s['max_s']:7.3f}")
+    for company, error in report["failures"].items():
+        print(f"FAILED {company}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark (no network, no Gemini quota)")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds the stub model takes per call")
+    parser.add_argument("--site-latency", type=float, default=0.05, help="Seconds the fixture server takes per page")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrency of the batch scenario")
+    parser.add_argument("--data-dir", default="data/private")
+    parser.add_argument("--json", help="Also write the reports to this JSON file")
+    args = parser.parse_args()
+
+    install_llm_stub(args.llm_latency)
+    files = discover_onepagers(args.data_dir)
+    if not files:
+        print(f"No OnePagers found in {args.data_dir}")
+        return
+
+    reports = []
+    with tempfile.TemporaryDirectory(prefix="teaser_bench_") as work_dir:
+        with FixtureServer({}, latency=args.site_latency) as server:
+            prepared, server.sites = prepare_corpus(files, server, work_dir)
+
+            reports.append(run_scenario("single", prepared[:1], 1, work_dir))
+            reports.append(run_scenario("batch", prepared, args.workers, work_dir))
+
+    for report in reports:
+        print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
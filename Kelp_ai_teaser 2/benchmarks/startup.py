@@ -0,0 +1,49 @@
+#Startup-time benchmark: how long `main.py` takes to import and which heavy libraries it pulls in
+#Run from the project folder:  python benchmarks/startup.py [--runs 10]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that should only be imported once the stage needing them runs
+HEAVY_MODULES = ["google.generativeai", "pptx", "docx", "requests", "presidio_analyzer", "spacy"]
+
+# Runs in a fresh interpreter so nothing is already cached in sys.modules
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(runs):
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=PROJECT_DIR,
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded = result["loaded"]
+    return timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI import time")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    timings, loaded = measure(args.runs)
+    print(f"import main: median {statistics.median(timings) * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms over {args.runs} runs")
+    print(f"heavy modules loaded at startup: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,132 @@
-from scripts.load_private_data import load_private_data
-from scripts.scrape import extract_website_from_md
-from scripts.scrape import scrape_public_data
-from scripts.generate_text import generate_slide_text
-from scripts.anonymize import check_anonymization
-from scripts.generate_ppt import create_ppt
-from scripts.citations import create_citations
+import argparse
+import os
 
+from scripts.pipeline import run_pipeline, plan_pipeline, PIPELINE_STAGES, MissingCachedStage
+from scripts.batch import DATA_DIR, discover_onepagers, run_batch, print_summary
+from scripts.cache import StageCache, STAGES, print_cache_stats
+from scripts.trace import RunTrace
+from scripts.context import CONTEXT_TOKEN_BUDGET
+from scripts.generate_text import model_router
+from scripts import anonymize
+
+DEFAULT_FILE = "Ind Swift-OnePager.md"
+
+
+def parse_stages(value):
+    stages = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in PIPELINE_STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown stage(s): {', '.join(unknown)}")
+    return stages
 
-def main():
-    files= ["Kalyani Forge-OnePager.md","Centum-OnePager.md","Connplex Cinemas-OnePager.md",
-    "Gati-OnePager.md","Ind Swift-OnePager.md","Ksolves-OnePager.md"]
-    file_name = files[4]
-    FILE_TO_READ = "data/private/" + file_name
 
-    print("Loading private data...")
-    private_data = load_private_data(FILE_TO_READ) #Loads .md file and stores text in variable named 'priva
-    
-    with open(FILE_TO_READ, "r", encoding="utf-8") as f:
-        md_text = f.read()
+def print_plan(plans):
+    for p in plans:
+        status = p.get("error") or "  ".join(f"{stage}: {state}" for stage, state in p["plan"].items())
+        print(f"[{p['company']}] {status}")
 
-    print("Extracting text from MD...")
-    base_url = extract_website_from_md(md_text) # Takes URL from .md file
 
-    print("Extracting Public Data...")
-    public_data = scrape_public_data(base_url) #Uses the URL to extract data, all the while storing citations for source document.
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate anonymized investment teasers from OnePagers.")
+    parser.add_argument("--file", default=DEFAULT_FILE, help="OnePager to process (file name inside --data-dir)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory holding the *-OnePager.md files")
+    parser.add_argument("--batch", action="store_true", help="Process every *-OnePager.md in --data-dir")
+    parser.add_argument("--workers", type=int, default=4, help="Companies processed concurrently in batch / service mode")
+    parser.add_argument("--cpu-workers", type=int, default=1, help="Companies allowed in the CPU-bound stages at once")
+    parser.add_argument("--stages", type=parse_stages, default=None,
+                        help=f"Comma-separated subset of {','.join(PIPELINE_STAGES)}; other stages must come from the cache")
+    parser.add_argument("--dry-run", action="store_true", help="Show which stages are cached / would run, without running them")
+    parser.add_argument("--context-budget", type=int, default=CONTEXT_TOKEN_BUDGET,
+                        help="Token budget for the private + public data in the prompt (0 = no limit)")
+    parser.add_argument("--serve", action="store_true", help="Run the resident HTTP teaser service instead of a one-off run")
+    parser.add_argument("--host", default="127.0.0.1", help="Service bind address (with --serve)")
+    parser.add_argument("--port", type=int, default=8000, help="Service port (with --serve)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Requests the service queues beyond its workers (with --serve)")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every stage instead of reusing cached outputs")
+    parser.add_argument("--invalidate", action="append", default=[], choices=STAGES + ["all"],
+                        help="Drop cached outputs of a stage before running (repeatable)")
+    parser.add_argument("--crawl", action="store_true",
+                        help="Pick the scraped pages from robots.txt / sitemaps / homepage links instead of fixed paths")
+    parser.add_argument("--http-ttl-hours", type=float, default=24,
+                        help="How long scraped pages are reused before being revalidated with the site")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Wait for the whole Gemini response instead of anonymizing fields as they stream in")
+    parser.add_argument("--hedge-after", type=float, default=None, metavar="SECONDS",
+                        help="Race a second Gemini model when the first hasn't answered after this many seconds")
+    parser.add_argument("--refresh", action="append", default=[], metavar="COMPANY",
+                        help="Regenerate this company's slide text even if the LLM response is cached (repeatable)")
+    parser.add_argument("--nlp-batch-size", type=int, default=anonymize.ANALYZER_BATCH_SIZE,
+                        help="Strings per spaCy batch when anonymizing")
+    parser.add_argument("--nlp-processes", type=int, default=anonymize.ANALYZER_PROCESSES,
+                        help="Processes spaCy may use for an anonymization batch")
+    parser.add_argument("--nlp-mode", choices=anonymize.NLP_MODES, default=anonymize.NLP_MODE,
+                        help="'lean' loads only spaCy's NER and the recognizers for the replaced entities")
+    parser.add_argument("--nlp-model", default=anonymize.NLP_MODEL,
+                        help="spaCy model for anonymization (e.g. en_core_web_sm for a smaller footprint)")
+    parser.add_argument("--nlp-pool", type=int, default=anonymize.NLP_POOL_PROCESSES, metavar="N",
+                        help="Forked NER workers sharing the model loaded once in this process (0 = analyze in this process)")
+    parser.add_argument("--cache-max-mb", type=int, default=200, help="Size limit of the stage cache")
+    parser.add_argument("--no-trace", action="store_true", help="Don't write the per-stage JSONL trace")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
 
-    print("Generating Text (JSON)...")
-    slide_text = generate_slide_text(private_data,public_data) #Feeds raw text into API, to convert into ppt-ready bullet points
+    cache = StageCache(max_bytes=args.cache_max_mb * 1024 * 1024, enabled=not args.no_cache)
+    for stage in args.invalidate:
+        cache.invalidate(None if stage == "all" else stage)
+    trace = RunTrace(enabled=not args.no_trace)
+    model_router().hedge_after = args.hedge_after
+    anonymize.ANALYZER_BATCH_SIZE = max(1, args.nlp_batch_size)
+    anonymize.ANALYZER_PROCESSES = max(1, args.nlp_processes)
+    anonymize.NLP_MODE = args.nlp_mode
+    anonymize.NLP_MODEL = args.nlp_model
+    anonymize.NLP_POOL_PROCESSES = max(0, args.nlp_pool)
 
-    print("Checking anonymization...")
-    slide_text = check_anonymization(slide_text) #Checks anonymization, with active text replacement
+    if args.serve:
+        from scripts.service import serve
+        serve(host=args.host, port=args.port, workers=args.workers, queue_size=args.queue_size,
+              cpu_workers=args.cpu_workers, cache=cache, trace=trace)
+        return
 
-    print("Creating PPT...")
-    create_ppt(slide_text) # Puts text into a placeholder PPT, along with charts and visuals
+    if args.batch:
+        files = discover_onepagers(args.data_dir)
+        if not files:
+            print(f"No *-OnePager.md files found in '{args.data_dir}'")
+            return
+        if args.dry_run:
+            print_plan([plan_pipeline(f, cache, args.stages, args.context_budget, args.crawl) for f in files])
+            return
+        print(f"Found {len(files)} OnePagers, running with {args.workers} workers...")
+        if anonymize.PRESIDIO_AVAILABLE and anonymize.NLP_POOL_PROCESSES > 0:
+            # Fork the NER workers before the batch threads exist
+            anonymize.start_ner_pool()
+        results = run_batch(files, max_workers=args.workers, cpu_workers=args.cpu_workers, cache=cache, trace=trace, stages=args.stages,
+                            context_budget=args.context_budget, http_ttl=args.http_ttl_hours * 3600, crawl=args.crawl,
+                            refresh=args.refresh, stream=not args.no_stream)
+        print_summary(results)
+        trace.print_summary()
+        print_cache_stats(cache)
+        anonymize.print_memo_stats()
+        return
 
-    print("Creating Citations...")
-    create_citations(private_data, public_data) # makes the citation document
+    file_path = os.path.join(args.data_dir, args.file)
+    if args.dry_run:
+        print_plan([plan_pipeline(file_path, cache, args.stages, args.context_budget, args.crawl)])
+        return
 
+    try:
+        run_pipeline(file_path, cache=cache, trace=trace, stages=args.stages, context_budget=args.context_budget,
+                     http_ttl=args.http_ttl_hours * 3600, crawl=args.crawl, refresh=args.refresh,
+                     stream=not args.no_stream)
+    except MissingCachedStage as e:
+        print(e)
+        return
+    finally:
+        trace.print_summary()
+        print_cache_stats(cache)
+        anonymize.print_memo_stats()
     print("Completed")
 
 if __name__ == "__main__":
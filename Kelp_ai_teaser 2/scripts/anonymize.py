@@ -1,108 +1,571 @@
+import gc
+import inspect
+import json
+import multiprocessing
+import os
+import queue
 import re
+import threading
 import warnings
+from collections import OrderedDict
+from contextlib import nullcontext
+from importlib.util import find_spec
 
-# Try importing Presidio (fallback if not installed)
-try:
-    from presidio_analyzer import AnalyzerEngine
-    from presidio_anonymizer import AnonymizerEngine
-    from presidio_anonymizer.entities import OperatorConfig
-    PRESIDIO_AVAILABLE = True
-except ImportError:
-    PRESIDIO_AVAILABLE = False
+from scripts.cache import make_key
+
+# Presidio (and the spaCy model behind it) is only imported when the first string is
+# sanitized; here we just check that it is installed (fallback to Regex if not)
+PRESIDIO_AVAILABLE = find_spec("presidio_analyzer") is not None and find_spec("presidio_anonymizer") is not None
+if not PRESIDIO_AVAILABLE:
     warnings.warn("Presidio libraries not found. Falling back to Regex. Install 'presidio-analyzer' & 'presidio-anonymizer'.")
 
+# Bump whenever the replacement behaviour changes, so cached anonymized text is rebuilt
+ANONYMIZATION_VERSION = "3"
+
+# Presidio entities we target and their Investor-Speak replacements
+# ORG: Companies | GPE: Countries/Cities | PERSON: Names
+# IGNORE 'DATE' and 'MONEY' because teasers need those numbers
+ENTITY_REPLACEMENTS = {
+    "ORG": "the Company",
+    "PERSON": "Key Management",
+    "GPE": "Strategic Region",
+    "LOC": "Strategic Location",
+}
+SCORE_THRESHOLD = 0.5
+
+# Strings per spaCy nlp.pipe batch, and processes it may use (1 = in this process;
+# more only pays off for very large batches since every worker loads its own model;
+# NLP_POOL_PROCESSES below keeps workers that share one)
+ANALYZER_BATCH_SIZE = 64
+ANALYZER_PROCESSES = 1
+
+# NLP engine: "full" = Presidio's defaults (whole spaCy pipeline, every recognizer);
+# "lean" = only the NER component and a recognizer for the ENTITY_REPLACEMENTS entities
+NLP_MODE = "full"
+NLP_MODES = ["full", "lean"]
+NLP_MODEL = "en_core_web_lg"  # or en_core_web_sm / en_core_web_md / en_core_web_trf
+
+# spaCy components the NER doesn't need (not even loaded in lean mode); the NER of the
+# en_core_web sm / md / lg models has its own tok2vec, the trf one listens to "transformer"
+LEAN_EXCLUDED_PIPES = ["tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer"]
+
+# Forked NER worker processes (0 = analyze in the calling process). The model is loaded
+# before the fork so the workers share its memory copy-on-write instead of loading their own
+NLP_POOL_PROCESSES = 0
+
+# NLP results remembered per text (LRU), and where they are kept between runs (under the stage cache root)
+MEMO_MAX_ENTRIES = 20000
+MEMO_FILE = os.path.join("nlp", "memo.json")
+
+# Dynamic Pattern Replacement
+REGEX_RULES = [
+    # 1. Remove Corporate Suffixes (Case Insensitive)
+    (r"(?i)\b(pvt\.?|ltd\.?|limited|inc\.?|corp\.?|llc)\b", ""),
+    
+    # 2. Catch "Headquartered in [City]" dynamically
+    #    Matches: "Headquartered in Mumbai", "Based in San Francisco"
+    (r"(?i)\b(headquartered|based|located) in [A-Z][a-z]+(?: [A-Z][a-z]+)*", "located in a strategic hub"),
+    
+    # 3. Catch Specific Market Names (The "Hardcoded" list - kept for safety)
+    (r"(?i)\b(india|bharat)\b", "Domestic Market"),
+    (r"(?i)\b(usa|united states|uk|united kingdom|london|new york)\b", "International Markets"),
+    (r"(?i)\b(europe|germany|france)\b", "Key Export Markets"),
+    
+    # 4. Catch Founders/names often missed
+    (r"(?i)founded by [A-Z][a-z]+", "founded by industry veterans"),
+]
+
+#Regex alternation of the words with shared prefixes factored out (a trie), so a
+#position that starts no term is rejected after one character instead of once per term
+def _trie_pattern(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        alternatives = [(r"[\s-]+" if ch == " " else re.escape(ch)) + build(child)
+                        for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 and "" not in node else f"(?:{'|'.join(alternatives)})"
+        # A term ending here makes the longer continuations optional (greedy, so the longest term still wins)
+        return f"{body}?" if "" in node else body
+
+    return build(trie)
+
+
+class TermMatcher:
+    """
+    REGEX_RULES plus a document's own terms (see scripts/document_terms.py) compiled
+    into a single alternation, so each string is scanned once instead of once per rule
+    and term. Document terms come first and match longest-first: at any position the
+    most specific name wins. Terms match case-insensitively as whole words, with any
+    whitespace or hyphens between their words ("Ind-Swift" for "Ind Swift"). Every
+    alternative starts at a word boundary. rules=False leaves REGEX_RULES out (the
+    output audit only looks for the document's own names).
+    """
+
+    def __init__(self, terms=None, rules=True):
+        self.terms = {self._normalise(t): r for t, r in (terms or {}).items() if re.match(r"\w", t)}
+        parts = []
+        if self.terms:
+            parts.append(rf"(?P<term>(?i:{_trie_pattern(self.terms)})(?!\w))")
+        for i, (pattern, _) in enumerate(REGEX_RULES if rules else []):
+            # Inline "(?i)" flags have to be scoped to their own alternative
+            if pattern.startswith("(?i)"):
+                pattern = f"(?i:{pattern[4:]})"
+            parts.append(f"(?P<rule{i}>{pattern})")
+        # Nothing to look for: a pattern that never matches
+        self.pattern = re.compile(rf"\b(?=\w)(?:{'|'.join(parts)})" if parts else r"(?!)")
+
+    @staticmethod
+    def _normalise(term):
+        return " ".join(term.lower().replace("-", " ").split())
+
+    def _replace(self, match):
+        # Exactly one top-level alternative matched; the rules' inner groups are unnamed
+        for name, value in match.groupdict().items():
+            if value is None:
+                continue
+            if name == "term":
+                return self.terms[self._normalise(value)]
+            return REGEX_RULES[int(name[4:])][1]
+        return match.group()
+
+    def sub(self, text):
+        return self.pattern.sub(self._replace, text)
+
+    def finditer(self, text):
+        """(match, replacement) for every term / rule hit; match.lastgroup is "term" or "rule<i>"."""
+        for match in self.pattern.finditer(text):
+            yield match, self._replace(match)
+
+
+_generic_matcher = None
+
+
+#Compiled matcher for these terms (the generic rules alone when there are none)
+def get_matcher(terms=None):
+    global _generic_matcher
+    if terms:
+        return TermMatcher(terms)
+    if _generic_matcher is None:
+        _generic_matcher = TermMatcher()
+    return _generic_matcher
+
+
+#Everything that changes the anonymized output, used as part of the stage cache key
+def rules_fingerprint():
+    return {
+        "version": ANONYMIZATION_VERSION,
+        "presidio": PRESIDIO_AVAILABLE,
+        "entities": ENTITY_REPLACEMENTS,
+        "threshold": SCORE_THRESHOLD,
+        "regex": REGEX_RULES,
+        # Lean mode and smaller models can find different entities
+        "nlp_mode": NLP_MODE,
+        "nlp_model": NLP_MODEL,
+    }
+
 # Global engines (Singleton pattern)
 _analyzer = None
 _anonymizer = None
 
+
+class SanitizeMemo:
+    """
+    Bounded LRU of NLP results: text after the regex / term pass -> anonymized text.
+    Entries only hold for one fingerprint (replacements, threshold, Presidio / spaCy and
+    model versions); bind() drops them when it changes, and a saved file with another
+    fingerprint is ignored. Since the per-document terms are applied before the lookup,
+    the same sentence from two companies shares one entry.
+    """
+
+    def __init__(self, path=None, max_entries=MEMO_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def bind(self, fingerprint):
+        """Uses entries made under fingerprint (loading the saved ones on first use)."""
+        with self._lock:
+            if fingerprint == self.fingerprint:
+                return
+            self.fingerprint = fingerprint
+            self._entries.clear()
+            if not self.path:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                return
+            if saved.get("fingerprint") == fingerprint:
+                self._entries.update(saved.get("entries", [])[-self.max_entries:])
+
+    def get_many(self, texts):
+        with self._lock:
+            found = {}
+            for text in texts:
+                if text in self._entries:
+                    self._entries.move_to_end(text)
+                    found[text] = self._entries[text]
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+            return found
+
+    def put_many(self, cleaned):
+        with self._lock:
+            for text, value in cleaned.items():
+                self._entries[text] = value
+                self._entries.move_to_end(text)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = self._dirty or bool(cleaned)
+
+    def save(self):
+        """Writes the entries (least recently used first) if anything was added."""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            data = json.dumps({"fingerprint": self.fingerprint, "entries": list(self._entries.items())}, ensure_ascii=False)
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+_memo = SanitizeMemo()
+_memo_lock = threading.Lock()
+
+
+#The process-wide memo; cache_root (a StageCache root) makes it persistent, None keeps it in memory
+def get_memo(cache_root=None):
+    global _memo
+    with _memo_lock:
+        path = os.path.join(cache_root, MEMO_FILE) if cache_root else None
+        if path and path != _memo.path:
+            _memo = SanitizeMemo(path)
+        return _memo
+
+
+def print_memo_stats():
+    if _memo.hits or _memo.misses:
+        print(f"NLP memo: {_memo.hits} hit / {_memo.misses} miss ({len(_memo._entries)} entries)")
+
+
+_nlp_fingerprint = None
+
+
+#Everything besides the text that shapes Presidio's output (part of every memo entry's validity)
+def nlp_fingerprint(analyzer):
+    global _nlp_fingerprint
+    if _nlp_fingerprint is None:
+        from importlib.metadata import version, PackageNotFoundError
+
+        models = getattr(getattr(analyzer, "nlp_engine", None), "models", None) or []
+        packages = ["presidio-analyzer", "presidio-anonymizer", "spacy"]
+        packages += [m.get("model_name") for m in models if isinstance(m, dict) and m.get("model_name")]
+        versions = {}
+        for package in packages:
+            try:
+                versions[package] = version(package)
+            except PackageNotFoundError:
+                versions[package] = None
+        _nlp_fingerprint = make_key(ANONYMIZATION_VERSION, ENTITY_REPLACEMENTS, SCORE_THRESHOLD, NLP_MODE, NLP_MODEL,
+                                    models, versions)
+    return _nlp_fingerprint
+
+
+#Presidio analyzer for NLP_MODE / NLP_MODEL
+def _build_analyzer():
+    from presidio_analyzer import AnalyzerEngine
+    if NLP_MODE != "lean":
+        if NLP_MODEL == "en_core_web_lg":
+            return AnalyzerEngine()
+        from presidio_analyzer.nlp_engine import NlpEngineProvider
+        config = {"nlp_engine_name": "spacy", "models": [{"lang_code": "en", "model_name": NLP_MODEL}]}
+        return AnalyzerEngine(nlp_engine=NlpEngineProvider(nlp_configuration=config).create_engine())
+
+    import spacy
+    from presidio_analyzer import RecognizerRegistry
+    from presidio_analyzer.nlp_engine import SpacyNlpEngine
+    from presidio_analyzer.predefined_recognizers import SpacyRecognizer
+
+    # The unused components are never loaded (spacy.load exclude), rather than loaded and disabled
+    nlp_engine = SpacyNlpEngine(models=[{"lang_code": "en", "model_name": NLP_MODEL}])
+    nlp_engine.nlp = {"en": spacy.load(NLP_MODEL, exclude=LEAN_EXCLUDED_PIPES)}
+    registry = RecognizerRegistry()
+    registry.add_recognizer(SpacyRecognizer(supported_entities=list(ENTITY_REPLACEMENTS)))
+    return AnalyzerEngine(nlp_engine=nlp_engine, registry=registry, supported_languages=["en"])
+
+
 def get_engines():
     global _analyzer, _anonymizer
+    from presidio_anonymizer import AnonymizerEngine
     if _analyzer is None:
-        _analyzer = AnalyzerEngine()
+        _analyzer = _build_analyzer()
     if _anonymizer is None:
         _anonymizer = AnonymizerEngine()
     return _analyzer, _anonymizer
 
-def check_anonymization(data):
+
+_ner_pool = None
+_ner_pool_lock = threading.Lock()
+
+
+def start_ner_pool():
     """
-    Recursively cleans Strings, Lists, and Dictionaries.
+    Loads the engines and, with NLP_POOL_PROCESSES > 0, forks the NER workers (a single worker
+    still takes the NER off this process's GIL).
+    Call it before starting threads (forking a threaded process can copy a held lock);
+    the first NER batch starts it otherwise. Returns the pool, or None.
     """
+    global _ner_pool
+    with _ner_pool_lock:
+        get_engines()
+        if _ner_pool is None and NLP_POOL_PROCESSES > 0:
+            # Objects alive now are moved out of the GC's reach, so collections in the
+            # workers don't write to (and so copy) the pages holding the model
+            gc.collect()
+            gc.freeze()
+            _ner_pool = multiprocessing.get_context("fork").Pool(NLP_POOL_PROCESSES)
+        return _ner_pool
+
+
+#Runs in a forked worker, on the analyzer inherited from the parent; results as plain tuples for the trip back
+def _pool_analyze(texts):
+    analyzer, _ = get_engines()
+    results = _analyze_batch(analyzer, texts, ANALYZER_BATCH_SIZE, 1)
+    return [[(r.entity_type, r.start, r.end, r.score) for r in found] for found in results]
+
+
+#Splits texts over the pool's workers (ANALYZER_BATCH_SIZE per task), results in input order
+def _pool_analyze_batch(pool, texts, batch_size):
+    from presidio_analyzer import RecognizerResult
+
+    chunks = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    # Small batches are spread over every worker instead of going to one
+    if len(chunks) < NLP_POOL_PROCESSES and len(texts) > 1:
+        size = -(-len(texts) // NLP_POOL_PROCESSES)
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    results = []
+    for chunk in pool.map(_pool_analyze, chunks):
+        results.extend([RecognizerResult(*found) for found in text_results] for text_results in chunk)
+    return results
+
+#Appends every string inside data (nested lists / dicts) to strings, in traversal order
+def _collect_strings(data, strings):
     if isinstance(data, str):
-        return sanitize_string(data)
-    
+        strings.append(data)
+    elif isinstance(data, list):
+        for item in data:
+            _collect_strings(item, strings)
+    elif isinstance(data, dict):
+        for value in data.values():
+            _collect_strings(value, strings)
+
+
+#Rebuilds data with its strings taken, in the same traversal order, from the cleaned iterator
+def _replace_strings(data, cleaned):
+    if isinstance(data, str):
+        return next(cleaned)
     if isinstance(data, list):
-        return [check_anonymization(item) for item in data]
-        
+        return [_replace_strings(item, cleaned) for item in data]
     if isinstance(data, dict):
-        return {key: check_anonymization(value) for key, value in data.items()}
-    
+        return {key: _replace_strings(value, cleaned) for key, value in data.items()}
     return data
 
-def sanitize_string(text):
+
+def check_anonymization_many(items, batch_size=None, n_process=None, matcher=None, stats=None):
+    """
+    Cleans several structures (slide fields, whole decks...) with one batched NLP pass:
+    all their strings are collected, analyzed together and put back in place.
+    matcher (a TermMatcher) adds the document's own forbidden terms to the regex pass.
+    Returns the cleaned items in order.
+    """
+    strings = []
+    for item in items:
+        _collect_strings(item, strings)
+    cleaned = iter(sanitize_strings(strings, batch_size, n_process, matcher, stats))
+    return [_replace_strings(item, cleaned) for item in items]
+
+
+def check_anonymization(data, terms=None, stats=None):
+    """
+    Recursively cleans Strings, Lists, and Dictionaries.
+    terms ({term: replacement}, e.g. from document_terms) are replaced before the NLP runs.
+    stats (optional dict) counts memo_hits / memo_misses of the NLP memo.
+    """
+    return check_anonymization_many([data], matcher=get_matcher(terms), stats=stats)[0]
+
+class FieldSanitizer:
+    """
+    Background worker that anonymizes slide fields while the LLM is still streaming
+    the rest. submit() queues one top-level field; result() waits for the queue to
+    drain and anonymizes the final slide JSON, reusing the work done for every field
+    whose value matches what was streamed (anything else is cleaned there and then).
+    lock (e.g. the batch CPU semaphore) is held around each field's NLP work.
+    terms are the document's forbidden terms and stats the memo counters (see check_anonymization).
+    """
+
+    def __init__(self, lock=None, terms=None, stats=None):
+        self.lock = lock or nullcontext()
+        self.matcher = get_matcher(terms)
+        self.stats = stats
+        self.done = {}
+        self.closed = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _fingerprint(value):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+    def submit(self, key, value):
+        self._queue.put(value)
+
+    def _work(self):
+        while True:
+            # Everything queued by now goes through the NLP in one batch
+            values = [self._queue.get()]
+            while not self._queue.empty():
+                values.append(self._queue.get())
+            stop = None in values
+            values = [v for v in values if v is not None]
+            if values:
+                with self.lock:
+                    for value, cleaned in zip(values, check_anonymization_many(values, matcher=self.matcher, stats=self.stats)):
+                        self.done[self._fingerprint(value)] = cleaned
+            if stop:
+                return
+
+    def close(self):
+        """Waits for the queued fields; call it before taking lock yourself."""
+        if not self.closed:
+            self.closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def result(self, data):
+        """Anonymized copy of the final dict; returns (result, fields reused from streaming)."""
+        self.close()
+        cleaned = {}
+        missing = []
+        for key, value in data.items():
+            fingerprint = self._fingerprint(value)
+            if fingerprint in self.done:
+                cleaned[key] = self.done[fingerprint]
+            else:
+                missing.append(key)
+        # Fields that changed after streaming (e.g. repaired ones) are cleaned together
+        for key, value in zip(missing, check_anonymization_many([data[k] for k in missing], matcher=self.matcher, stats=self.stats)):
+            cleaned[key] = value
+        return {key: cleaned[key] for key in data}, len(data) - len(missing)
+
+
+def _operators():
+    from presidio_anonymizer.entities import OperatorConfig
+
+    # --- Investor-Speak Replacements ---
+    # Instead of <ORG>, we use "The Company"
+    return {
+        entity: OperatorConfig("replace", {"new_value": value})
+        for entity, value in ENTITY_REPLACEMENTS.items()
+    }
+
+
+_batch_engine = None
+
+
+#BatchAnalyzerEngine when the installed Presidio has one whose analyze_iterator takes batch_size /
+#n_process, else None (older Presidio: one analyze call per text). Checked once
+def _batch_engine_class():
+    global _batch_engine
+    if _batch_engine is None:
+        try:
+            from presidio_analyzer import BatchAnalyzerEngine
+        except ImportError:
+            _batch_engine = False
+        else:
+            params = inspect.signature(BatchAnalyzerEngine.analyze_iterator).parameters
+            _batch_engine = BatchAnalyzerEngine if {"batch_size", "n_process"} <= set(params) else False
+    return _batch_engine or None
+
+
+#Presidio results for each text; spaCy sees the texts through nlp.pipe in batches
+def _analyze_batch(analyzer, texts, batch_size, n_process):
+    # --- Target Specific Entities Only ---
+    # ORG: Companies | GPE: Countries/Cities | PERSON: Names
+    # IGNORE 'DATE' and 'MONEY' because teasers need those numbers
+    options = {"entities": list(ENTITY_REPLACEMENTS), "score_threshold": SCORE_THRESHOLD}
+    engine_class = _batch_engine_class()
+    if engine_class is None:
+        return [analyzer.analyze(text=text, language="en", **options) for text in texts]
+    batch = engine_class(analyzer_engine=analyzer)
+    return list(batch.analyze_iterator(texts, language="en", batch_size=batch_size, n_process=n_process, **options))
+
+
+def sanitize_strings(texts, batch_size=None, n_process=None, matcher=None, stats=None):
+    """
+    Anonymizes a list of strings. Duplicates are analyzed once, text seen before (this
+    run or, with a persistent memo, an earlier one) comes from the memo, and the NER
+    runs over the rest in nlp.pipe batches, so the cost follows the amount of new text
+    rather than the number of strings. Returns the cleaned strings in input order.
+    """
     # 1. First run Regex Fallback to catch obvious patterns (Works even if Presidio is off)
     #    We run this FIRST to catch specific phrases like "Headquartered in Pune" 
     #    before the NLP breaks them apart.
-    text = sanitize_fallback(text)
+    texts = [sanitize_fallback(text, matcher) for text in texts]
+    unique = list(dict.fromkeys(t for t in texts if t.strip()))
 
-    if PRESIDIO_AVAILABLE:
+    if PRESIDIO_AVAILABLE and unique:
         try:
             analyzer, anonymizer = get_engines()
-            
-            # --- Target Specific Entities Only ---
-            # ORG: Companies | GPE: Countries/Cities | PERSON: Names
-            # IGNORE 'DATE' and 'MONEY' because teasers need those numbers
-            results = analyzer.analyze(
-                text=text,
-                language='en',
-                entities=["ORG", "PERSON", "GPE", "LOC"],
-                score_threshold=0.5
-            )
-            
-            # --- Investor-Speak Replacements ---
-            # Instead of <ORG>, we use "The Company"
-            operators = {
-                "ORG": OperatorConfig("replace", {"new_value": "the Company"}),
-                "PERSON": OperatorConfig("replace", {"new_value": "Key Management"}),
-                "GPE": OperatorConfig("replace", {"new_value": "Strategic Region"}),
-                "LOC": OperatorConfig("replace", {"new_value": "Strategic Location"}),
-            }
-            
-            anonymized_result = anonymizer.anonymize(
-                analyzer_results=results,
-                text=text,
-                operators=operators
-            )
-            
-            return anonymized_result.text
-            
+            pool = start_ner_pool() if NLP_POOL_PROCESSES > 0 else None
+            memo = get_memo()
+            memo.bind(nlp_fingerprint(analyzer))
+            cleaned = memo.get_many(unique)
+            todo = [text for text in unique if text not in cleaned]
+            if stats is not None:
+                stats["memo_hits"] = stats.get("memo_hits", 0) + len(cleaned)
+                stats["memo_misses"] = stats.get("memo_misses", 0) + len(todo)
+            if todo:
+                if pool:
+                    results = _pool_analyze_batch(pool, todo, batch_size or ANALYZER_BATCH_SIZE)
+                else:
+                    results = _analyze_batch(analyzer, todo, batch_size or ANALYZER_BATCH_SIZE, n_process or ANALYZER_PROCESSES)
+                operators = _operators()
+                fresh = {
+                    text: anonymizer.anonymize(text=text, analyzer_results=found, operators=operators).text
+                    for text, found in zip(todo, results)
+                }
+                memo.put_many(fresh)
+                cleaned.update(fresh)
+            return [cleaned.get(text, text) for text in texts]
+
         except Exception as e:
             # Fallback if Spacy model isn't downloaded
             print(f"⚠️ Presidio Error: {e}")
-            return text
-            
-    return text
-
-def sanitize_fallback(text):
-    # Dynamic Pattern Replacement
-    regex_rules = [
-        # 1. Remove Corporate Suffixes (Case Insensitive)
-        (r"(?i)\b(pvt\.?|ltd\.?|limited|inc\.?|corp\.?|llc)\b", ""),
-        
-        # 2. Catch "Headquartered in [City]" dynamically
-        #    Matches: "Headquartered in Mumbai", "Based in San Francisco"
-        (r"(?i)\b(headquartered|based|located) in [A-Z][a-z]+(?: [A-Z][a-z]+)*", "located in a strategic hub"),
-        
-        # 3. Catch Specific Market Names (The "Hardcoded" list - kept for safety)
-        (r"(?i)\b(india|bharat)\b", "Domestic Market"),
-        (r"(?i)\b(usa|united states|uk|united kingdom|london|new york)\b", "International Markets"),
-        (r"(?i)\b(europe|germany|france)\b", "Key Export Markets"),
-        
-        # 4. Catch Founders/names often missed
-        (r"(?i)founded by [A-Z][a-z]+", "founded by industry veterans"),
-    ]
-
-    sanitized = text
-    for pattern, replacement in regex_rules:
-        sanitized = re.sub(pattern, replacement, sanitized)
-        
-    return sanitized
+            return texts
+
+    return texts
+
+
+def sanitize_string(text, terms=None):
+    return sanitize_strings([text], matcher=get_matcher(terms))[0]
+
+#Document terms and REGEX_RULES in one pass (generic rules only without a matcher)
+def sanitize_fallback(text, matcher=None):
+    return (matcher or get_matcher()).sub(text)
@@ -0,0 +1,143 @@
+#Post-render leak audit: streams the XML inside the generated .pptx / .docx and looks for forbidden terms
+import json
+import os
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse, ParseError
+
+from scripts.anonymize import TermMatcher
+
+# Office files embedded in an archive (chart workbooks, OLE objects) are opened and scanned like the outer one
+EMBEDDED_SUFFIXES = (".xlsx", ".xlsm", ".docx", ".pptx")
+
+# Elements whose text nodes together form one piece of text: paragraphs (a:p / w:p), shared
+# and inline strings (si / is) and chart / cell values (c:v / v). A name split over several
+# runs of a paragraph is still found
+BLOCK_TAGS = {"p", "si", "is", "v"}
+
+# A .docx hyperlink (w:hyperlink) whose text is just a URL: the citations list its source pages this way,
+# so the company's own site is expected there. Links showing any other text are still checked
+LINK_TAG = "hyperlink"
+URL_TEXT = re.compile(r"https?://\S+")
+
+# Document properties (title, author, company...) keep their text outside any block: checked per element
+PROPERTY_PARTS = "docProps/"
+
+# Parts that hold formatting only (they are most of a .docx's XML: python-docx ships large style sheets)
+FORMATTING_PARTS = re.compile(r"(^|/)(\[Content_Types\]|styles|stylesWithEffects|fontTable|settings|webSettings|"
+                              r"numbering|presProps|viewProps|tableStyles|theme\d*)\.xml$")
+
+# Characters of surrounding text kept with each hit
+CONTEXT_CHARS = 40
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _scan_xml(stream, part, matcher, entry):
+    """
+    Checks every text block of one XML part with iterparse, clearing each block once it
+    is checked, so memory stays at about one block (plus empty element shells) whatever
+    the part's size. Source-URL hyperlinks are cleared before their paragraph is checked.
+    """
+    properties = part.rsplit("!", 1)[-1].startswith(PROPERTY_PARTS)
+    ordinal = 0
+
+    def check(text, tag):
+        nonlocal ordinal
+        ordinal += 1
+        entry["blocks"] += 1
+        for match, replacement in matcher.finditer(text):
+            start, end = match.span()
+            entry["hits"].append({
+                "part": part,
+                "block": ordinal,
+                "element": tag,
+                "match": match.group(),
+                "replacement": replacement,
+                "context": text[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS],
+            })
+
+    # Only "end" events: a block's runs are all parsed by then (start events cost a quarter more)
+    for _, elem in iterparse(stream):
+        tag = _local(elem.tag)
+        if tag == LINK_TAG:
+            if URL_TEXT.fullmatch("".join(elem.itertext()).strip()):
+                entry["skipped_links"] += 1
+                elem.clear()
+        elif tag in BLOCK_TAGS:
+            text = "".join(elem.itertext())
+            if text.strip():
+                check(text, tag)
+            elem.clear()
+        elif properties and elem.text and elem.text.strip():
+            check(elem.text, tag)
+
+
+def _scan_archive(archive, prefix, matcher, entry):
+    for info in archive.infolist():
+        name = info.filename
+        lower = name.lower()
+        try:
+            if lower.endswith(".xml"):
+                if FORMATTING_PARTS.search(name):
+                    entry["skipped_parts"] += 1
+                    continue
+                entry["parts"] += 1
+                entry["xml_bytes"] += info.file_size
+                with archive.open(info) as stream:
+                    _scan_xml(stream, prefix + name, matcher, entry)
+            elif lower.endswith(EMBEDDED_SUFFIXES):
+                # ZipExtFile is seekable, so the embedded archive is read in place
+                with archive.open(info) as stream, zipfile.ZipFile(stream) as inner:
+                    _scan_archive(inner, f"{prefix}{name}!", matcher, entry)
+        except (ParseError, zipfile.BadZipFile) as e:
+            entry["errors"].append(f"{prefix}{name}: {e}")
+
+
+def audit_file(path, matcher):
+    """
+    Scans every XML part of an Office file that can hold text (slides, notes, layouts,
+    charts, embedded chart workbooks, document body, properties) with matcher (a TermMatcher).
+    Returns {"file", "parts", "skipped_parts", "skipped_links", "blocks", "xml_bytes", "errors", "hits"}; each hit gives
+    the part, the block's position in it, the matched text, what anonymization would
+    have replaced it with and some context.
+    """
+    entry = {"file": path, "parts": 0, "skipped_parts": 0, "skipped_links": 0, "blocks": 0, "xml_bytes": 0,
+             "errors": [], "hits": []}
+    try:
+        with zipfile.ZipFile(path) as archive:
+            _scan_archive(archive, "", matcher, entry)
+    except (OSError, zipfile.BadZipFile) as e:
+        # An unreadable output is reported, not raised: the audit shouldn't fail the run
+        entry["errors"].append(f"{path}: {e}")
+    return entry
+
+
+def audit_outputs(paths, terms=None, report_path=None):
+    """
+    Audits the generated files against the document's forbidden terms and writes the JSON
+    report to report_path when given. The generic anonymization rules are left out: they
+    match ordinary template text ("India", "Ltd") that identifies nobody.
+    Returns {"terms": n, "hits": total, "files": [audit_file entries]}.
+    """
+    matcher = TermMatcher(terms, rules=False)
+    report = {"terms": len(terms or {}), "hits": 0, "files": []}
+    for path in paths:
+        if not path:
+            continue
+        entry = audit_file(path, matcher)
+        report["files"].append(entry)
+        report["hits"] += len(entry["hits"])
+
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+#"gati_20250101.pptx: 0 hit(s), gati_citations_20250101.docx: 2 hit(s)" for the log
+def describe_audit(report):
+    return ", ".join(f"{os.path.basename(e['file'])}: {len(e['hits'])} hit(s)" for e in report["files"])
@@ -0,0 +1,63 @@
+#Batch mode: generates teasers for every OnePager in a directory
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scripts.pipeline import run_pipeline, make_cpu_lock, company_name_from_path, MissingCachedStage
+
+DATA_DIR = "data/private"
+
+
+#Finds every "*-OnePager.md" in the data directory (sorted for stable ordering)
+def discover_onepagers(data_dir=DATA_DIR):
+    return sorted(glob.glob(os.path.join(data_dir, "*-OnePager.md")))
+
+
+def _run_one(file_path, pipeline_kwargs):
+    start = time.perf_counter()
+    company = company_name_from_path(file_path)
+    try:
+        outputs = run_pipeline(file_path, **pipeline_kwargs)
+        return {"company": company, "status": "ok", "seconds": time.perf_counter() - start, **outputs}
+    except MissingCachedStage as e:
+        return {"company": company, "status": "skipped", "seconds": time.perf_counter() - start, "error": str(e)}
+    except Exception as e:
+        return {"company": company, "status": "failed", "seconds": time.perf_counter() - start, "error": str(e)}
+
+
+def run_batch(files, max_workers=4, cpu_workers=1, **pipeline_kwargs):
+    """
+    Runs the pipeline for every file. Up to max_workers companies are in flight at once,
+    so their scrape/LLM stages overlap; at most cpu_workers of them run the CPU-bound
+    stages (Presidio/spaCy, python-pptx) at the same time.
+    Extra keyword arguments (cache, trace, stages, output_dir, log) go to run_pipeline.
+    Returns one result dict per company, in input order.
+    """
+    pipeline_kwargs["cpu_lock"] = make_cpu_lock(cpu_workers)
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(_run_one, f, pipeline_kwargs): f for f in files}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            print(f"[{result['company']}] {result['status']} in {result['seconds']:.1f}s")
+
+    return [results[f] for f in files]
+
+
+#Per-company success/failure summary
+def print_summary(results):
+    width = max([len(r["company"]) for r in results] + [7])
+    print()
+    print(f"{'Company'.ljust(width)}  Status   Time (s)  Output / Error")
+    print("-" * (width + 40))
+    for r in results:
+        detail = (r.get("ppt") or r.get("citations") or "") if r["status"] == "ok" else r.get("error", "")
+        if r.get("audit_hits"):
+            detail += f"  ({r['audit_hits']} audit hits, see {r['audit']})"
+        print(f"{r['company'].ljust(width)}  {r['status'].ljust(7)}  {r['seconds']:8.1f}  {detail}")
+
+    ok = sum(1 for r in results if r["status"] == "ok")
+    print(f"\n{ok}/{len(results)} teasers generated")
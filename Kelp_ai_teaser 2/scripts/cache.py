@@ -0,0 +1,213 @@
+#Content-addressed cache for pipeline stage outputs
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+CACHE_DIR = "output/cache"
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+# Eviction frees space down to this fraction of max_bytes, so a full cache isn't walked again on the next write
+EVICT_TO = 0.9
+
+# Stages whose outputs are cached (used for --invalidate); "http" holds the raw scraped pages
+# and "nlp" the memo of sanitized strings
+STAGES = ["scrape", "text", "anonymize", "ppt", "http", "nlp"]
+
+# Left out of eviction: the NLP memo is a single file that bounds itself (MEMO_MAX_ENTRIES in scripts/anonymize.py)
+UNEVICTED_DIRS = {"nlp"}
+
+
+#Builds a cache key from any mix of str / bytes / JSON-serialisable parts
+def make_key(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+        # Length prefix so ("ab", "c") and ("a", "bc") hash differently
+        h.update(str(len(data)).encode("ascii") + b":" + data)
+    return h.hexdigest()
+
+
+#Hash of a file's bytes (template, source files), empty string if missing
+def file_hash(path):
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+    except OSError:
+        return ""
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    Stores each stage's output under output/cache/<stage>/<key>.<ext>.
+    Entries are touched on every hit and the least recently used ones are
+    evicted once the cache grows past max_bytes. The size is kept as a running
+    total, so the cache is only walked on the first write and when it is over the limit.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, enabled=True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stage_stats = {}
+        self._lock = threading.Lock()
+        # Bytes of evictable entries, None until the first walk
+        self._bytes = None
+
+    def _path(self, stage, key, ext):
+        return os.path.join(self.root, stage, f"{key}.{ext}")
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _count(self, stage, hit):
+        with self._lock:
+            counts = self.stage_stats.setdefault(stage, {"hits": 0, "misses": 0})
+            if hit:
+                self.hits += 1
+                counts["hits"] += 1
+            else:
+                self.misses += 1
+                counts["misses"] += 1
+
+    def get(self, stage, key, max_age=None, touch=True):
+        """
+        Returns the cached JSON value, or None on a miss (or if older than max_age seconds).
+        touch=False leaves the entry's mtime alone, so for expiring entries it stays the write time.
+        """
+        return self.get_any(stage, [key], max_age, touch)[1]
+
+    def get_any(self, stage, keys, max_age=None, touch=True):
+        """First hit among several candidate keys as (key, value), counted as one lookup; (None, None) on a miss."""
+        if not self.enabled:
+            return None, None
+        for key in keys:
+            path = self._path(stage, key, "json")
+            try:
+                if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if touch:
+                self._touch(path)
+            self._count(stage, True)
+            return key, value
+        self._count(stage, False)
+        return None, None
+
+    def put(self, stage, key, value):
+        if not self.enabled:
+            return
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self._write(self._path(stage, key, "json"), data)
+
+    def get_file(self, stage, key, ext, dest):
+        """Copies a cached binary output (e.g. a rendered .pptx) to dest. Returns True on a hit."""
+        if not self.enabled:
+            return False
+        path = self._path(stage, key, ext)
+        try:
+            shutil.copyfile(path, dest)
+        except OSError:
+            self._count(stage, False)
+            return False
+        self._touch(path)
+        self._count(stage, True)
+        return True
+
+    def put_file(self, stage, key, ext, src):
+        if not self.enabled:
+            return
+        with open(src, "rb") as f:
+            self._write(self._path(stage, key, ext), f.read())
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        # Write to a temp file first so concurrent readers never see half an entry
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.add_bytes(len(data) - replaced)
+
+    def add_bytes(self, delta):
+        """Counts bytes written under the cache root (also by the HttpCache); evicts once over max_bytes."""
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += delta
+            over = self._bytes is None or self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def invalidate(self, stage=None):
+        """Drops every entry of one stage, or the whole cache when stage is None."""
+        target = self.root if stage is None else os.path.join(self.root, stage)
+        with self._lock:
+            shutil.rmtree(target, ignore_errors=True)
+            self._bytes = None
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits in EVICT_TO of max_bytes.
+        Files sharing a key (an HttpCache page's .json and .body) are one entry and go together.
+        """
+        with self._lock:
+            entries = {}
+            total = 0
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                if dirpath == self.root:
+                    dirnames[:] = [d for d in dirnames if d not in UNEVICTED_DIRS]
+                for name in filenames:
+                    if name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entry = entries.setdefault(os.path.join(dirpath, name.split(".", 1)[0]), [0, 0, []])
+                    entry[0] = max(entry[0], st.st_mtime)
+                    entry[1] += st.st_size
+                    entry[2].append(path)
+                    total += st.st_size
+
+            if total > self.max_bytes:
+                for _, size, paths in sorted(entries.values()):
+                    if total <= self.max_bytes * EVICT_TO:
+                        break
+                    for path in paths:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                    total -= size
+            self._bytes = total
+
+
+#One line per stage that was looked up during the run
+def print_cache_stats(cache):
+    if not cache.enabled or not cache.stage_stats:
+        return
+    print("\nCache: " + ", ".join(f"{stage} {c['hits']} hit / {c['misses']} miss"
+                                   for stage, c in sorted(cache.stage_stats.items())))
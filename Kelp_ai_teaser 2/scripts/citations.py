@@ -1,11 +1,4 @@
-#Import core python modules
-from docx import Document
-from docx.shared import Pt, RGBColor, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-
-#Low-Level imports to make URLs work
-from docx.oxml.shared import OxmlElement
-from docx.oxml.ns import qn
+#python-docx is imported inside the functions so importing this module stays cheap
 
 #For timestamping the file_name
 from datetime import datetime
@@ -13,6 +6,10 @@ from datetime import datetime
 #Function that adds clickable links to the document
 def add_hyperlink(paragraph, url, text):
 
+    #Low-Level imports to make URLs work
+    from docx.oxml.shared import OxmlElement
+    from docx.oxml.ns import qn
+
     part = paragraph.part
     r_id = part.relate_to(url, 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink', is_external=True)
     
@@ -50,8 +47,11 @@ def add_hyperlink(paragraph, url, text):
     return hyperlink
 
 #Function that creates the actual document
-def create_citations(private_data, public_data):
-    
+def create_citations(private_data, public_data, output_filename=None):
+
+    from docx import Document
+    from docx.shared import Pt, RGBColor, Inches
+
     doc = Document()
     
     style = doc.styles['Normal']
@@ -88,8 +88,9 @@ def create_citations(private_data, public_data):
     heading.paragraph_format.space_before = Pt(12)
     heading.paragraph_format.space_after = Pt(6)
 
-    # Extract URLs from public_data dict
+    # Extract URLs from public_data dict (sources adds the access date of each page, when scraped with it)
     source_urls = public_data.get("source_urls", [])
+    source_details = {s["url"]: s for s in public_data.get("sources", [])}
     
     if source_urls:
         intro = doc.add_paragraph(f"{len(source_urls)} public web pages reviewed:")
@@ -104,13 +105,22 @@ def create_citations(private_data, public_data):
             run.font.size = Pt(12)
             
             add_hyperlink(p, url, url)
+
+            detail = source_details.get(url)
+            if detail:
+                accessed = detail["accessed_at"][:10]
+                note = p.add_run(f" (accessed {accessed}{', cached copy' if detail['from_cache'] else ''})")
+                note.font.name = 'Arial'
+                note.font.size = Pt(10)
     else:
         # Fallback if no sources exist
         doc.add_paragraph("No public web sources used")
         
-     # Timestamped output filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_filename = f"output/citations/company_citations_{timestamp}.docx"
+     # Timestamped output filename (unless the caller picked one, e.g. in batch mode)
+    if output_filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_filename = f"output/citations/company_citations_{timestamp}.docx"
     
     doc.save(output_filename)
+    return output_filename
 
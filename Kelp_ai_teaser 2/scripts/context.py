@@ -0,0 +1,202 @@
+#Token-budgeted context packing for the Gemini prompt
+import math
+import re
+
+# Prompt budget for PRIVATE + PUBLIC data (the instructions themselves are ~1.5k tokens on top)
+CONTEXT_TOKEN_BUDGET = 8000
+
+# Rough size of one packing unit; large sections / tables are split into pieces this big
+MAX_UNIT_TOKENS = 400
+
+# Private data is the source of truth, so it wins ties against scraped text
+PRIVATE_WEIGHT = 1.5
+
+# A public paragraph sharing this much of its 5-word shingles with the private data is a duplicate
+DUPLICATE_OVERLAP = 0.5
+
+# What each output field of the response schema is about
+FIELD_KEYWORDS = {
+    "business_overview": ["business", "company", "segment", "division", "manufactur", "operat", "customer",
+                          "industr", "solution", "service", "market", "plant", "network", "client"],
+    "at_a_glance": ["founded", "established", "headquarter", "employee", "years", "presence", "countries",
+                    "scale", "capacity", "leading", "largest"],
+    "portfolio_and_products": ["product", "portfolio", "brand", "offering", "service", "range", "sku",
+                               "platform", "formulation", "division"],
+    "investment_highlights": ["growth", "margin", "certif", "approval", "award", "strength", "opportunit",
+                              "export", "advantage", "leader", "future", "expansion", "patent", "recurring"],
+    "charts": ["revenue", "ebitda", "pat", "profit", "margin", "%", "share", "cagr", "fy", "20"],
+}
+
+# Sections that directly feed a field get a bonus on top of the keyword score
+FIELD_SECTIONS = {
+    "business_overview": ["Business Description", "Application areas / Industries served", "Key Operational Indicators"],
+    "at_a_glance": ["Business Description", "Details", "Global Presence", "Facilities"],
+    "portfolio_and_products": ["Product & Services", "Product Portfolio", "Brand Portfolio", "Technology Expertise"],
+    "investment_highlights": ["SWOT", "Awards and Certifications", "Market Size", "Future Plan", "Key Milestones"],
+    "charts": ["Financials Status", "Shareholders", "Segment Reporting", "Channel Mix", "Key Metrics"],
+}
+SECTION_BONUS = 5.0
+
+
+#Local token estimate (~4 characters per token for English prose)
+def estimate_tokens(text):
+    return max(1, len(text) // 4) if text else 0
+
+
+class Unit:
+    """A chunk of context that is either kept or dropped as a whole."""
+
+    def __init__(self, source, name, order, text):
+        self.source = source    # "private" or "public"
+        self.name = name        # section name (private) or "public"
+        self.order = order      # position in the original document
+        self.text = text
+        self.tokens = estimate_tokens(text)
+
+
+#Splits text into pieces of at most max_tokens, on paragraph then line boundaries
+def _chunk(text, max_tokens=MAX_UNIT_TOKENS, separator="\n\n"):
+    pieces = []
+    current = ""
+    for part in text.split(separator):
+        if not part.strip():
+            continue
+        if estimate_tokens(part) > max_tokens and separator != "\n":
+            # e.g. a long table or a long list: split it line by line
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.extend(_chunk(part, max_tokens, "\n"))
+            continue
+        candidate = f"{current}{separator}{part}" if current else part
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = part
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _private_units(onepager, exclude, max_table_rows):
+    units = []
+    for name in onepager.names():
+        if name in exclude:
+            continue
+        for piece in _chunk(onepager.section(name).text(max_table_rows)):
+            units.append(Unit("private", name, len(units), piece))
+    return units
+
+
+#Paragraphs (or sentences) of the scraped text, before chunking
+def _public_blocks(public_data):
+    # Prefer the scraper's own blocks; otherwise fall back to sentences of raw_text
+    blocks = public_data.get("blocks") or re.split(r"(?<=[.!?])\s+", public_data.get("raw_text", ""))
+    return [b.strip() for b in blocks if b.strip()]
+
+
+def _shingles(text, size=5):
+    words = re.findall(r"\w+", text.lower())
+    return {tuple(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+
+def _score(unit, field):
+    text = unit.text.lower()
+    hits = sum(text.count(k) for k in FIELD_KEYWORDS[field])
+    score = hits / math.sqrt(unit.tokens)
+    if unit.name in FIELD_SECTIONS[field]:
+        score += SECTION_BONUS
+    if unit.source == "private":
+        score *= PRIVATE_WEIGHT
+    return score
+
+
+def pack_context(onepager, public_data, budget_tokens=CONTEXT_TOKEN_BUDGET, exclude=(), max_table_rows=None):
+    """
+    Fits private sections and public paragraphs into budget_tokens.
+    Public paragraphs duplicated in the private data are removed first; the remaining units are
+    picked round-robin across the output fields (best-scoring unit per field each turn),
+    then any leftover budget goes to the highest-scoring units overall.
+    Returns (private_text, public_text, report) where report lists what was dropped.
+    """
+    private_units = _private_units(onepager, exclude, max_table_rows)
+    dropped = []
+
+    # --- Remove public paragraphs that repeat the private data (or each other) ---
+    private_shingles = set()
+    for unit in private_units:
+        private_shingles |= _shingles(unit.text)
+    seen = set()
+    unique_blocks = []
+    duplicates = 0
+    for block in _public_blocks(public_data):
+        shingles = _shingles(block)
+        if len(shingles & (private_shingles | seen)) / len(shingles) >= DUPLICATE_OVERLAP:
+            duplicates += 1
+            continue
+        seen |= shingles
+        unique_blocks.append(block)
+
+    unique_public = [Unit("public", "public", i, piece.replace("\n\n", " "))
+                     for i, piece in enumerate(_chunk("\n\n".join(unique_blocks)))]
+
+    candidates = private_units + unique_public
+    rankings = {field: sorted(candidates, key=lambda u: _score(u, field), reverse=True) for field in FIELD_KEYWORDS}
+
+    # --- Round-robin over fields so every field gets its most relevant context ---
+    selected = set()
+    used = 0
+    progress = True
+    while progress:
+        progress = False
+        for field, ranked in rankings.items():
+            while ranked:
+                unit = ranked.pop(0)
+                if id(unit) in selected or _score(unit, field) <= 0:
+                    continue
+                if used + unit.tokens <= budget_tokens:
+                    selected.add(id(unit))
+                    used += unit.tokens
+                    progress = True
+                    break
+
+    # --- Spend what is left on the best remaining units ---
+    best_overall = sorted(candidates, key=lambda u: max(_score(u, f) for f in FIELD_KEYWORDS), reverse=True)
+    for unit in best_overall:
+        if id(unit) not in selected and used + unit.tokens <= budget_tokens:
+            selected.add(id(unit))
+            used += unit.tokens
+    dropped.extend((u, "budget") for u in candidates if id(u) not in selected)
+
+    # --- Render kept units in their original order ---
+    private_text = ""
+    current_section = None
+    for unit in private_units:
+        if id(unit) not in selected:
+            continue
+        if unit.name != current_section:
+            private_text += f"\n\n## {unit.name}\n\n"
+            current_section = unit.name
+        else:
+            private_text += "\n\n"
+        private_text += unit.text
+    public_text = " ".join(u.text for u in unique_public if id(u) in selected)
+
+    report = {
+        "budget_tokens": budget_tokens,
+        "used_tokens": used,
+        "input_tokens": sum(u.tokens for u in private_units) + estimate_tokens(public_data.get("raw_text", "")),
+        "duplicates_removed": duplicates,
+        "dropped": [{"source": u.source, "name": u.name, "tokens": u.tokens, "reason": reason} for u, reason in dropped],
+    }
+    return private_text.strip(), public_text, report
+
+
+#One-line summary of a packing report, e.g. for logs
+def describe_report(report):
+    dropped_sections = sorted({d["name"] for d in report["dropped"] if d["source"] == "private" and d["reason"] == "budget"})
+    public_dropped = sum(d["tokens"] for d in report["dropped"] if d["source"] == "public")
+    return (f"{report['used_tokens']}/{report['budget_tokens']} tokens used (input {report['input_tokens']}); "
+            f"{report['duplicates_removed']} duplicate public paragraphs removed, {public_dropped} public tokens dropped; "
+            f"private sections cut: {', '.join(dropped_sections) or 'none'}")
@@ -0,0 +1,157 @@
+#URL discovery for crawl mode: robots.txt, sitemaps and homepage links, ranked by teaser relevance
+import re
+import time
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from scripts.politeness import get_scheduler
+
+# Pages fetched per site in crawl mode (homepage included) and their total byte budget
+MAX_CRAWL_PAGES = 8
+CRAWL_BYTE_BUDGET = 4 * 1024 * 1024
+
+# robots.txt / sitemap files are read up to this size, and at most this many child sitemaps
+SITEMAP_MAX_BYTES = 1024 * 1024
+MAX_CHILD_SITEMAPS = 3
+
+# Path keywords that point at content a teaser uses (business, products, investors, certifications)
+CRAWL_KEYWORDS = {
+    "about": 5,
+    "company": 3,
+    "profile": 3,
+    "overview": 3,
+    "who-we-are": 3,
+    "product": 4,
+    "service": 3,
+    "solution": 3,
+    "portfolio": 2,
+    "investor": 4,
+    "financial": 3,
+    "annual-report": 2,
+    "certification": 4,
+    "accreditation": 3,
+    "quality": 3,
+    "regulatory": 2,
+    "manufactur": 3,
+    "facilit": 2,
+    "infrastructure": 2,
+    "capabilit": 2,
+    "global": 1,
+    "export": 1,
+    "history": 1,
+    "milestone": 1,
+}
+
+# Paths that are rarely worth a page of budget
+SKIP_KEYWORDS = ["blog", "news", "career", "job", "contact", "privacy", "terms", "cookie", "login",
+                 "cart", "tag/", "category/", "author/", "wp-", "feed", "search"]
+SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".doc", ".docx",
+                   ".xls", ".xlsx", ".ppt", ".pptx", ".mp4", ".xml", ".css", ".js")
+
+
+#Small text resources (robots.txt, sitemaps), read up to max_bytes before the deadline
+#They count against the host's politeness limits but are not retried (they're optional)
+def fetch_text(session, url, deadline, max_bytes=SITEMAP_MAX_BYTES, timeout=5):
+    scheduler = get_scheduler()
+    if not scheduler.acquire(url, deadline):
+        return None
+    try:
+        remaining = max(0.01, deadline - time.monotonic())
+        with session.get(url, timeout=min(timeout, remaining), stream=True) as res:
+            if res.status_code != 200:
+                return None
+            chunks = []
+            size = 0
+            for chunk in res.iter_content(chunk_size=16 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes or time.monotonic() > deadline:
+                    break
+            return b"".join(chunks)[:max_bytes].decode(res.encoding or "utf-8", errors="replace")
+    except Exception:
+        return None
+    finally:
+        scheduler.release(url)
+
+
+def _sitemap_locs(xml_text):
+    return [loc.strip() for loc in re.findall(r"<loc>\s*(.*?)\s*</loc>", xml_text, re.IGNORECASE | re.DOTALL)]
+
+
+def discover(session, url, deadline):
+    """
+    Reads robots.txt (for Sitemap: lines and Disallow rules) and the sitemaps it
+    names, falling back to /sitemap.xml. A sitemap index is followed one level down.
+    Returns (page URLs from the sitemaps, robots parser or None).
+    """
+    root = _site_root(url)
+    robots = None
+    sitemaps = []
+    robots_text = fetch_text(session, root + "/robots.txt", deadline)
+    if robots_text:
+        robots = RobotFileParser()
+        robots.parse(robots_text.splitlines())
+        sitemaps = [line.split(":", 1)[1].strip() for line in robots_text.splitlines()
+                    if line.lower().startswith("sitemap:")]
+    sitemaps = sitemaps or [root + "/sitemap.xml"]
+
+    pages = []
+    for sitemap in sitemaps[:MAX_CHILD_SITEMAPS]:
+        xml_text = fetch_text(session, sitemap, deadline)
+        if not xml_text:
+            continue
+        if "<sitemapindex" in xml_text[:2000].lower():
+            # Child sitemaps whose name mentions pages are usually the useful ones (not posts / products feeds)
+            children = sorted(_sitemap_locs(xml_text), key=lambda u: "page" not in u.lower())
+            for child in children[:MAX_CHILD_SITEMAPS]:
+                pages.extend(_sitemap_locs(fetch_text(session, child, deadline) or ""))
+        else:
+            pages.extend(_sitemap_locs(xml_text))
+    return pages, robots
+
+
+def _site_root(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _host(url):
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+#Relevance of a URL's path for a teaser; 0 or less means not worth fetching
+def score_url(url):
+    path = urlsplit(url).path.lower()
+    if path.endswith(SKIP_EXTENSIONS) or any(k in path for k in SKIP_KEYWORDS):
+        return 0
+    score = sum(weight for keyword, weight in CRAWL_KEYWORDS.items() if keyword in path)
+    # Deep paths are usually individual items (one product, one article)
+    depth = len([p for p in path.split("/") if p])
+    return score - max(0, depth - 2)
+
+
+def rank_urls(url, candidates, robots=None, user_agent="*", limit=MAX_CRAWL_PAGES - 1):
+    """
+    Normalises candidate links against the homepage, keeps same-site pages that
+    robots.txt allows, and returns the best-scoring ones (ties keep discovery order).
+    """
+    home = urlsplit(url)
+    seen = {urlunsplit((home.scheme, home.netloc, home.path.rstrip("/"), "", ""))}
+    ranked = []
+    for order, link in enumerate(candidates):
+        absolute = urljoin(url, link.strip())
+        parts = urlsplit(absolute)
+        if parts.scheme not in ("http", "https") or _host(absolute) != _host(url):
+            continue
+        normalised = urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip("/"), "", ""))
+        if normalised in seen:
+            continue
+        seen.add(normalised)
+        if robots is not None and not robots.can_fetch(user_agent, normalised):
+            continue
+        score = score_url(normalised)
+        if score > 0:
+            ranked.append((-score, order, normalised))
+    ranked.sort()
+    return [u for _, _, u in ranked[:limit]]
@@ -0,0 +1,161 @@
+#Per-document forbidden terms: the names in a OnePager that would identify the company in a blind teaser
+import re
+from urllib.parse import urlsplit
+
+from scripts.financials import is_holder_category, holder_label
+
+# What each kind of term is replaced with (same register as the Presidio replacements)
+COMPANY_REPLACEMENT = "the Company"
+SHAREHOLDER_REPLACEMENT = "a Key Shareholder"
+PERSON_REPLACEMENT = "Key Management"
+WEBSITE_REPLACEMENT = "the Company website"
+
+# Sections listing people as "- Name (Role)"
+PEOPLE_SECTIONS = ["Board Members", "Leadership"]
+
+# Shareholder rows that are neither a category nor a name worth hiding (whole labels, as holder_label gives them)
+GENERIC_HOLDERS = {"huf", "clearing members", "office bearers", "escrow account", "trusts", "bodies corporate",
+                   "directors", "employees", "nris", "iepf"}
+
+# Corporate suffixes dropped to get the short form of a name ("Kalyani Forge Ltd." -> "Kalyani Forge");
+# a suffix glued to the previous one by a dot ("Pvt.Ltd") goes too
+SUFFIX_PATTERN = re.compile(r"(?i)(?:[\s,]+|(?<=\.))(pvt\.?|private|ltd\.?|limited|inc\.?|corp\.?|llc|llp)\b\.?")
+
+# Honorifics in front of a person's name, possibly several ("Late Shri ...")
+TITLE_PATTERN = re.compile(r"(?i)^(?:(?:late|mr|mrs|ms|dr|shri|sri|smt|prof)\.?\s+)+")
+
+# Shorter single words are too likely to be ordinary words ("Ind")
+MIN_ALIAS_CHARS = 4
+
+# File names / request names that say nothing about the company (the service's unnamed uploads,
+# templates): never forbidden terms, or every ordinary "company" in a deck would be replaced
+GENERIC_NAMES = {"company", "the company", "onepager", "one pager", "teaser", "untitled", "unknown", "sample", "test"}
+
+# Ordinary words that can't stand alone as a company alias ("Global" from "Global Logistics")
+COMMON_WORDS = {
+    "global", "national", "international", "united", "first", "new", "general", "royal", "standard",
+    "universal", "advanced", "modern", "premier", "prime", "super", "star", "city", "metro", "eastern",
+    "western", "northern", "southern", "asian", "indian", "india", "bharat", "power", "energy", "smart",
+    "green", "golden", "silver", "bright", "future", "alpha", "apex", "best", "classic", "digital",
+    "capital", "trust", "bank", "systems", "solutions", "technologies", "industries", "motors", "foods",
+    "health", "care", "life", "home", "network", "express", "trade", "trading", "steel", "forge", "cement",
+    "chemicals", "pharma", "textiles", "agro", "infra", "media", "cinemas", "logistics", "swift", "quick",
+    "rapid", "pioneer", "crown", "diamond", "pearl", "ocean", "sun", "moon", "sky", "earth", "nova",
+}
+
+# Words that mark a shareholder as an organisation (no first + last name short form for those)
+ORG_WORDS = {"fund", "trust", "bank", "limited", "ltd", "inc", "investment", "investments", "capital", "securities",
+             "company", "corporation", "group", "industries", "ventures", "holdings", "services", "express",
+             "finance", "trading", "enterprises", "llp", "pvt", "private", "ag", "plc", "scheme", "insurance",
+             "corp", "authority", "ministry"}
+
+
+def _short_name(name):
+    short = name
+    while True:
+        stripped = SUFFIX_PATTERN.sub("", short).strip(" ,.")
+        if stripped == short:
+            return short
+        short = stripped
+
+
+#The name, its suffix-free form and (for multi-word names) the spaced-out / run-together variants;
+#generic names ("Company", "OnePager") give none
+def _name_variants(name):
+    name = " ".join(name.split())
+    if name.lower() in GENERIC_NAMES:
+        return set()
+    short = _short_name(name)
+    variants = {name, short}
+    words = short.replace("-", " ").split()
+    if len(words) > 1:
+        variants.add("".join(words))
+        if len(words[0]) >= MIN_ALIAS_CHARS and words[0].lower() not in COMMON_WORDS:
+            variants.add(words[0])
+    return {v for v in variants if len(v) >= MIN_ALIAS_CHARS and v.lower() not in GENERIC_NAMES}
+
+
+#"Allcargo Gati is a leading ..." -> "Allcargo Gati" (the Business Description opens with the legal / trading name)
+def _description_subject(onepager):
+    section = onepager.section("Business Description")
+    if section is None:
+        return None
+    match = re.match(r"\s*([A-Z][\w&.\-]*(?:\s+[\w&.\-]+){0,5}?)\s+(?:is|was|are)\s+(?:a|an|the|one)\b", section.text())
+    return match.group(1) if match else None
+
+
+#"Mukul Mahavir Agrawal" -> {"Mukul Mahavir Agrawal", "Mukul Agrawal"}
+def _person_variants(name):
+    words = name.split()
+    return {name, f"{words[0]} {words[-1]}"} if len(words) >= 3 else {name}
+
+
+#"- Shashi Kiran Janardhan Shetty (Managing Director)" -> the name plus its first + last form
+def _people(onepager):
+    names = set()
+    for section_name in PEOPLE_SECTIONS:
+        section = onepager.section(section_name)
+        if section is None:
+            continue
+        for line in section.text().splitlines():
+            match = re.match(r"\s*[-*]\s+([^()]+?)\s*(?:\(|$)", line)
+            if not match:
+                continue
+            name = TITLE_PATTERN.sub("", match.group(1)).strip()
+            if len(name.split()) >= 2:
+                names |= _person_variants(name)
+    return names
+
+
+#Named holders from the Shareholders tables; only rows that are a category label as a whole ("Promoters",
+#"Mutual Funds") are left alone, so "HDFC Mutual Fund" or "State Bank of India" still become terms
+def _shareholders(onepager):
+    section = onepager.section("Shareholders")
+    names = set()
+    if section is None:
+        return names
+    for table in section.tables:
+        if not table.headers:
+            continue
+        for row in table.rows:
+            name = str(row.get(table.headers[0]) or "").strip(" .")
+            if not name or is_holder_category(name) or holder_label(name) in GENERIC_HOLDERS:
+                continue
+            titled = bool(TITLE_PATTERN.match(name))
+            name = TITLE_PATTERN.sub("", name)
+            words = name.lower().replace(".", " ").split()
+            if titled or (len(words) >= 2 and not ORG_WORDS & set(words)):
+                # Looks like a person: also catch the first + last name form
+                names |= _person_variants(name)
+            elif len(words) >= 2 or len(name) >= MIN_ALIAS_CHARS * 2:
+                names |= {name, _short_name(name)}
+    return names
+
+
+def document_terms(onepager, company=None):
+    """
+    {term: replacement} for one OnePager: the company name (from the file name and the
+    Business Description) with its aliases, the website domain, named shareholders and
+    the people in Board Members / Leadership. Company terms win over the others when a
+    name appears in several places (e.g. a promoter company that shares the name).
+    """
+    terms = {}
+    for name in _people(onepager):
+        terms[name] = PERSON_REPLACEMENT
+    for name in _shareholders(onepager):
+        terms[name] = SHAREHOLDER_REPLACEMENT
+
+    if onepager.website:
+        host = urlsplit(onepager.website).netloc.lower()
+        host = host[4:] if host.startswith("www.") else host
+        if host:
+            terms[host] = WEBSITE_REPLACEMENT
+            terms["www." + host] = WEBSITE_REPLACEMENT
+            label = host.split(".")[0]
+            if len(label) >= MIN_ALIAS_CHARS + 1:
+                terms[label] = COMPANY_REPLACEMENT
+
+    for name in [company, _description_subject(onepager)]:
+        for variant in _name_variants(name or ""):
+            terms[variant] = COMPANY_REPLACEMENT
+    return terms
@@ -0,0 +1,156 @@
+#Incremental HTML -> text blocks extraction for scraped pages
+import hashlib
+import re
+import threading
+from html.parser import HTMLParser
+
+# Text kept per site (all pages together), in characters
+SITE_TEXT_BUDGET = 100000
+
+# Minimum length of a kept block per tag (shorter ones are usually navigation / buttons)
+BLOCK_TAGS = {
+    "p": 50,
+    "li": 40,
+    "h1": 20,
+    "h2": 20,
+    "h3": 20,
+    "h4": 20,
+}
+
+# Content inside these tags is never text we want
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "footer"}
+
+# <a href> values remembered per page (crawler link discovery)
+MAX_LINKS = 500
+
+# Blocks whose 64-bit SimHashes differ in at most this many bits count as near-duplicates
+SIMHASH_DISTANCE = 3
+
+
+#Shared character budget for every page of one site (pages are parsed in parallel)
+class TextBudget:
+
+    def __init__(self, limit=SITE_TEXT_BUDGET):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self, n):
+        """Claims n characters; False once the budget is already spent."""
+        with self._lock:
+            if self.used >= self.limit:
+                return False
+            self.used += n
+            return True
+
+    @property
+    def spent(self):
+        return self.used >= self.limit
+
+
+class BlockExtractor(HTMLParser):
+    """
+    Fed the page in chunks (feed() as bytes arrive), keeps the text of <p>, <li> and
+    heading elements as separate blocks. No tree is built, so memory stays at the
+    current block plus the kept text; full turns True once the site budget is spent
+    and the caller can stop reading. Link targets (including menu links) go to links.
+    """
+
+    def __init__(self, budget=None):
+        super().__init__(convert_charrefs=True)
+        self.budget = budget or TextBudget()
+        self.blocks = []
+        self._seen = set()
+        self._skip_depth = 0
+        self._tag = None
+        self._parts = []
+        self.links = []
+
+    @property
+    def full(self):
+        return self.budget.spent
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a" and len(self.links) < MAX_LINKS:
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            # A block opening inside another (e.g. <li><p>) ends the outer one
+            self._flush()
+            self._tag = tag
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._tag and not self._skip_depth:
+            self._parts.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        if self._tag is None:
+            return
+        text = " ".join("".join(self._parts).split())
+        min_chars = BLOCK_TAGS[self._tag]
+        self._tag = None
+        self._parts = []
+        if len(text) <= min_chars or text in self._seen:
+            return
+        self._seen.add(text)
+        if self.budget.take(len(text)):
+            self.blocks.append(text)
+
+
+#Extraction of an already downloaded page (e.g. from the HTTP cache), still stopping at the budget
+def extract_blocks(html, budget=None, chunk_chars=64 * 1024):
+    extractor = BlockExtractor(budget)
+    for start in range(0, len(html), chunk_chars):
+        extractor.feed(html[start:start + chunk_chars])
+        if extractor.full:
+            break
+    extractor.close()
+    return extractor
+
+
+#64-bit SimHash over word 3-shingles: near-identical text gives hashes a few bits apart
+def simhash(text):
+    words = re.findall(r"\w+", text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    bits = [format(int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+            for s in shingles]
+    # Column-wise majority vote per bit (zip keeps the loop in C)
+    half = len(bits) / 2
+    return int("".join("1" if column.count("1") > half else "0" for column in zip(*bits)), 2)
+
+
+def dedupe_blocks(blocks, distance=SIMHASH_DISTANCE):
+    """
+    Drops blocks that repeat an earlier one (cookie banners, footers and taglines
+    shared by every page), keeping the first occurrence. Hashes are split into
+    distance + 1 bands, so two hashes within the distance share at least one band
+    exactly and only those pairs are compared.
+    """
+    bands = distance + 1
+    width = 64 // bands
+    mask = (1 << width) - 1
+    index = [{} for _ in range(bands)]
+    kept = []
+    for block in blocks:
+        h = simhash(block)
+        keys = [(h >> (b * width)) & mask for b in range(bands)]
+        candidates = {c for b, key in enumerate(keys) for c in index[b].get(key, ())}
+        if any(bin(h ^ c).count("1") <= distance for c in candidates):
+            continue
+        for b, key in enumerate(keys):
+            index[b].setdefault(key, []).append(h)
+        kept.append(block)
+    return kept
@@ -0,0 +1,238 @@
+#Deterministic chart data from the OnePager's financial statements and shareholding tables (no LLM involved)
+import re
+
+# OnePager "Financials Status" figures are in INR million; charts show INR crore
+FINANCIALS_TO_CRORE = 0.1
+CHART_UNIT = "₹ Cr"
+
+# Years on the bar chart (most recent ones with revenue)
+BAR_YEARS = 4
+
+# Metrics drawn next to revenue on the bar chart, per sector (first one found wins)
+BAR_METRICS = {
+    "Manufacturing": ["Operating EBITDA", "PAT"],
+    "Consumer": ["PAT", "Operating EBITDA"],
+    "Tech": ["PAT", "Operating EBITDA"],
+    "Pharma": ["Operating EBITDA", "PAT"],
+    "Logistics": ["Operating EBITDA", "PAT"],
+}
+DEFAULT_BAR_METRICS = ["Operating EBITDA", "PAT"]
+REVENUE_METRIC = "Revenue From Operations"
+
+# Shorter names for the chart legend
+METRIC_LABELS = {
+    REVENUE_METRIC: "Revenue",
+    "Operating EBITDA": "EBITDA",
+    "PAT": "PAT",
+}
+
+# Shareholding rows that describe a holder category rather than a named holder (safe for a blind teaser).
+# A row must be one of these labels as a whole (after holder_label): "Mutual Funds" is a category,
+# "HDFC Mutual Fund" a named holder
+SHAREHOLDER_CATEGORIES = {
+    "promoter", "promoters", "promoter group", "promoters and promoter group", "non promoter", "non promoters",
+    "public", "public shareholding", "public shareholders", "retail", "retail investors", "individuals",
+    "institutions", "institutional investors", "fii", "fiis", "fpi", "fpis", "fii fpi", "fiis fpis",
+    "foreign institutional investors", "foreign portfolio investors", "dii", "diis",
+    "domestic institutional investors", "mutual fund", "mutual funds", "insurance companies", "banks",
+    "financial institutions", "banks and financial institutions", "government", "central government",
+    "state government", "other", "others",
+}
+
+# A revenue split is only worth a pie chart if the smaller part is at least this share
+MIN_MIX_SHARE = 0.05
+
+# OnePager template name -> sector (the template is known before the LLM call)
+TEMPLATE_SECTORS = [
+    ("manufactur", "Manufacturing"),
+    ("industrial", "Manufacturing"),
+    ("consumer", "Consumer"),
+    ("d2c", "Consumer"),
+    ("tech", "Tech"),
+    ("pharma", "Pharma"),
+    ("logistic", "Logistics"),
+]
+
+# "- Revenue From Operations | 2014: 4251.8 | 2015: None | ..."
+SERIES_LINE = re.compile(r"^\s*-\s*(?P<name>[^|]+?)\s*\|(?P<values>.*\d{4}\s*:.*)$")
+YEAR_VALUE = re.compile(r"(\d{4})\s*:\s*([^|]+)")
+
+# Unit words found next to amounts, as multipliers to INR crore
+AMOUNT_UNITS = {
+    "cr": 1.0,
+    "crore": 1.0,
+    "crores": 1.0,
+    "lakh": 0.01,
+    "lakhs": 0.01,
+    "mn": 0.1,
+    "million": 0.1,
+    "bn": 100.0,
+    "billion": 100.0,
+}
+
+
+def parse_number(value):
+    """
+    Number from a table cell or statement value: 12.5, "1,303", "50.2%", "₹ 1,303 crore".
+    Amounts with a unit word are converted to INR crore; None when there is no number.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower().replace(",", "")
+    match = re.search(r"-?\d+(?:\.\d+)?", text)
+    if not match or text in ("none", "n/a", "-"):
+        return None
+    number = float(match.group())
+    unit = re.match(r"\s*([a-z]+)", text[match.end():])
+    if unit and unit.group(1) in AMOUNT_UNITS:
+        number *= AMOUNT_UNITS[unit.group(1)]
+    return number
+
+
+#Chart-friendly rounding: no decimals above 100, two below (same rule the prompt gave the LLM)
+def chart_value(number):
+    return round(number) if abs(number) > 100 else round(number, 2)
+
+
+def financial_series(onepager):
+    """
+    Every "Metric | year: value" line of the Financials Status section as
+    {metric: {year: value in INR crore}}. The first occurrence of a metric wins
+    (the Ratios block repeats some income-statement lines).
+    """
+    section = onepager.section("Financials Status")
+    series = {}
+    if section is None:
+        return series
+    for line in section.text().splitlines():
+        match = SERIES_LINE.match(line)
+        if not match or match.group("name") in series:
+            continue
+        values = {}
+        for year, raw in YEAR_VALUE.findall(match.group("values")):
+            number = parse_number(raw)
+            if number is not None:
+                values[int(year)] = number * FINANCIALS_TO_CRORE
+        series[match.group("name")] = values
+    return series
+
+
+#Sector implied by the OnePager template ("Manufacturing & Industrials" -> "Manufacturing"); None for "Default"
+def template_sector(onepager):
+    template = (onepager.template or "").lower()
+    for keyword, sector in TEMPLATE_SECTORS:
+        if keyword in template:
+            return sector
+    return None
+
+
+def bar_chart(series, sector=None):
+    """Revenue and the sector's second metric for the last BAR_YEARS years (FY labels); None without two years of revenue."""
+    revenue = series.get(REVENUE_METRIC) or {}
+    if not revenue:
+        return None
+    # Consecutive years ending with the latest one (a gap would make the growth look continuous)
+    years = [max(revenue)]
+    while len(years) < BAR_YEARS and years[0] - 1 in revenue:
+        years.insert(0, years[0] - 1)
+    if len(years) < 2:
+        return None
+    chart_series = [{"name": METRIC_LABELS[REVENUE_METRIC], "values": [chart_value(revenue[y]) for y in years]}]
+    for metric in BAR_METRICS.get(sector, DEFAULT_BAR_METRICS):
+        values = series.get(metric) or {}
+        if all(y in values for y in years):
+            chart_series.append({"name": METRIC_LABELS.get(metric, metric), "values": [chart_value(values[y]) for y in years]})
+            break
+    names = " vs ".join(s["name"] for s in chart_series)
+    return {
+        "title": f"{names} ({CHART_UNIT})",
+        "categories": [f"FY{y % 100:02d}" for y in years],
+        "series": chart_series,
+    }
+
+
+#"FIIs / FPIs" -> "fiis fpis", "Non-Promoters" -> "non promoters" (lower case, words only, & as "and")
+def holder_label(name):
+    return " ".join(re.sub(r"[^a-z]+", " ", str(name or "").lower().replace("&", " and ")).split())
+
+
+#True for holder categories ("Promoters", "Mutual Funds"...) as opposed to named holders ("HDFC Mutual Fund")
+def is_holder_category(name):
+    return holder_label(name) in SHAREHOLDER_CATEGORIES
+
+
+def shareholding_chart(onepager, terms=None):
+    """
+    Pie of the holder-category table (Promoters / Non Promoters, ...) in the Shareholders
+    section. Tables of named holders are never used: names would identify the company.
+    Neither is a table with a row among terms (the document's forbidden terms).
+    """
+    section = onepager.section("Shareholders")
+    if section is None:
+        return None
+    forbidden = {holder_label(term) for term in terms or ()}
+    for table in section.tables:
+        if len(table.headers) < 2:
+            continue
+        name_col, value_col = table.headers[0], table.headers[1]
+        rows = [(row.get(name_col), parse_number(row.get(value_col))) for row in table.rows]
+        rows = [(str(name), value) for name, value in rows if name and value is not None and value > 0]
+        if len(rows) < 2 or not all(is_holder_category(name) for name, _ in rows):
+            continue
+        if any(holder_label(name) in forbidden for name, _ in rows):
+            continue
+        total = sum(value for _, value in rows)
+        # Shares given as fractions (0.47) rather than percentages
+        scale = 100.0 if total <= 1.5 else 1.0
+        return {
+            "title": "Shareholding Pattern (%)",
+            "categories": [name for name, _ in rows],
+            "values": [chart_value(value * scale) for _, value in rows],
+        }
+    return None
+
+
+#Products vs services split of the latest year's revenue, when both parts are meaningful
+def revenue_mix_chart(series):
+    products = series.get("Revenue From Sale of Products") or {}
+    services = series.get("Revenue From Sale of Services") or {}
+    years = sorted(set(products) & set(services))
+    if not years:
+        return None
+    year = years[-1]
+    parts = [("Products", products[year]), ("Services", services[year])]
+    total = sum(value for _, value in parts)
+    if total <= 0 or min(value for _, value in parts) / total < MIN_MIX_SHARE:
+        return None
+    return {
+        "title": f"Revenue Mix FY{year % 100:02d} ({CHART_UNIT})",
+        "categories": [name for name, _ in parts],
+        "values": [chart_value(value) for _, value in parts],
+    }
+
+
+def extract_charts(onepager, sector=None, terms=None):
+    """
+    Chart data for the financials slide, straight from the OnePager:
+    {"bar_chart_data": ..., "pie_chart_data": ...}, leaving out any chart the data
+    can't support (the LLM is asked for those instead). sector defaults to the template's;
+    terms (the document's forbidden terms) never make it into a chart label.
+    """
+    sector = sector or template_sector(onepager)
+    series = financial_series(onepager)
+    charts = {
+        "bar_chart_data": bar_chart(series, sector),
+        "pie_chart_data": shareholding_chart(onepager, terms) or revenue_mix_chart(series),
+    }
+    return {field: chart for field, chart in charts.items() if chart}
+
+
+#One line per chart for the prompt, e.g. "Revenue vs EBITDA (₹ Cr): FY22 780 / 74, FY23 923 / 76"
+def describe_chart(chart):
+    if "series" in chart:
+        names = " / ".join(s["name"] for s in chart["series"])
+        points = [f"{c} " + " / ".join(str(s["values"][i]) for s in chart["series"]) for i, c in enumerate(chart["categories"])]
+        return f"{chart['title']} [{names}]: " + ", ".join(points)
+    return f"{chart['title']}: " + ", ".join(f"{c} {v}" for c, v in zip(chart["categories"], chart["values"]))
@@ -1,15 +1,18 @@
-#Imports for making editable PPT
-from pptx import Presentation
-from pptx.chart.data import CategoryChartData
-from pptx.enum.chart import XL_CHART_TYPE, XL_LABEL_POSITION
+#python-pptx is imported inside create_ppt so importing this module stays cheap
 #import for accessing assets
 from pathlib import Path
 #imports for text handling
 import re
 import os
+import io
+import copy
+import threading
 #Imports for timestamping file name
 from datetime import datetime
 
+# Slide template used for every deck
+TEMPLATE_PATH = "Layout.pptx"
+
 # Directory paths for assets
 CERT_DIR = "assets/certifications"
 ICON_DIR = "assets/icons"
@@ -20,6 +23,91 @@ certifications = ["sedex.png", "iso 9001.png", "iso 14001.png", "fair trade.png"
 # Available icon images
 icons = ["Cyber_Security_Hacking_Safety.png","Delivery_Service.png","Ecofriendly_Plant.png","Factory_Manufacturing_Industry.png","Global_Internet.png","Graph_Growth.png","Inventory_Storage.png","Restaurant_Food.png"]
 
+# Placeholder idx values create_ppt fills, per slide layout (checked once, when the template is loaded)
+# Layouts 0 (title) and 4 (disclaimer) are used as they are
+LAYOUT_PLACEHOLDERS = {
+    1: [10, 11, 12, 13, 14, 15, 16, 17, 18],  # Company Profile (B2B)
+    2: [10, 11, 12, 13, 16, 17],              # Financials (B2B)
+    3: [10, 11, 12, 13, 14, 15],              # Investment Highlights
+    5: [10, 11, 12, 13, 14, 15, 16, 17, 18],  # Company Profile (D2C)
+    6: [10, 11, 12, 13, 16, 17],              # Financials (D2C)
+}
+TEMPLATE_LAYOUTS = 7
+
+
+#Raised when the slide template lacks a layout or placeholder create_ppt relies on
+class TemplateError(RuntimeError):
+    pass
+
+
+#Checks up front that every layout create_ppt uses exists and has its placeholders (raises TemplateError)
+def validate_template(prs, path=TEMPLATE_PATH):
+    layouts = prs.slide_layouts
+    if len(layouts) < TEMPLATE_LAYOUTS:
+        raise TemplateError(f"'{path}' has {len(layouts)} slide layouts, expected {TEMPLATE_LAYOUTS}")
+    problems = []
+    for layout_index, expected in LAYOUT_PLACEHOLDERS.items():
+        found = {ph.placeholder_format.idx for ph in layouts[layout_index].placeholders}
+        missing = [idx for idx in expected if idx not in found]
+        if missing:
+            problems.append(f"layout {layout_index} ({layouts[layout_index].name}) has no placeholder {missing}")
+    if problems:
+        raise TemplateError(f"'{path}': " + "; ".join(problems))
+
+
+class TemplateManager:
+    """
+    Parses the template once per process: validates it and drops its sample slide(s),
+    so every deck starts with no slides. copy() hands out a Presentation for one deck in
+    well under a millisecond (parsing takes ~10 ms): only the presentation part (slide
+    list, relationships) and the document properties are deep-copied, while the master,
+    layouts, theme and media parts are shared between copies, as rendering only reads them.
+    """
+
+    def __init__(self, path=TEMPLATE_PATH):
+        self.path = path
+        self._base = None
+        self._shared = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        from pptx import Presentation
+        from pptx.parts.coreprops import CorePropertiesPart
+
+        with open(self.path, "rb") as f:
+            prs = Presentation(io.BytesIO(f.read()))
+        validate_template(prs, self.path)
+        slide_ids = prs.slides._sldIdLst
+        for slide_id in list(slide_ids):
+            prs.part.drop_rel(slide_id.rId)
+            slide_ids.remove(slide_id)
+
+        # The base is re-read from the prepared package: python-pptx caches proxies holding
+        # sub-elements (e.g. prs.slides holds <p:sldIdLst>), and a deep copy of those would be
+        # detached from the copied document. A freshly opened Presentation has none yet.
+        prepared = io.BytesIO()
+        prs.save(prepared)
+        prs = Presentation(prepared)
+        package = prs.part.package
+        # deepcopy returns memo entries as they are: pre-seeding it with a part shares that part
+        self._shared = {id(part): part for part in package.iter_parts()
+                        if part is not prs.part and not isinstance(part, CorePropertiesPart)}
+        self._base = prs
+
+    def copy(self):
+        with self._lock:
+            if self._base is None:
+                self._load()
+            return copy.deepcopy(self._base, dict(self._shared))
+
+
+_template = TemplateManager()
+
+
+#A fresh, slide-free Presentation on the slide template (parsed once per process)
+def load_template():
+    return _template.copy()
+
 def apply_formatting_to_placeholder(placeholder, text):
     text_frame = placeholder.text_frame
     text_frame.clear()
@@ -36,7 +124,13 @@ def apply_formatting_to_placeholder(placeholder, text):
             run.font.bold = (i % 2 == 1)  # Every odd index is bold
 
 #Creates PPT
-def create_ppt(slides_data):
+#charts ({"bar_chart_data", "pie_chart_data"} from scripts/financials.py) take precedence over
+#chart data in slides_data, which only older / LLM-made answers carry
+def create_ppt(slides_data, output_filename=None, charts=None):
+
+    #Imports for making editable PPT
+    from pptx.chart.data import CategoryChartData
+    from pptx.enum.chart import XL_CHART_TYPE, XL_LABEL_POSITION
     
     def add_slide_from_template(prs, layout_index, placeholder_text=None, placeholder_charts=None, placeholder_images=None):
         
@@ -90,7 +184,7 @@ def create_ppt(slides_data):
                 # Specific formatting based on chart type
                 if chart_type == XL_CHART_TYPE.PIE:
                     chart.has_title = True
-                    chart.chart_title.text_frame.text = slides_data.get("pie_chart_data", {}).get("title", "Revenue Share")
+                    chart.chart_title.text_frame.text = pie_title
                     # Move title up
                     chart.chart_title.include_in_layout = False
                     
@@ -100,6 +194,10 @@ def create_ppt(slides_data):
                     data_labels.position = XL_LABEL_POSITION.BEST_FIT
                 
                 elif chart_type == XL_CHART_TYPE.COLUMN_CLUSTERED:
+                    # Title carries the unit (e.g. "Revenue vs EBITDA (₹ Cr)"); the legend names the series
+                    chart.has_title = True
+                    chart.chart_title.text_frame.text = bar_title
+                    chart.chart_title.include_in_layout = False
                     data_labels.show_value = True  # Usually just value is enough for bars
 
         if placeholder_images:
@@ -124,50 +222,39 @@ def create_ppt(slides_data):
 
         return slide
 
-    def delete_slide(prs, slide_index):
-        slide_id_list = prs.slides._sldIdLst
-        slides = list(slide_id_list)
+    charts = charts or {}
 
-        prs.part.drop_rel(slides[slide_index].rId)
-        slide_id_list.remove(slides[slide_index])
-    
-    bar_data = CategoryChartData()
-    pie_data = CategoryChartData()
-
-    # --- PARSE PIE CHART DATA ---
-    pie_data_obj = slides_data.get("pie_chart_data", {})
-    # Default fallback if empty or missing
-    if not pie_data_obj:
-        pie_data_obj = {"title": "Default Pie", "categories": ["A", "B"], "values": [50, 50]}
-        
-    pie_title = pie_data_obj.get("title", "Default Pie")
-    pie_cats = pie_data_obj.get("categories", [])
-    pie_vals = pie_data_obj.get("values", [])
-
-    # Ensure equal length (avoid index errors)
-    min_len = min(len(pie_cats), len(pie_vals))
-    pie_data.categories = pie_cats[:min_len]
-    pie_data.add_series(pie_title, pie_vals[:min_len])
-    
-    # --- PARSE BAR CHART DATA ---
-    bar_data_obj = slides_data.get("bar_chart_data", {})
-    # Default fallback
-    if not bar_data_obj:
-        bar_data_obj = {"title": "Default Bar", "categories": ["A", "B"], "values": [50, 50]}
+    #Chart object -> CategoryChartData; "series" holds several named series (e.g. Revenue and EBITDA)
+    def build_chart_data(field, kind):
+        chart_obj = charts.get(field) or slides_data.get(field) or {}
+        # Default fallback if empty or missing (should be rare: charts come from the OnePager, or the LLM answer is validated)
+        if not chart_obj:
+            print(f"No {kind} chart data, using a placeholder chart")
+            chart_obj = {"title": f"Default {kind.title()}", "categories": ["A", "B"], "values": [50, 50]}
+
+        title = chart_obj.get("title", f"Default {kind.title()}")
+        categories = chart_obj.get("categories", [])
+        series = chart_obj.get("series") or [{"name": title, "values": chart_obj.get("values", [])}]
 
-    bar_title = bar_data_obj.get("title", "Default Bar")
-    bar_cats = bar_data_obj.get("categories", [])
-    bar_vals = bar_data_obj.get("values", [])
+        # Ensure equal length (avoid index errors)
+        min_len = min([len(categories)] + [len(s["values"]) for s in series])
+        if any(len(s["values"]) != len(categories) for s in series):
+            print(f"{kind.title()} chart has {len(categories)} categories but {[len(s['values']) for s in series]} values, keeping {min_len}")
+        chart_data = CategoryChartData()
+        chart_data.categories = categories[:min_len]
+        for s in series:
+            chart_data.add_series(s["name"], s["values"][:min_len])
+        return title, chart_data
 
-    min_len_bar = min(len(bar_cats), len(bar_vals))
-    bar_data.categories = bar_cats[:min_len_bar]
-    bar_data.add_series(bar_title, bar_vals[:min_len_bar])
+    # --- PARSE CHART DATA ---
+    pie_title, pie_data = build_chart_data("pie_chart_data", "pie")
+    bar_title, bar_data = build_chart_data("bar_chart_data", "bar")
 
     # ========================================
     # LOAD PRESENTATION TEMPLATE
     # ========================================
     
-    prs = Presentation("Layout (1).pptx")
+    prs = load_template()
 
     # ========================================
     # CERTIFICATIONS PROCESSING
@@ -279,11 +366,10 @@ def create_ppt(slides_data):
 
     # Slide 5: Disclaimer
     add_slide_from_template(prs, 4)
-    
-    # Delete the default slide master slide
-    delete_slide(prs, 0)
 
-    #Saves PPT
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_filename = f"output/ppt/company_{timestamp}.pptx"
+    #Saves PPT (timestamped name unless the caller picked one, e.g. in batch mode)
+    if output_filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_filename = f"output/ppt/company_{timestamp}.pptx"
     prs.save(output_filename)
+    return output_filename
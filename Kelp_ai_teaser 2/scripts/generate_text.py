@@ -1,19 +1,30 @@
 # Import for fatal errors
 import warnings
 warnings.filterwarnings("ignore")
-# Imports for API
-import google.generativeai as genai
-from google.api_core import exceptions
+# The Gemini SDK is imported inside generate_slide_text so importing this module stays cheap
 import json
 # Import for cleaning JSON response
 import re
 # Import for secure API key implementation
 import os 
+import time
+
+from scripts.cache import make_key
+from scripts.model_router import get_router
+from scripts.json_stream import JsonFieldStream
+from scripts.validate import tidy_slide_text, validate_slide_text
+from scripts.financials import describe_chart
+from scripts.context import estimate_tokens
+# The image names the deck can actually place (generate_ppt imports python-pptx lazily, so this stays cheap)
+from scripts.generate_ppt import certifications, icons
 
 # API CONFIGURATION
-MY_API_KEY = os.getenv('GEMINI_API_KEY')
-if not MY_API_KEY:
-    raise ValueError("Error: GEMINI_API_KEY environment variable not set.")
+# Read when the LLM stage runs, so cached / PPT-only runs work without a key
+def get_api_key():
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        raise ValueError("Error: GEMINI_API_KEY environment variable not set.")
+    return api_key
 
 # MODEL CONFIGURATION
 
@@ -26,108 +37,149 @@ MODELS_TO_TRY = [
 ]
 
 
-# Directory paths for assets
-CERT_DIR = "assets/certifications"
-ICON_DIR = "assets/icons"
+#Shared router over MODELS_TO_TRY (reused clients, health tracking, circuit breaker)
+def model_router():
+    return get_router(MODELS_TO_TRY)
 
-# Available certification images (used in response schema)
-certifications = ["sedex.png", "iso 9001.png"]
 
-# Available icon images (used in response schema)
-icons = ["growth.png", "market.png", "revenue.png", "team.png"]
+# OnePager sections that never make it into a teaser (bulky, or identifying by nature)
+PROMPT_EXCLUDED_SECTIONS = ["Website", "Credit Status", "People", "Auditor Details", "CARO Analysis",
+                            "Related Party Disclosure", "Residence of Shareholders"]
 
+# Long tables (e.g. a 400-row product portfolio) are cut to their first rows in the prompt
+PROMPT_TABLE_ROWS = 25
 
-def generate_slide_text(private_data, public_data):
-    
-    genai.configure(api_key=MY_API_KEY)
-    
-    # Defines the expected JSON structure for the AI response
-    response_schema = {
-        "type": "OBJECT",
-        "properties": {
-            # Sector classification (Manufacturing, Consumer, Tech, Pharma, Logistics)
-            "sector": {"type": "STRING"}, 
-            
-            # Business overview bullets (4-5 points)
-            "business_overview": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"}
-            },
-            
-            # Legacy field for backward compatibility (D2C brands)
-            "brand_overview": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"}
-            },
-            
-            # At-a-glance summary (3 concise points)
-            "at_a_glance": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"}
-            },
-            
-            # Portfolio and products list (3 points)
-            "portfolio_and_products": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"}
-            },
-            
-            # Investment highlights (5-7 points)
-            "investment_highlights": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"}
-            },
-            
-            # Descriptive text explaining the bar chart
-            "bar_chart_text": {"type": "STRING"},
-            
-            # Descriptive text explaining the pie chart
-            "pie_chart_text": {"type": "STRING"},
-            
-            # Certification images (format: "cert1.png||cert2.png")
-            "certifications": {"type": "STRING"},
-            
-            # Icon images for visual representation (format: "icon1.png||icon2.png")
-            "icons": {"type": "STRING"},
-            
-            # Source URLs used for research
-            "source_urls": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"}
-            },
-            
-            # Pie chart data structure
-            "pie_chart_data": {
-                "type": "OBJECT",
-                "properties": {
-                    "title": {"type": "STRING"},
-                    "categories": {"type": "ARRAY", "items": {"type": "STRING"}},
-                    "values": {"type": "ARRAY", "items": {"type": "NUMBER"}}
-                },
-                "required": ["title", "categories", "values"]
+
+#Picks the parts of a parsed OnePager that the prompt needs
+def prompt_private_data(onepager):
+    return onepager.text(exclude=PROMPT_EXCLUDED_SECTIONS, max_table_rows=PROMPT_TABLE_ROWS)
+
+
+# Defines the expected JSON structure for the AI response
+# (the chart-data fields are only requested for charts the OnePager can't supply, see response_schema)
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        # Sector classification (Manufacturing, Consumer, Tech, Pharma, Logistics)
+        "sector": {"type": "STRING"}, 
+        
+        # Business overview bullets (4-5 points)
+        "business_overview": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"}
+        },
+        
+        # Legacy field for backward compatibility (D2C brands)
+        "brand_overview": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"}
+        },
+        
+        # At-a-glance summary (3 concise points)
+        "at_a_glance": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"}
+        },
+        
+        # Portfolio and products list (3 points)
+        "portfolio_and_products": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"}
+        },
+        
+        # Investment highlights (5-7 points)
+        "investment_highlights": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"}
+        },
+        
+        # Descriptive text explaining the bar chart
+        "bar_chart_text": {"type": "STRING"},
+        
+        # Descriptive text explaining the pie chart
+        "pie_chart_text": {"type": "STRING"},
+        
+        # Certification images (format: "cert1.png||cert2.png")
+        "certifications": {"type": "STRING"},
+        
+        # Icon images for visual representation (format: "icon1.png||icon2.png")
+        "icons": {"type": "STRING"},
+        
+        # Source URLs used for research
+        "source_urls": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"}
+        },
+        
+        # Pie chart data structure
+        "pie_chart_data": {
+            "type": "OBJECT",
+            "properties": {
+                "title": {"type": "STRING"},
+                "categories": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "values": {"type": "ARRAY", "items": {"type": "NUMBER"}}
             },
-            
-            # Bar chart data structure
-            "bar_chart_data": {
-                "type": "OBJECT",
-                "properties": {
-                    "title": {"type": "STRING"},
-                    "categories": {"type": "ARRAY", "items": {"type": "STRING"}},
-                    "values": {"type": "ARRAY", "items": {"type": "NUMBER"}}
-                },
-                "required": ["title", "categories", "values"]
-            }
+            "required": ["title", "categories", "values"]
         },
-        # Minimum required fields for valid response
-        "required": ["sector", "at_a_glance", "portfolio_and_products", "investment_highlights"]
+        
+        # Bar chart data structure
+        "bar_chart_data": {
+            "type": "OBJECT",
+            "properties": {
+                "title": {"type": "STRING"},
+                "categories": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "values": {"type": "ARRAY", "items": {"type": "NUMBER"}}
+            },
+            "required": ["title", "categories", "values"]
+        }
+    },
+    # Minimum required fields for valid response
+    "required": ["sector", "at_a_glance", "portfolio_and_products", "investment_highlights"]
+}
+
+
+# Chart fields normally filled from the OnePager's financials (scripts/financials.py)
+CHART_DATA_FIELDS = ["bar_chart_data", "pie_chart_data"]
+
+
+#RESPONSE_SCHEMA minus the chart-data fields already extracted from the OnePager
+def response_schema(charts=None):
+    charts = charts or {}
+    return {
+        **RESPONSE_SCHEMA,
+        "properties": {k: v for k, v in RESPONSE_SCHEMA["properties"].items() if k not in charts}
     }
 
-    # Ensures API returns structured JSON matching our schema
-    generation_config = {
+
+# Ensures API returns structured JSON matching our schema
+def generation_config(charts=None):
+    return {
         "response_mime_type": "application/json",
-        "response_schema": response_schema
+        "response_schema": response_schema(charts)
     }
-    
+
+
+#Prompt text for the charts: the extracted numbers to describe, and instructions for any chart still missing
+def chart_guidelines(charts=None):
+    charts = charts or {}
+    missing = [f for f in CHART_DATA_FIELDS if f not in charts]
+    lines = []
+    if charts:
+        lines.append("CHART DATA (taken from the financial statements, describe these exact numbers):")
+        lines.extend(f"- {field}: {describe_chart(chart)}" for field, chart in charts.items())
+    if missing:
+        fields = " & ".join(f'"{f}"' for f in missing)
+        lines.append(f"""{fields}:
+       - Pick the most important metric based on the Sector Guidelines.
+       - Use 3 to 5 categories per chart.
+       - If there are more than 2 decimal places, truncate to two.
+       - If values are > 100, truncate decimals completely.""")
+    return "\n       ".join(lines)
+
+
+#Renders the full prompt for one company; charts (from extract_charts) replace the chart data the LLM used to invent
+def build_prompt(private_data, public_data, charts=None):
+
     # Detailed instructions for the AI to generate sector-specific content
     prompt = f"""
     You are an M&A investment analyst.
@@ -206,11 +258,7 @@ def generate_slide_text(private_data, public_data):
        - Select icons that match the content theme of each section.
        - Icon filenames contain keywords describing what they represent - choose accordingly.
 
-    8. "pie_chart_data" & "bar_chart_data":
-       - Pick the most important metric based on the Sector Guidelines.
-       - Use 3 to 5 categories per chart.
-       - If there are more than 2 decimal places, truncate to two.
-       - If values are > 100, truncate decimals completely.
+    8. {chart_guidelines(charts)}
 
     9. "source_urls":
        - Array of any external URLs you used for research or verification.
@@ -225,35 +273,220 @@ def generate_slide_text(private_data, public_data):
 
     PRIORITY: Always prioritize PRIVATE DATA and PUBLIC DATA over internet sources.
     """
-    
-    # MODEL FALLBACK LOOP 
-    for model_name in MODELS_TO_TRY:
-        try:
-            model = genai.GenerativeModel(model_name)
-            
+    return prompt
+
+
+#Strips code fences and parses the model's JSON object (raises on anything else)
+def parse_response(raw_text):
+    # Clean response
+    text_response = raw_text.strip()
+    text_response = re.sub(r"^```json|^```", "", text_response).strip()
+    text_response = re.sub(r"```$", "", text_response).strip()
+
+    result = json.loads(text_response)
+    if not isinstance(result, dict):
+        raise ValueError("response is not a JSON object")
+    return result
+
+
+def call_usage(usage_metadata, prompt, raw_text, started, first_token_at=None):
+    """
+    Token and latency record for one successful call: token counts from the
+    response's usage_metadata when the SDK sends them, else local estimates
+    (token_source says which). Without streaming the first token arrives with the
+    whole response, so ttft_s equals latency_s.
+    """
+    now = time.perf_counter()
+    prompt_tokens = getattr(usage_metadata, "prompt_token_count", None)
+    response_tokens = getattr(usage_metadata, "candidates_token_count", None)
+    measured = prompt_tokens is not None and response_tokens is not None
+    return {
+        "prompt_tokens": prompt_tokens if measured else estimate_tokens(prompt),
+        "response_tokens": response_tokens if measured else estimate_tokens(raw_text),
+        "token_source": "usage_metadata" if measured else "estimate",
+        "ttft_s": round((first_token_at or now) - started, 3),
+        "latency_s": round(now - started, 3),
+    }
+
+
+#Adds token / latency figures to the router's attempt records; failed attempts are charged the prompt estimate
+def record_usage(attempts, first, kind, prompt, usage):
+    for attempt in attempts[first:]:
+        attempt["kind"] = kind
+        if not attempt["ok"]:
+            attempt.update({"prompt_tokens": estimate_tokens(prompt), "response_tokens": 0, "token_source": "estimate"})
+    # The router appends the winning attempt last
+    attempts[-1].update(usage)
+
+
+#Per-company totals of the attempt records, stored on the generate_slide_text trace record
+def usage_totals(attempts):
+    return {
+        "llm_calls": len(attempts),
+        "prompt_tokens": sum(a.get("prompt_tokens", 0) for a in attempts),
+        "response_tokens": sum(a.get("response_tokens", 0) for a in attempts),
+        "llm_s": round(sum(a["seconds"] for a in attempts), 3),
+    }
+
+
+def repair_fields(prompt, result, problems, api_key, attempts=None, log=print):
+    """
+    Regenerates only the fields that failed validation: the original prompt, the
+    fields that passed as context, and a response schema holding just the broken
+    fields, so the answer is a few hundred tokens instead of the whole deck.
+    Returns {field: new value} for the fields the model sent back; model failures go to log.
+    """
+    fields = [f for f in problems if f in RESPONSE_SCHEMA["properties"]]
+    if not fields:
+        return {}
+    schema = {
+        "type": "OBJECT",
+        "properties": {f: RESPONSE_SCHEMA["properties"][f] for f in fields},
+        "required": fields
+    }
+    config = {"response_mime_type": "application/json", "response_schema": schema}
+    kept = {k: v for k, v in result.items() if k not in fields}
+    issues = "\n".join(f"    - {f}: {problems[f]}" for f in fields)
+
+    repair_prompt = f"""{prompt}
+
+    --- REPAIR ---
+    Your previous answer had these fields right:
+    {json.dumps(kept, ensure_ascii=False)}
+
+    These fields failed validation and must be regenerated following the guidelines above:
+{issues}
+
+    Return a JSON object containing ONLY these fields: {fields}.
+    """
+
+    def call(model):
+        started = time.perf_counter()
+        response = model.generate_content(repair_prompt, generation_config=config)
+        usage = call_usage(getattr(response, "usage_metadata", None), repair_prompt, response.text, started)
+        return parse_response(response.text), usage
+
+    attempts = attempts if attempts is not None else []
+    first = len(attempts)
+    _, (fixed, usage) = model_router().run(call, api_key, attempts, log)
+    record_usage(attempts, first, "repair", repair_prompt, usage)
+    return {f: fixed[f] for f in fields if f in fixed}
+
+
+# Parsed responses are kept in the StageCache ("text" stage), keyed by everything that shapes the answer:
+# the rendered prompt, the generation config (which holds the schema) and the model that produced it
+def response_key(prompt, config, model_name):
+    return make_key(prompt, config, model_name)
+
+
+#Cached response for this prompt from any of the models (preferred model first); (None, None) on a miss
+def cached_response(cache, prompt, charts=None):
+    config = generation_config(charts)
+    keys = {response_key(prompt, config, model_name): model_name for model_name in MODELS_TO_TRY}
+    key, result = cache.get_any("text", list(keys))
+    return keys.get(key), result
+
+
+# stats (optional dict) is filled with prompt/response sizes, the model that answered, whether it was cached, and
+# token / latency accounting: one record per model attempt in stats["attempts"] plus per-company totals
+# cache (a StageCache) skips the API call when this exact prompt was answered before; refresh ignores cached answers
+# on_field(key, value), when given, streams the response and is called for each top-level field as soon as
+# it has arrived (e.g. to start anonymizing early); the complete result is still returned at the end
+# charts (from scripts/financials.py extract_charts) are described in the prompt and dropped from the schema
+# log receives the model failure / repair messages (the pipeline passes its per-company log)
+def generate_slide_text(private_data, public_data, stats=None, cache=None, refresh=False, on_field=None, charts=None,
+                        log=print):
+    prompt = build_prompt(private_data, public_data, charts)
+    config = generation_config(charts)
+    start = time.perf_counter()
+
+    if cache is not None and not refresh:
+        model_name, result = cached_response(cache, prompt, charts)
+        if result is not None:
+            if stats is not None:
+                stats["model"] = model_name
+                stats["prompt_chars"] = len(prompt)
+                stats["cache_hit"] = True
+                stats.update(usage_totals([]))
+            return result
+    if stats is not None:
+        stats["cache_hit"] = False
+
+    api_key = get_api_key()
+
+    # Fields streamed before a hedged / failed attempt lost still reach on_field; consumers
+    # match them against the final result by value
+    def emit(key, value):
+        if stats is not None and "first_field_s" not in stats:
+            stats["first_field_s"] = round(time.perf_counter() - start, 3)
+        on_field(key, value)
+
+    # One request on the given client; unparseable output counts as that model failing
+    def call(model):
+        started = time.perf_counter()
+        if on_field is None:
             response = model.generate_content(
                 prompt, 
-                generation_config=generation_config
+                generation_config=config
             )
-            
-            # Clean response
-            text_response = response.text.strip()
-            text_response = re.sub(r"^```json|^```", "", text_response).strip()
-            text_response = re.sub(r"```$", "", text_response).strip()
-            
-            result = json.loads(text_response)
-            
-            # Backward compatibility fix
-            if result.get("brand_overview") and not result.get("business_overview"):
-                result["business_overview"] = result.pop("brand_overview")
-            
-            return result
-            
-        except exceptions.ResourceExhausted:
-            print(f"Limit hit for {model_name}. Switching...")
-            continue
-        except Exception as e:
-            print(f"Error with {model_name}: {e}")
-            continue
-
-    raise RuntimeError("All models failed.")
+            raw_text = response.text
+            usage = call_usage(getattr(response, "usage_metadata", None), prompt, raw_text, started)
+        else:
+            fields = JsonFieldStream()
+            parts = []
+            first_token_at = None
+            usage_metadata = None
+            for chunk in model.generate_content(prompt, generation_config=config, stream=True):
+                first_token_at = first_token_at or time.perf_counter()
+                parts.append(chunk.text)
+                # Every chunk carries the running counts; the last one has the totals
+                usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
+                for key, value in fields.feed(chunk.text):
+                    emit(key, value)
+            raw_text = "".join(parts)
+            usage = call_usage(usage_metadata, prompt, raw_text, started, first_token_at)
+        
+        return parse_response(raw_text), len(raw_text), usage
+
+    # MODEL FALLBACK (healthiest model first, see scripts/model_router.py)
+    attempts = []
+    model_name, (result, response_chars, usage) = model_router().run(call, api_key, attempts, log)
+    record_usage(attempts, 0, "generate", prompt, usage)
+
+    if stats is not None:
+        stats["model"] = model_name
+        stats["attempts"] = attempts
+        stats["prompt_chars"] = len(prompt)
+        stats["response_chars"] = response_chars
+        stats["ttft_s"] = usage["ttft_s"]
+    
+    # Backward compatibility fix
+    if result.get("brand_overview") and not result.get("business_overview"):
+        result["business_overview"] = result.pop("brand_overview")
+
+    # Local fixes first (extra bullets, unknown images), then one targeted repair call for the rest
+    tidied = tidy_slide_text(result, certifications, icons)
+    problems = validate_slide_text(result, config["response_schema"])
+    repaired = list(problems)
+    if problems:
+        log(f"Repairing fields {repaired}: {problems}")
+        try:
+            result.update(repair_fields(prompt, result, problems, api_key, attempts, log))
+            tidied += tidy_slide_text(result, certifications, icons)
+        except RuntimeError as e:
+            log(f"Repair failed: {e}")
+        problems = validate_slide_text(result, config["response_schema"])
+    if stats is not None:
+        stats["tidied"] = tidied
+        stats["repaired_fields"] = repaired
+        stats["invalid_fields"] = problems
+        # After the repair call, so its tokens are counted too
+        stats.update(usage_totals(attempts))
+
+    # An answer that is still invalid isn't cached: the next run asks again instead of reusing it
+    if cache is not None and not problems:
+        cache.put("text", response_key(prompt, config, model_name), result)
+    elif problems:
+        log(f"Not caching the response, fields still invalid: {list(problems)}")
+    
+    return result
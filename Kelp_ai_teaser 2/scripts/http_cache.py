@@ -0,0 +1,106 @@
+#Persistent HTTP response cache for scraped pages, with conditional revalidation
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+HTTP_CACHE_DIR = "output/cache/http"
+
+# Entries younger than this are served without touching the network
+HTTP_CACHE_TTL = 24 * 60 * 60
+
+
+#ISO date used in citations ("accessed on")
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(timespec="seconds")
+
+
+class HttpCache:
+    """
+    One entry per URL: <sha256>.json (status, validators, fetch / validation times)
+    and <sha256>.body (raw bytes). Stale entries are revalidated with
+    If-None-Match / If-Modified-Since instead of being downloaded again.
+    on_write(delta), when given, is told how many bytes each write added (StageCache.add_bytes,
+    so pages count towards the stage cache's size limit).
+    """
+
+    def __init__(self, root=HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL, enabled=True, on_write=None):
+        self.root = root
+        self.ttl = ttl
+        self.enabled = enabled
+        self.on_write = on_write
+        self._lock = threading.Lock()
+        self.stats = {"fresh": 0, "revalidated": 0, "network": 0}
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, f"{key}.json"), os.path.join(self.root, f"{key}.body")
+
+    def lookup(self, url):
+        """Returns (meta, body) for a cached URL, or None."""
+        if not self.enabled:
+            return None
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def is_fresh(self, meta):
+        return time.time() - meta["validated_at"] < self.ttl
+
+    #Headers that turn a stale entry into a cheap 304 check
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, status, headers, body, encoding=None):
+        if not self.enabled:
+            return
+        now = time.time()
+        meta = {
+            "url": url,
+            "status": status,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_type": headers.get("Content-Type"),
+            "encoding": encoding,
+            "fetched_at": now,
+            "validated_at": now,
+        }
+        meta_path, body_path = self._paths(url)
+        self._write(body_path, body)
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    #A 304 confirmed the cached copy is still current
+    def mark_validated(self, url, meta):
+        meta = dict(meta, validated_at=time.time())
+        self._write(self._paths(url)[0], json.dumps(meta).encode("utf-8"))
+        return meta
+
+    def count(self, kind):
+        with self._lock:
+            self.stats[kind] += 1
+
+    def _write(self, path, data):
+        os.makedirs(self.root, exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        if self.on_write:
+            self.on_write(len(data) - replaced)
@@ -0,0 +1,64 @@
+#Incremental parser for a streamed JSON object: hands out each top-level field as soon as it is complete
+import json
+
+
+class JsonFieldStream:
+    """
+    feed() takes the response text as it arrives and returns the (key, value) pairs
+    of the top-level members completed by that chunk. Only strings, nesting and
+    member commas are tracked while scanning; each finished member is then decoded
+    with json.loads. Anything before the opening brace (e.g. a ```json fence) is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.pos = 0
+        self.depth = 0
+        self.started = False
+        self.done = False
+        self.in_string = False
+        self.escape = False
+        self.member_start = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        fields = []
+        text = self.text
+        while self.pos < len(text) and not self.done:
+            c = text[self.pos]
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self.depth = 1
+                    self.member_start = self.pos + 1
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+            elif c == '"':
+                self.in_string = True
+            elif c in "{[":
+                self.depth += 1
+            elif c in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    fields.extend(self._member(self.pos))
+                    self.done = True
+            elif c == "," and self.depth == 1:
+                fields.extend(self._member(self.pos))
+                self.member_start = self.pos + 1
+            self.pos += 1
+        return fields
+
+    def _member(self, end):
+        member = self.text[self.member_start:end].strip()
+        if not member:
+            return []
+        try:
+            return list(json.loads("{" + member + "}").items())
+        except ValueError:
+            # A malformed member is left for the final json.loads to report
+            return []
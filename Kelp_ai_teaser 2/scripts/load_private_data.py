@@ -1,6 +1,7 @@
 #Imports to circumvent fatal errors
 import warnings
 warnings.filterwarnings("ignore")
+import re
 
 #Function reads .md file to collect data for API
 def load_private_data(file_name):
@@ -23,3 +24,186 @@ def load_private_data(file_name):
       return None
     
   return file_content
+
+
+def extract_website_from_md(md_text):  # Takes URL from .md file
+    patterns = [
+        r"https?://[^\s\)]+",
+        r"www\.[^\s\)]+"
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, md_text, re.IGNORECASE)
+        if match:
+            url = match.group(0).strip()
+            # Remove URL fragments and query params
+            url = url.split('#')[0].split('?')[0]
+            if not url.startswith("http"):
+                url = "https://" + url
+            return url
+    return None
+
+
+# --- Structured OnePager parsing ---
+
+# Section bodies that carry no information
+EMPTY_SECTION_VALUES = {"", "not available", "n/a", "none"}
+
+# Table cells that mean "no value"
+EMPTY_CELL_VALUES = {"", "-", "none", "n/a", "not available"}
+
+NUMBER_PATTERN = re.compile(r"^-?\d+(?:\.\d+)?$")
+
+
+#Turns a table cell into int / float / None / str
+def parse_cell(cell):
+    value = cell.strip()
+    if value.lower() in EMPTY_CELL_VALUES:
+        return None
+    number = value.replace(",", "")
+    if NUMBER_PATTERN.match(number):
+        return float(number) if "." in number else int(number)
+    return value
+
+
+class Table:
+    """A markdown table: header names plus rows as {header: typed value} dicts."""
+
+    def __init__(self, headers, rows):
+        self.headers = headers
+        self.rows = rows
+
+    def to_markdown(self, max_rows=None):
+        rows = self.rows if max_rows is None else self.rows[:max_rows]
+        lines = ["| " + " | ".join(self.headers) + " |", "|" + "---|" * len(self.headers)]
+        for row in rows:
+            lines.append("| " + " | ".join("" if row.get(h) is None else str(row.get(h)) for h in self.headers) + " |")
+        if max_rows is not None and len(self.rows) > max_rows:
+            lines.append(f"({len(self.rows) - max_rows} more rows omitted)")
+        return "\n".join(lines)
+
+
+class Section:
+    """One "## " section. blocks keeps text and tables in document order."""
+
+    def __init__(self, name, blocks):
+        self.name = name
+        self.blocks = blocks
+
+    @property
+    def tables(self):
+        return [b for b in self.blocks if isinstance(b, Table)]
+
+    def text(self, max_table_rows=None):
+        parts = [b.to_markdown(max_table_rows) if isinstance(b, Table) else b for b in self.blocks]
+        return "\n\n".join(p for p in parts if p)
+
+
+class OnePager:
+    """Indexed OnePager: sections by name (in file order), the template name and the website URL."""
+
+    def __init__(self, template, sections, website):
+        self.template = template
+        self.sections = sections
+        self.website = website
+
+    def section(self, name):
+        return self.sections.get(name)
+
+    def names(self):
+        return list(self.sections)
+
+    def text(self, sections=None, exclude=(), max_table_rows=None):
+        """
+        Markdown for the requested sections only (all sections by default, minus exclude).
+        max_table_rows caps how many rows of each table are rendered.
+        """
+        names = self.names() if sections is None else [n for n in sections if n in self.sections]
+        return "\n\n".join(f"## {n}\n\n{self.sections[n].text(max_table_rows)}" for n in names if n not in exclude)
+
+
+#Splits a section body into text blocks and parsed tables
+def _parse_blocks(body):
+    blocks = []
+    text_lines = []
+    table_lines = []
+
+    def flush_text():
+        text = "\n".join(text_lines).strip()
+        if text:
+            blocks.append(text)
+        text_lines.clear()
+
+    def flush_table():
+        # Needs at least a header and the |---| separator line
+        if len(table_lines) >= 2:
+            split = lambda line: [c.strip() for c in line.strip().strip("|").split("|")]
+            headers = split(table_lines[0])
+            rows = [dict(zip(headers, (parse_cell(c) for c in split(line)))) for line in table_lines[2:]]
+            blocks.append(Table(headers, rows))
+        else:
+            text_lines.extend(table_lines)
+        table_lines.clear()
+
+    for line in body.splitlines():
+        if line.lstrip().startswith("|"):
+            if not table_lines:
+                flush_text()
+            table_lines.append(line)
+        else:
+            if table_lines:
+                flush_table()
+            text_lines.append(line)
+    flush_table()
+    flush_text()
+    return blocks
+
+
+def parse_onepager(md_text):
+    """
+    Single pass over the markdown: "## " headings become sections, markdown tables become
+    Table objects and "Not Available" / empty sections are dropped. A repeated heading
+    (e.g. "Financials Status") is merged into the first one.
+    """
+    template = None
+    sections = {}
+    name = None
+    body_lines = []
+
+    def flush():
+        if name is None:
+            return
+        body = "\n".join(body_lines).strip()
+        if body.lower() in EMPTY_SECTION_VALUES:
+            return
+        blocks = _parse_blocks(body)
+        if name in sections:
+            sections[name].blocks.extend(blocks)
+        else:
+            sections[name] = Section(name, blocks)
+
+    for line in md_text.splitlines():
+        if line.startswith("## "):
+            flush()
+            name = line[3:].strip()
+            body_lines = []
+        elif line.startswith("# ") and name is None:
+            template = line[2:].replace("📄", "").replace("Template:", "").strip()
+        elif name is not None:
+            body_lines.append(line)
+    flush()
+
+    # Website: prefer the dedicated section, fall back to the first URL anywhere in the file
+    website_section = sections.get("Website")
+    website = extract_website_from_md(website_section.text()) if website_section else None
+    if website is None:
+        website = extract_website_from_md(md_text)
+
+    return OnePager(template, sections, website)
+
+
+#Reads and parses a OnePager in one go (None if the file can't be read)
+def load_onepager(file_name):
+    md_text = load_private_data(file_name)
+    if md_text is None:
+        return None
+    return parse_onepager(md_text)
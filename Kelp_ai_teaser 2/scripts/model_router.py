@@ -0,0 +1,206 @@
+#Shared Gemini model router: client reuse, per-model health, circuit breaker and optional hedging
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# A model that returns ResourceExhausted is skipped for this long
+QUOTA_COOLDOWN = 60.0
+
+# This many failures in a row (timeouts, 5xx, unparseable output) also open the circuit, for less time
+FAILURE_THRESHOLD = 3
+FAILURE_COOLDOWN = 15.0
+
+# Weight of the newest sample in the moving averages of latency / error rate
+EWMA_ALPHA = 0.3
+
+# MODELS_TO_TRY order wins, unless a model is failing this often or is this many times slower than the fastest one
+ERROR_RATE_LIMIT = 0.5
+SLOW_FACTOR = 2.0
+
+# Request threads per model: a call plus a hedged twin still racing (or finishing) on it
+HEDGE_FANOUT = 2
+
+
+class ModelHealth:
+
+    def __init__(self, name, preference):
+        self.name = name
+        self.preference = preference
+        self.latency = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.last_error = None
+
+    def is_open(self, now):
+        return now < self.open_until
+
+    def record_success(self, seconds):
+        self.calls += 1
+        self.consecutive_failures = 0
+        self.latency = seconds if self.latency is None else EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.latency
+        self.error_rate *= 1 - EWMA_ALPHA
+
+    def record_failure(self, error, quota=False):
+        self.calls += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+        if quota:
+            self.open_until = time.monotonic() + QUOTA_COOLDOWN
+        elif self.consecutive_failures >= FAILURE_THRESHOLD:
+            self.open_until = time.monotonic() + FAILURE_COOLDOWN
+
+    def snapshot(self, now):
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 3),
+            "latency_s": None if self.latency is None else round(self.latency, 3),
+            "circuit": "open" if self.is_open(now) else "closed",
+            "reopens_in_s": round(max(0.0, self.open_until - now), 1),
+            "last_error": self.last_error,
+        }
+
+
+class ModelRouter:
+    """
+    One per process, shared by every concurrent generate_slide_text call.
+    Each model's GenerativeModel is built once; calls go to the preferred healthy
+    model first, so after one ResourceExhausted the rest of a batch stops paying
+    that failed round-trip. With hedge_after set, a call still running after that
+    many seconds is raced against the next model. close() stops the request threads.
+    """
+
+    def __init__(self, models, hedge_after=None):
+        self.models = list(models)
+        self.hedge_after = hedge_after
+        self.health = {name: ModelHealth(name, i) for i, name in enumerate(self.models)}
+        self._clients = {}
+        self._configured_key = None
+        self._lock = threading.Lock()
+        # Requests run here so a hedged call can be raced (created on first use, see _executor)
+        self._pool = None
+
+    def _client(self, model_name, api_key):
+        import google.generativeai as genai
+
+        with self._lock:
+            if self._configured_key != api_key:
+                genai.configure(api_key=api_key)
+                self._configured_key = api_key
+                self._clients = {}
+            if model_name not in self._clients:
+                self._clients[model_name] = genai.GenerativeModel(model_name)
+            return self._clients[model_name]
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=len(self.models) * HEDGE_FANOUT, thread_name_prefix="llm")
+            return self._pool
+
+    def close(self):
+        """Shuts the request threads down: running requests finish, queued ones are dropped."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def order(self):
+        """
+        Models to try: closed circuits in preference order, with error-prone or much
+        slower models moved back (unmeasured ones count as fast), then open circuits
+        by how soon they reopen.
+        """
+        now = time.monotonic()
+        with self._lock:
+            closed = [h for h in self.health.values() if not h.is_open(now)]
+            opened = sorted((h for h in self.health.values() if h.is_open(now)), key=lambda h: h.open_until)
+            fastest = min((h.latency for h in closed if h.latency is not None), default=None)
+
+            def rank(h):
+                slow = h.latency is not None and h.latency > SLOW_FACTOR * fastest
+                return (h.error_rate > ERROR_RATE_LIMIT, slow, h.preference)
+
+            closed.sort(key=rank)
+        return [h.name for h in closed + opened]
+
+    def _attempt(self, model_name, api_key, call, log):
+        from google.api_core import exceptions
+
+        health = self.health[model_name]
+        start = time.perf_counter()
+        try:
+            result = call(self._client(model_name, api_key))
+        except exceptions.ResourceExhausted as e:
+            with self._lock:
+                health.record_failure(e, quota=True)
+            log(f"Limit hit for {model_name}. Switching...")
+            raise
+        except Exception as e:
+            with self._lock:
+                health.record_failure(e)
+            log(f"Error with {model_name}: {e}")
+            raise
+        with self._lock:
+            health.record_success(time.perf_counter() - start)
+        return result
+
+    def run(self, call, api_key, attempts=None, log=print):
+        """
+        call(client) does one request and returns its parsed result (raising if the
+        output is unusable). Returns (model_name, result); attempts (a list) gets one
+        {"model", "ok", "seconds"} entry per model tried. log receives the failure messages.
+        """
+        attempts = attempts if attempts is not None else []
+        queue = self.order()
+        pending = {}
+        pool = self._executor()
+
+        def launch():
+            model_name = queue.pop(0)
+            future = pool.submit(self._attempt, model_name, api_key, call, log)
+            pending[future] = (model_name, time.perf_counter())
+
+        launch()
+        while pending:
+            hedge = self.hedge_after if queue and len(pending) == 1 else None
+            done, _ = wait(pending, timeout=hedge, return_when=FIRST_COMPLETED)
+            if not done:
+                # Still waiting after hedge_after: race the next model
+                launch()
+                continue
+            for future in done:
+                model_name, started = pending.pop(future)
+                ok = future.exception() is None
+                attempts.append({"model": model_name, "ok": ok, "seconds": round(time.perf_counter() - started, 3)})
+                if ok:
+                    # A slower hedged twin keeps running in the pool; its result is just dropped
+                    return model_name, future.result()
+            if not pending and queue:
+                launch()
+        raise RuntimeError("All models failed.")
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return {name: h.snapshot(now) for name, h in self.health.items()}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+#Process-wide router over the given models (created on first use, closed at exit)
+def get_router(models):
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter(models)
+            atexit.register(_router.close)
+        return _router
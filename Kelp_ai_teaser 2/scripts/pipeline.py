@@ -0,0 +1,281 @@
+#Single-company pipeline shared by the CLI and batch mode
+import os
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+# Stage modules import their heavy dependencies (Gemini SDK, Presidio/spaCy,
+# python-pptx, python-docx, requests) only when the stage actually runs
+from scripts.load_private_data import load_onepager
+from scripts.scrape import scrape_public_data, SCRAPER_VERSION
+from scripts.generate_text import generate_slide_text, prompt_private_data, build_prompt, cached_response
+from scripts.generate_text import PROMPT_EXCLUDED_SECTIONS, PROMPT_TABLE_ROWS
+from scripts.context import pack_context, describe_report, CONTEXT_TOKEN_BUDGET
+from scripts.financials import extract_charts
+from scripts.document_terms import document_terms
+from scripts.anonymize import check_anonymization, rules_fingerprint, FieldSanitizer, get_memo
+from scripts.generate_ppt import create_ppt, TEMPLATE_PATH
+from scripts.citations import create_citations
+from scripts.audit import audit_outputs, describe_audit
+from scripts.cache import StageCache, make_key, file_hash
+from scripts.http_cache import HttpCache, HTTP_CACHE_TTL
+from scripts.trace import RunTrace
+
+PPT_DIR = "output/ppt"
+CITATIONS_DIR = "output/citations"
+AUDIT_DIR = "output/audit"
+
+# Scraped pages change over time, so cached scrape results expire after a day
+SCRAPE_MAX_AGE = 24 * 60 * 60
+
+# Source files whose edits change the rendered deck
+PPT_SOURCE = "scripts/generate_ppt.py"
+
+# Stages that can be selected with --stages (loading the OnePager always runs)
+PIPELINE_STAGES = ["scrape", "text", "anonymize", "ppt", "citations", "audit"]
+
+
+#"data/private/Gati-OnePager.md" -> "Gati"
+def company_name_from_path(file_path):
+    name = os.path.basename(file_path)
+    if name.endswith(".md"):
+        name = name[:-3]
+    if name.endswith("-OnePager"):
+        name = name[:-len("-OnePager")]
+    return name
+
+
+#Filesystem-safe version of the company name, used in output file names
+def company_slug(company):
+    return "".join(c if c.isalnum() else "_" for c in company).strip("_").lower()
+
+
+# --- Cache keys (each one hashes everything the stage output depends on) ---
+def scrape_key(base_url, crawl=False):
+    return make_key(base_url or "", SCRAPER_VERSION, "crawl" if crawl else "pages")
+
+
+def anonymize_key(slide_text, terms=None):
+    return make_key(slide_text, rules_fingerprint(), terms or {})
+
+
+def ppt_key(slide_text, charts=None):
+    return make_key(slide_text, charts or {}, file_hash(TEMPLATE_PATH), file_hash(PPT_SOURCE))
+
+
+def prompt_inputs(onepager, public_data, context_budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Private and public text for the prompt. With a budget, both are packed by relevance
+    into context_budget tokens (report says what was dropped); 0/None sends everything.
+    """
+    if not context_budget:
+        private_text, public_text, report = prompt_private_data(onepager), public_data.get("raw_text", ""), None
+    else:
+        private_text, public_text, report = pack_context(onepager, public_data, context_budget,
+                                                         exclude=PROMPT_EXCLUDED_SECTIONS,
+                                                         max_table_rows=PROMPT_TABLE_ROWS)
+    return private_text, {"raw_text": public_text, "source_urls": public_data.get("source_urls", [])}, report
+
+
+#Raised when a stage outside the selected subset has no cached output to reuse
+class MissingCachedStage(RuntimeError):
+    pass
+
+
+def _require(value, stage, company):
+    if value is None:
+        raise MissingCachedStage(f"[{company}] No cached '{stage}' output; run that stage first (or drop --stages)")
+    return value
+
+
+def plan_pipeline(file_path, cache, stages=None, context_budget=CONTEXT_TOKEN_BUDGET, crawl=False):
+    """
+    Dry run: reports for each stage whether its output is cached or it would run,
+    without scraping, calling the LLM or loading the NLP / PPT libraries.
+    """
+    stages = set(stages or PIPELINE_STAGES)
+    company = company_name_from_path(file_path)
+    plan = {stage: "would run" if stage in stages else "skipped" for stage in PIPELINE_STAGES}
+
+    onepager = load_onepager(file_path)
+    if onepager is None:
+        return {"company": company, "error": f"Could not read '{file_path}'", "plan": plan}
+
+    terms = document_terms(onepager, company)
+    charts = extract_charts(onepager, terms=terms)
+    # Outside the requested stages an old scrape is still used as-is (it won't be refetched anyway)
+    max_age = SCRAPE_MAX_AGE if "scrape" in stages else None
+    public_data = cache.get("scrape", scrape_key(onepager.website, crawl), max_age=max_age, touch=False)
+    slide_text = None
+    if public_data:
+        prompt_private, prompt_public, _ = prompt_inputs(onepager, public_data, context_budget)
+        _, slide_text = cached_response(cache, build_prompt(prompt_private, prompt_public, charts), charts)
+    anonymized = slide_text and cache.get("anonymize", anonymize_key(slide_text, terms))
+    ppt_cached = bool(anonymized) and os.path.exists(os.path.join(cache.root, "ppt", f"{ppt_key(anonymized, charts)}.pptx"))
+
+    for stage, hit in [("scrape", public_data), ("text", slide_text), ("anonymize", anonymized), ("ppt", ppt_cached)]:
+        if hit:
+            plan[stage] = "cached"
+        elif stage not in stages:
+            plan[stage] = "missing"
+    return {"company": company, "plan": plan}
+
+
+def run_pipeline(file_path, cpu_lock=None, cache=None, trace=None, stages=None, output_dir=None,
+                 context_budget=CONTEXT_TOKEN_BUDGET, http_ttl=HTTP_CACHE_TTL, crawl=False, refresh=(), stream=True, log=print):
+    """
+    Runs load -> scrape -> generate_text -> anonymize -> create_ppt -> create_citations
+    -> audit for one OnePager. cpu_lock (a semaphore) is held around the CPU-bound stages so that
+    batch runs can overlap one company's scrape/LLM call with another company's NLP/PPT work.
+    Each stage's output is looked up in the StageCache under a hash of its inputs first,
+    and every stage is timed into the RunTrace.
+    stages limits which stages may do real work; the others must come from the cache,
+    and ppt/citations are only written when selected (e.g. stages=["ppt"] re-renders the
+    deck from cached JSON without touching the LLM or NLP stacks).
+    context_budget bounds the prompt's private + public data in tokens (see scripts/context.py).
+    Chart series are extracted from the OnePager (scripts/financials.py) and passed to
+    create_ppt as they are; the LLM only writes the text describing them.
+    Scraped pages go through an HttpCache in <cache root>/http: served as-is for http_ttl
+    seconds, then revalidated with ETag / Last-Modified. crawl picks the scraped pages from
+    the site's sitemap / links instead of the fixed paths (see scripts/crawl.py).
+    refresh lists companies (names or slugs) whose slide text is regenerated even when the
+    LLM response cache already has an answer for their prompt.
+    stream anonymizes each slide field in the background as soon as the LLM has streamed it.
+    The audit stage re-reads the written files (scripts/audit.py) and reports any forbidden
+    term that still made it into them, e.g. through chart labels, to a JSON report.
+    output_dir, when given, receives the generated files instead of output/ppt, output/citations
+    and output/audit.
+    Returns the paths of the generated files and the number of audit hits.
+    """
+    cpu_lock = cpu_lock or nullcontext()
+    cache = cache or StageCache(enabled=False)
+    trace = trace or RunTrace(enabled=False)
+    stages = set(stages or PIPELINE_STAGES)
+    company = company_name_from_path(file_path)
+    slug = company_slug(company)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ppt_path = citations_path = audit_path = audit_hits = None
+    ppt_dir = output_dir or PPT_DIR
+    citations_dir = output_dir or CITATIONS_DIR
+    audit_dir = output_dir or AUDIT_DIR
+
+    log(f"[{company}] Loading private data...")
+    with trace.stage("load_private_data", company) as rec:
+        onepager = load_onepager(file_path) #Reads the .md file once and indexes its sections / tables
+        if onepager is None:
+            raise RuntimeError(f"Could not read '{file_path}'")
+        base_url = onepager.website # Takes URL from the Website section
+        private_data = prompt_private_data(onepager) # Only the sections a teaser can use
+        terms = document_terms(onepager, company) # Names that must never reach the deck (company, holders, people)
+        charts = extract_charts(onepager, terms=terms) # Exact chart series from the financial statements / shareholding tables
+        rec["sections"] = len(onepager.sections)
+        rec["charts"] = sorted(charts)
+        rec["forbidden_terms"] = len(terms)
+        rec["chars"] = len(private_data)
+
+    # I/O bound stages (network)
+    log(f"[{company}] Extracting Public Data...")
+    with trace.stage("scrape_public_data", company) as rec:
+        key = scrape_key(base_url, crawl)
+        # Only expire the scrape when this run may redo it: --stages ppt re-renders from any cached copy.
+        # Not touched on a hit, so its age stays the time it was scraped
+        public_data = cache.get("scrape", key, max_age=SCRAPE_MAX_AGE if "scrape" in stages else None, touch=False)
+        rec["cache_hit"] = public_data is not None
+        if public_data is None:
+            if "scrape" not in stages:
+                _require(public_data, "scrape", company)
+            if base_url:
+                http_cache = HttpCache(os.path.join(cache.root, "http"), ttl=http_ttl, enabled=cache.enabled,
+                                       on_write=cache.add_bytes)
+                public_data = scrape_public_data(base_url, http_cache=http_cache, crawl=crawl) #Uses the URL to extract data, all the while storing citations for source document.
+            else:
+                public_data = {"raw_text": "", "source_urls": [], "error": "No website found in OnePager"}
+            if not public_data.get("error"):
+                cache.put("scrape", key, public_data)
+            rec["bytes_fetched"] = public_data.get("bytes_fetched", 0)
+            rec["pages_from_cache"] = sum(1 for s in public_data.get("sources", []) if s["from_cache"])
+        rec["pages"] = len(public_data.get("source_urls", []))
+        rec["chars"] = len(public_data.get("raw_text", ""))
+
+    log(f"[{company}] Generating Text (JSON)...")
+    sanitizer = None
+    # NLP memo counters for this company (streamed fields included); persisted with the stage cache
+    memo = get_memo(cache.root if cache.enabled else None)
+    nlp_stats = {"memo_hits": 0, "memo_misses": 0}
+    with trace.stage("generate_slide_text", company) as rec:
+        # Bounded prompt: most relevant private sections / public paragraphs within the token budget
+        prompt_private, prompt_public, report = prompt_inputs(onepager, public_data, context_budget)
+        if report:
+            log(f"[{company}] Context: {describe_report(report)}")
+            rec["context_tokens"] = report["used_tokens"]
+            rec["context_input_tokens"] = report["input_tokens"]
+            rec["context_dropped"] = len(report["dropped"])
+
+        if "text" not in stages:
+            rec["model"], slide_text = cached_response(cache, build_prompt(prompt_private, prompt_public, charts), charts)
+            _require(slide_text, "text", company)
+            rec["cache_hit"] = True
+        else:
+            refresh_text = slug in {company_slug(name) for name in refresh}
+            sanitizer = FieldSanitizer(cpu_lock, terms, nlp_stats) if stream and "anonymize" in stages else None
+            try:
+                #Feeds raw text into API, to convert into ppt-ready bullet points (or reuses the cached answer)
+                slide_text = generate_slide_text(prompt_private, prompt_public, stats=rec, cache=cache, refresh=refresh_text,
+                                                 on_field=sanitizer.submit if sanitizer else None, charts=charts,
+                                                 log=lambda message: log(f"[{company}] {message}"))
+            finally:
+                if sanitizer:
+                    # Let the streamed fields finish before this thread takes the CPU lock itself
+                    sanitizer.close()
+
+    # CPU bound stages (spaCy / python-pptx / python-docx)
+    with cpu_lock:
+        log(f"[{company}] Checking anonymization...")
+        with trace.stage("check_anonymization", company) as rec:
+            key = anonymize_key(slide_text, terms)
+            cached = cache.get("anonymize", key)
+            rec["cache_hit"] = cached is not None
+            if cached is None:
+                if "anonymize" not in stages:
+                    _require(cached, "anonymize", company)
+                if sanitizer:
+                    slide_text, rec["streamed_fields"] = sanitizer.result(slide_text)
+                else:
+                    slide_text = check_anonymization(slide_text, terms, nlp_stats) #Checks anonymization, with active text replacement
+                cache.put("anonymize", key, slide_text)
+                memo.save()
+                rec.update(nlp_stats)
+            else:
+                slide_text = cached
+
+        if "ppt" in stages:
+            log(f"[{company}] Creating PPT...")
+            with trace.stage("create_ppt", company) as rec:
+                ppt_path = os.path.join(ppt_dir, f"{slug}_{timestamp}.pptx")
+                key = ppt_key(slide_text, charts)
+                rec["cache_hit"] = cache.get_file("ppt", key, "pptx", ppt_path)
+                if not rec["cache_hit"]:
+                    ppt_path = create_ppt(slide_text, ppt_path, charts=charts)
+                    cache.put_file("ppt", key, "pptx", ppt_path)
+
+        if "citations" in stages:
+            log(f"[{company}] Creating Citations...")
+            with trace.stage("create_citations", company):
+                citations_path = create_citations(private_data, public_data, os.path.join(citations_dir, f"{slug}_citations_{timestamp}.docx"))
+
+        if "audit" in stages and (ppt_path or citations_path):
+            log(f"[{company}] Auditing outputs...")
+            with trace.stage("audit_outputs", company) as rec:
+                audit_path = os.path.join(audit_dir, f"{slug}_audit_{timestamp}.json")
+                report = audit_outputs([ppt_path, citations_path], terms, audit_path)
+                audit_hits = rec["hits"] = report["hits"]
+                rec["blocks"] = sum(e["blocks"] for e in report["files"])
+                rec["xml_bytes"] = sum(e["xml_bytes"] for e in report["files"])
+            log(f"[{company}] Audit: {describe_audit(report)}")
+
+    return {"company": company, "ppt": ppt_path, "citations": citations_path, "audit": audit_path, "audit_hits": audit_hits}
+
+
+#Semaphore factory kept here so batch callers don't need to import threading
+def make_cpu_lock(cpu_workers=1):
+    return threading.BoundedSemaphore(max(1, cpu_workers))
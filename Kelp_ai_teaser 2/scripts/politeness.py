@@ -0,0 +1,99 @@
+#Per-host politeness for scraping: connection limit, request spacing, retries with back-off
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Connections to one host at a time, across every company being scraped (batch runs share them)
+MAX_CONNECTIONS_PER_HOST = 4
+
+# Minimum gap between two request starts on one host (10 requests / second)
+MIN_REQUEST_INTERVAL = 0.1
+
+# Transient failures are retried (attempts include the first one) with jittered exponential back-off
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Longest Retry-After we are willing to wait (the site deadline still applies)
+MAX_RETRY_AFTER = 30.0
+
+
+class HostScheduler:
+    """
+    Shared by every scrape in the process. acquire() waits for one of the host's
+    connection slots and for its next request start time; a Retry-After from the
+    host pushes that start time back for every request to it, not just the retried one.
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS_PER_HOST, min_interval=MIN_REQUEST_INTERVAL):
+        self.max_connections = max_connections
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _state(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = {"slots": threading.BoundedSemaphore(self.max_connections), "next_start": 0.0}
+            return self._hosts[host]
+
+    def acquire(self, url, deadline):
+        """Takes a slot and waits for the host's turn; False if that can't happen before the deadline."""
+        state = self._state(url)
+        if not state["slots"].acquire(timeout=max(0.0, deadline - time.monotonic())):
+            return False
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, state["next_start"])
+            if start >= deadline:
+                state["slots"].release()
+                return False
+            state["next_start"] = start + self.min_interval
+        time.sleep(start - now)
+        return True
+
+    def release(self, url):
+        self._state(url)["slots"].release()
+
+    def defer(self, url, seconds):
+        """No new request to this host for the next seconds (Retry-After / overload)."""
+        state = self._state(url)
+        with self._lock:
+            state["next_start"] = max(state["next_start"], time.monotonic() + seconds)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = HostScheduler()
+        return _scheduler
+
+
+#Full-jitter exponential back-off for the given (1-based) failed attempt
+def backoff_delay(attempt):
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+#Retry-After is either seconds or an HTTP date; None when missing / unparseable
+def retry_after_seconds(value):
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(MAX_RETRY_AFTER, max(0.0, seconds))
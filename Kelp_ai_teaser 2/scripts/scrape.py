@@ -1,84 +1,288 @@
 #Python import used for consistency
-import re
-#Python Imports for basic web-scraping
-import requests
-from bs4 import BeautifulSoup
-
-def extract_website_from_md(md_text):  # Takes URL from .md file
-    patterns = [
-        r"https?://[^\s\)]+",
-        r"www\.[^\s\)]+"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, md_text, re.IGNORECASE)
-        if match:
-            url = match.group(0).strip()
-            # Remove URL fragments and query params
-            url = url.split('#')[0].split('?')[0]
-            if not url.startswith("http"):
-                url = "https://" + url
-            return url
+import codecs
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+#requests is imported inside the functions so importing this module stays cheap
+
+from scripts.crawl import discover, rank_urls, MAX_CRAWL_PAGES, CRAWL_BYTE_BUDGET
+from scripts.extract import BlockExtractor, TextBudget, extract_blocks, dedupe_blocks, SITE_TEXT_BUDGET
+from scripts.http_cache import iso_time
+from scripts.load_private_data import extract_website_from_md
+from scripts.politeness import get_scheduler, backoff_delay, retry_after_seconds
+from scripts.politeness import MAX_CONNECTIONS_PER_HOST, MAX_ATTEMPTS, RETRY_STATUSES
+
+# Bump whenever the extraction logic changes, so cached scrape results are refetched
+SCRAPER_VERSION = "6"
+
+#Common website paths to attempt scraping ("" is the homepage itself)
+PAGES = [
+    "",
+    "/about",
+    "/about-us",
+    "/products",
+    "/services"
+]
+
+# Time limits: per page, and for the whole site (all pages share it)
+PAGE_TIMEOUT = 10
+SITE_DEADLINE = 20
+
+# Bytes read from one page at most, and the streaming read size
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+CHUNK_BYTES = 16 * 1024
+
+# Headers to mimic a real browser (avoids basic bot blocking)
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    )
+}
+
+# One keep-alive session for the whole process (per-host limits live in scripts/politeness.py)
+_session = None
+_session_lock = threading.Lock()
+
+#Shared, connection-pooled requests session (created on first use)
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=MAX_CONNECTIONS_PER_HOST)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+#GET with the host's politeness rules: waits for a slot and its turn, retries timeouts,
+#connection errors, 429 and 5xx with jittered back-off (or the server's Retry-After)
+#Returns the streaming response with the host slot still held (caller releases it),
+#or None with the reason in record["error"]
+def _request(session, url, deadline, headers, record):
+    import requests
+
+    scheduler = get_scheduler()
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        record["attempts"] = attempt
+        if not scheduler.acquire(url, deadline):
+            record["error"] = "deadline exceeded waiting for the host" + (f" (after {record['error']})" if attempt > 1 else "")
+            return None
+        wait_for = None
+        try:
+            res = session.get(url, timeout=min(PAGE_TIMEOUT, max(0.01, deadline - time.monotonic())),
+                              headers=headers, stream=True)
+            if res.status_code not in RETRY_STATUSES:
+                return res
+            record["status"] = res.status_code
+            record["error"] = f"HTTP {res.status_code}"
+            wait_for = retry_after_seconds(res.headers.get("Retry-After"))
+            if wait_for is not None:
+                scheduler.defer(url, wait_for)
+            res.close()
+        except (requests.Timeout, requests.ConnectionError) as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        except Exception as e:
+            scheduler.release(url)
+            record["error"] = str(e)
+            return None
+        scheduler.release(url)
+
+        if attempt == MAX_ATTEMPTS:
+            break
+        wait_for = backoff_delay(attempt) if wait_for is None else wait_for
+        if time.monotonic() + wait_for >= deadline:
+            record["error"] += " (no time left to retry)"
+            return None
+        time.sleep(wait_for)
+    record["error"] += f" (gave up after {MAX_ATTEMPTS} attempts)"
     return None
 
-def scrape_public_data(URL):  # Function scrapes the extracted URL
-    url = URL
-    # Headers to mimic a real browser (avoids basic bot blocking
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
-    }
-    
+
+def _decode(body, encoding):
+    return body.decode(encoding or "utf-8", errors="replace")
+
+
+#Fetches one page within the site deadline; returns a timing / result record, its text blocks and its links
+#With an HttpCache, fresh entries skip the network and stale ones are revalidated (304)
+#The body is streamed into the extractor until the site budget is spent; reading stops at max_bytes or the deadline
+def fetch_page(session, url, deadline, http_cache=None, budget=None, max_bytes=MAX_PAGE_BYTES):
+    start = time.perf_counter()
+    record = {"url": url, "ok": False, "status": None, "bytes": 0, "from_cache": False}
+
+    cached = http_cache.lookup(url) if http_cache else None
+    if cached and http_cache.is_fresh(cached[0]):
+        meta, body = cached
+        http_cache.count("fresh")
+        page = extract_blocks(_decode(body, meta.get("encoding")), budget)
+        record.update(ok=True, status=meta["status"], from_cache=True, accessed_at=iso_time(meta["validated_at"]),
+                      seconds=round(time.perf_counter() - start, 3))
+        return record, page.blocks, page.links
+
+    headers = http_cache.conditional_headers(cached[0]) if cached else {}
+    res = _request(session, url, deadline, headers, record)
+    if res is None:
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        return record, None, []
+    try:
+        record["status"] = res.status_code
+        record.pop("error", None)
+
+        if res.status_code == 304 and cached:
+            meta = http_cache.mark_validated(url, cached[0])
+            http_cache.count("revalidated")
+            page = extract_blocks(_decode(cached[1], meta.get("encoding")), budget)
+            record.update(ok=True, status=meta["status"], from_cache=True, accessed_at=iso_time(meta["validated_at"]))
+            return record, page.blocks, page.links
+
+        res.raise_for_status()
+        extractor = BlockExtractor(budget)
+        decoder = codecs.getincrementaldecoder(res.encoding or "utf-8")(errors="replace")
+        chunks = []
+        complete = True
+        for chunk in res.iter_content(chunk_size=CHUNK_BYTES):
+            record["bytes"] += len(chunk)
+            chunks.append(chunk)
+            # Once the site budget is spent the text isn't needed, but the rest of the body is
+            # still read so the page can be cached
+            if not extractor.full:
+                extractor.feed(decoder.decode(chunk))
+            if record["bytes"] >= max_bytes or time.monotonic() > deadline:
+                complete = False
+                break
+        else:
+            if not extractor.full:
+                extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+        record["truncated"] = not complete
+
+        # Only whole bodies are cached (cut off by max_bytes / the deadline they'd poison later revalidations)
+        if http_cache and complete:
+            http_cache.store(url, res.status_code, res.headers, b"".join(chunks), res.encoding)
+            http_cache.count("network")
+        record["ok"] = True
+        record["accessed_at"] = iso_time(time.time())
+        return record, extractor.blocks, extractor.links
+    except Exception as e:
+        record["error"] = str(e)
+        return record, None, []
+    finally:
+        res.close()
+        get_scheduler().release(url)
+        record["seconds"] = round(time.perf_counter() - start, 3)
+
+
+#Fetches urls in parallel; a page still running at the deadline is reported as such
+def _fetch_all(session, urls, deadline, http_cache, budget, max_bytes=MAX_PAGE_BYTES):
+    pool = ThreadPoolExecutor(max_workers=max(1, len(urls)))
+    futures = [pool.submit(fetch_page, session, u, deadline, http_cache, budget, max_bytes) for u in urls]
+    wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for u, future in zip(urls, futures):
+        if future.done() and not future.cancelled():
+            results.append(future.result())
+        else:
+            results.append(({"url": u, "ok": False, "status": None, "bytes": 0, "from_cache": False,
+                             "error": "site deadline exceeded"}, None, []))
+    return results
+
+
+#Homepage plus the relevant pages found through robots.txt / sitemaps / homepage links
+def _crawl(session, URL, deadline, http_cache, budget):
+    pool = ThreadPoolExecutor(max_workers=1)
+    discovery = pool.submit(discover, session, URL, deadline)
+    pool.shutdown(wait=False)
+    home = _fetch_all(session, [URL], deadline, http_cache, budget)
+    record, blocks, links = home[0]
+    if blocks is None:
+        discovery.cancel()
+        return home
+
     try:
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()  # Verify response was successful
-    except requests.RequestException as e:
-        return {"raw_text": "", "source_urls": [], "error": str(e)}
-    
-    soup = BeautifulSoup(response.text, "html.parser")
-    paragraphs = soup.find_all("p")
+        sitemap_urls, robots = discovery.result(timeout=max(0.0, deadline - time.monotonic()))
+    except Exception:
+        sitemap_urls, robots = [], None
+    # Sitemap entries first: they list real pages, while homepage links repeat the menu on every page
+    urls = rank_urls(URL, sitemap_urls + links, robots, HEADERS["User-Agent"], limit=MAX_CRAWL_PAGES - 1)
+    if not urls:
+        return home
+    max_bytes = min(MAX_PAGE_BYTES, max(CHUNK_BYTES, (CRAWL_BYTE_BUDGET - record["bytes"]) // len(urls)))
+    return home + _fetch_all(session, urls, deadline, http_cache, budget, max_bytes)
+
+
+def scrape_public_data(URL, session=None, deadline=SITE_DEADLINE, http_cache=None, crawl=False):  # Function scrapes the extracted URL
+    """
+    Fetches the homepage and the common PAGES concurrently over the shared session,
+    all within one overall deadline, reusing / revalidating http_cache entries.
+    With crawl=True the other pages are instead picked from robots.txt, the sitemaps
+    and the homepage links, ranked by teaser keywords, within MAX_CRAWL_PAGES pages
+    and CRAWL_BYTE_BUDGET bytes.
+    Pages are parsed while they stream in, and every page stops once the site's
+    SITE_TEXT_BUDGET characters are collected; blocks repeated across pages (cookie
+    banners, footers) are dropped as near-duplicates.
+    Returns the text (raw_text, and the same text as a list of blocks), the URLs that
+    worked (source_urls, plus sources with the access date and whether each came from
+    cache) and a per-URL timing record.
+    """
+    session = session or get_session()
+    site_deadline = time.monotonic() + deadline
+    budget = TextBudget(SITE_TEXT_BUDGET)
+
+    if crawl:
+        results = _crawl(session, URL, site_deadline, http_cache, budget)
+    else:
+        # Homepage is the URL itself, the other paths hang off the site root
+        base = URL.rstrip("/")
+        urls = [URL if page == "" else base + page for page in PAGES]
+        results = _fetch_all(session, urls, site_deadline, http_cache, budget)
+    page_timings = [record for record, _, _ in results]
+
+    # Why each skipped page was skipped (HTTP status, timeout, deadline, ...)
+    failures = {r["url"]: r.get("error", "unknown error") for r in page_timings if not r["ok"]}
+
+    # Same contract as before: no homepage means no public data
+    if results[0][1] is None:
+        return {"raw_text": "", "source_urls": [], "error": page_timings[0].get("error", "homepage fetch failed"),
+                "failures": failures, "page_timings": page_timings,
+                "bytes_fetched": sum(r["bytes"] for r in page_timings)}
+
+    #this collects info in page order
     text_blocks = []
-    
-    for p in paragraphs:
-        text = p.get_text(strip=True)
-        if len(text) > 50:
-            text_blocks.append(text)
-    
-    public_text = " ".join(text_blocks)
-
-    #Common website paths to attempt scraping
-    pages = [
-        "",
-        "/about",
-        "/about-us",
-        "/products",
-        "/services"
-    ]
-    
-    collected_text = ""
     successful_urls = []
+    sources = []
+    for record, blocks, _ in results:
+        if blocks is None:
+            continue
+        text_blocks.extend(blocks)
+        successful_urls.append(record["url"])
+        sources.append({"url": record["url"], "from_cache": record["from_cache"], "accessed_at": record["accessed_at"]})
 
-    #this collects info and appends into variables
-    for page in pages:
-        try:
-            res = requests.get(url + page, timeout=10, headers=headers)
-            res.raise_for_status()
-            soup = BeautifulSoup(res.text, "html.parser")
-            for p in soup.find_all("p"):
-                text = p.get_text(strip=True)
-                if len(text) > 50:  # Filter out short paragraphs
-                    collected_text += text + " "
-            successful_urls.append(url + page)
-        except:
-            pass
-    
-    # Limits text length to avoid memory issues
-    collected_text = collected_text[:100000] if len(collected_text) > 100000 else collected_text
+    # Pages run in parallel, so the last blocks may overshoot the budget a little; trim in page order
+    kept = []
+    used = 0
+    for block in dedupe_blocks(text_blocks):
+        if used >= SITE_TEXT_BUDGET:
+            break
+        kept.append(block[:SITE_TEXT_BUDGET - used])
+        used += len(kept[-1]) + 1
+    collected_text = " ".join(kept)
 
     #this is the final public data along with citations
     return {
         "raw_text": collected_text.strip(),
-        "source_urls": successful_urls
+        "blocks": kept,
+        "source_urls": successful_urls,
+        "sources": sources,
+        "failures": failures,
+        "bytes_fetched": sum(r["bytes"] for r in page_timings),
+        "page_timings": page_timings
     }
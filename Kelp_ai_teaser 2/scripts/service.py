@@ -0,0 +1,195 @@
+#Resident teaser service: keeps the NLP engines, template and Gemini SDK loaded between requests
+#
+#   POST /teaser   body: OnePager markdown (or JSON {"markdown": "...", "name": "Gati"})
+#                  returns JSON {"company", "pptx_base64", "citations_base64", "audit", "seconds"}
+#   GET  /health   returns worker / queue status
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scripts.pipeline import run_pipeline, make_cpu_lock, company_slug, company_name_from_path
+from scripts.cache import StageCache
+from scripts.trace import RunTrace
+from scripts.generate_text import model_router
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Markdown payloads larger than this are rejected (the biggest sample OnePager is ~100 KB)
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+
+#Loads everything that makes a cold run slow, once, before the first request
+def warm_up(log=print):
+    from scripts import anonymize
+    from scripts.generate_ppt import load_template
+
+    steps = [("python-pptx + template", load_template)]
+    if anonymize.PRESIDIO_AVAILABLE:
+        steps.append(("Presidio / spaCy", anonymize.start_ner_pool))
+    steps.append(("python-docx", lambda: __import__("docx")))
+    steps.append(("Gemini SDK", lambda: __import__("google.generativeai")))
+
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            log(f"Warmed up {name} in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            # A missing optional piece only slows the first request down
+            log(f"Could not warm up {name}: {e}")
+
+
+class TeaserService:
+    """
+    Runs pipeline requests on a bounded worker pool. At most workers + queue_size
+    requests are accepted at once; the rest are refused so callers can retry.
+    """
+
+    def __init__(self, workers=2, queue_size=8, cpu_workers=1, cache=None, trace=None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.cpu_lock = make_cpu_lock(cpu_workers)
+        self.cache = cache or StageCache()
+        self.trace = trace or RunTrace()
+        self._slots = threading.BoundedSemaphore(max(1, workers) + max(0, queue_size))
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def status(self):
+        with self._lock:
+            in_flight = self.in_flight
+        usage = self.trace.usage_rows()
+        return {"status": "ok", "workers": self.workers, "queue_size": self.queue_size, "in_flight": in_flight,
+                "models": model_router().status(), "llm_usage": usage[-1] if usage else None}
+
+    def submit(self, markdown, name=None, refresh=False):
+        """Returns the future of one teaser job, or None when the queue is full (refresh skips cached LLM answers)."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            self.in_flight += 1
+        future = self.pool.submit(self._generate, markdown, name, refresh)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _generate(self, markdown, name, refresh=False):
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="teaser_") as tmp:
+            # The pipeline works on files, so the payload is written as a OnePager in a scratch dir.
+            # Unnamed uploads get a generic file name, which document_terms never turns into a forbidden term
+            slug = company_slug(name or "")
+            md_path = os.path.join(tmp, f"{slug}-OnePager.md" if slug else "OnePager.md")
+            with open(md_path, "w", encoding="utf-8") as f:
+                f.write(markdown)
+
+            outputs = run_pipeline(md_path, cpu_lock=self.cpu_lock, cache=self.cache, trace=self.trace,
+                                   output_dir=tmp, refresh=[company_name_from_path(md_path)] if refresh else (), log=lambda msg: None)
+
+            with open(outputs["ppt"], "rb") as f:
+                pptx_bytes = f.read()
+            with open(outputs["citations"], "rb") as f:
+                docx_bytes = f.read()
+            audit = None
+            if outputs.get("audit"):
+                with open(outputs["audit"], "r", encoding="utf-8") as f:
+                    audit = json.load(f)
+
+        return {
+            "company": name,
+            "pptx_base64": base64.b64encode(pptx_bytes).decode("ascii"),
+            "citations_base64": base64.b64encode(docx_bytes).decode("ascii"),
+            "audit": audit,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+        model_router().close()
+
+
+def make_handler(service):
+
+    class TeaserHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, code, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, service.status())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/teaser":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0 or length > MAX_BODY_BYTES:
+                self._send_json(413 if length > MAX_BODY_BYTES else 400, {"error": "expected a OnePager markdown body"})
+                return
+            raw = self.rfile.read(length).decode("utf-8", errors="replace")
+
+            # Accept either plain markdown or {"markdown": ..., "name": ..., "refresh": true}
+            name = None
+            markdown = raw
+            refresh = False
+            if (self.headers.get("Content-Type") or "").startswith("application/json"):
+                try:
+                    payload = json.loads(raw)
+                    markdown = payload["markdown"]
+                    name = payload.get("name") or None
+                    refresh = bool(payload.get("refresh"))
+                except (ValueError, KeyError, TypeError):
+                    self._send_json(400, {"error": "JSON body must contain 'markdown'"})
+                    return
+
+            future = service.submit(markdown, name, refresh)
+            if future is None:
+                self._send_json(503, {"error": "queue full, retry later"}, {"Retry-After": "5"})
+                return
+
+            try:
+                self._send_json(200, future.result())
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            print(f"[service] {self.address_string()} {format % args}")
+
+    return TeaserHandler
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=2, queue_size=8, cpu_workers=1, cache=None, trace=None):
+    warm_up()
+    service = TeaserService(workers=workers, queue_size=queue_size, cpu_workers=cpu_workers, cache=cache, trace=trace)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Teaser service listening on http://{host}:{port} ({workers} workers, queue {queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        service.trace.print_summary()
@@ -0,0 +1,182 @@
+#Per-stage timing and resource trace, written as JSON lines next to the outputs
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# resource is Unix-only; peak RSS is simply left out on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+TRACE_DIR = "output/traces"
+
+# Trace record that carries the LLM token / latency accounting (see generate_slide_text)
+LLM_STAGE = "generate_slide_text"
+
+
+#Peak resident set size of the process in bytes (ru_maxrss is KB on Linux, bytes on macOS)
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunTrace:
+    """
+    Collects one record per (company, stage) and appends it to
+    output/traces/run_<timestamp>.jsonl as soon as the stage finishes.
+    Safe to share between the threads of a batch run.
+    """
+
+    def __init__(self, path=None, enabled=True):
+        if path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(TRACE_DIR, f"run_{timestamp}.jsonl")
+        self.path = path
+        self.enabled = enabled
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, company=None):
+        """
+        Times the wrapped block. The yielded dict can be filled with stage-specific
+        fields (bytes_fetched, prompt_chars, response_chars, cache_hit...).
+        """
+        record = {"company": company, "stage": name}
+        wall_start = time.perf_counter()
+        # thread_time keeps CPU numbers per company when stages run on batch threads
+        cpu_start = time.thread_time()
+        try:
+            yield record
+            record["status"] = "ok"
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = str(e)
+            raise
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall_start, 4)
+            record["cpu_s"] = round(time.thread_time() - cpu_start, 4)
+            # Process-wide peak, so in batch runs it includes other companies' work
+            record["peak_rss_mb"] = None if peak_rss_bytes() is None else round(peak_rss_bytes() / (1024 * 1024), 1)
+            record["timestamp"] = datetime.now().isoformat(timespec="seconds")
+            self._add(record)
+
+    def _add(self, record):
+        with self._lock:
+            self.records.append(record)
+            if not self.enabled:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def summary_rows(self):
+        """Aggregates records per stage, in the order the stages first ran."""
+        rows = {}
+        for r in self.records:
+            row = rows.setdefault(r["stage"], {"stage": r["stage"], "runs": 0, "failed": 0,
+                                               "wall_s": 0.0, "max_wall_s": 0.0, "cpu_s": 0.0,
+                                               "cache_hits": 0})
+            row["runs"] += 1
+            row["failed"] += r["status"] != "ok"
+            row["wall_s"] += r["wall_s"]
+            row["max_wall_s"] = max(row["max_wall_s"], r["wall_s"])
+            row["cpu_s"] += r["cpu_s"]
+            row["cache_hits"] += bool(r.get("cache_hit"))
+        return list(rows.values())
+
+    def usage_rows(self):
+        """
+        LLM usage per company (latest run of each) plus a "TOTAL" row for the whole run:
+        calls, prompt / response tokens, models used, time to first token and LLM time.
+        """
+        latest = {}
+        for r in self.records:
+            if r["stage"] == LLM_STAGE:
+                latest[r["company"]] = r
+        rows = []
+        for company, r in latest.items():
+            attempts = r.get("attempts", [])
+            rows.append({
+                "company": company,
+                "model": r.get("model"),
+                "cache_hit": bool(r.get("cache_hit")),
+                "llm_calls": r.get("llm_calls", 0),
+                "failed_calls": sum(1 for a in attempts if not a["ok"]),
+                "repair_calls": sum(1 for a in attempts if a.get("kind") == "repair"),
+                "prompt_tokens": r.get("prompt_tokens", 0),
+                "response_tokens": r.get("response_tokens", 0),
+                "estimated": any(a.get("token_source") == "estimate" for a in attempts),
+                "ttft_s": r.get("ttft_s"),
+                "llm_s": r.get("llm_s", 0.0),
+            })
+        if rows:
+            ttfts = [row["ttft_s"] for row in rows if row["ttft_s"] is not None]
+            rows.append({
+                "company": "TOTAL",
+                "model": ", ".join(sorted({row["model"] for row in rows if row["model"]})),
+                "cache_hit": all(row["cache_hit"] for row in rows),
+                **{k: sum(row[k] for row in rows) for k in ["llm_calls", "failed_calls", "repair_calls",
+                                                            "prompt_tokens", "response_tokens"]},
+                "estimated": any(row["estimated"] for row in rows),
+                # Mean over the companies that called the model
+                "ttft_s": round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+                "llm_s": round(sum(row["llm_s"] for row in rows), 3),
+            })
+        return rows
+
+    #Writes usage_rows() and every attempt record next to the trace (run_<timestamp>_llm_usage.json)
+    def export_usage(self, path=None):
+        rows = self.usage_rows()
+        if not rows or not self.enabled:
+            return None
+        path = path or os.path.splitext(self.path)[0] + "_llm_usage.json"
+        calls = [{"company": r["company"], **a} for r in self.records if r["stage"] == LLM_STAGE for a in r.get("attempts", [])]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"companies": rows[:-1], "total": rows[-1], "calls": calls}, f, ensure_ascii=False, indent=2)
+        return path
+
+    def print_usage(self):
+        rows = self.usage_rows()
+        if not rows:
+            return
+        width = max(len(r["company"]) for r in rows)
+        print()
+        print(f"{'LLM usage'.ljust(width)}  Calls  Prompt tok  Response tok  TTFT (s)  LLM (s)  Model")
+        print("-" * (width + 70))
+        for r in rows:
+            ttft = "-" if r["ttft_s"] is None else f"{r['ttft_s']:.2f}"
+            model = "cached" if r["cache_hit"] and r["company"] != "TOTAL" else (r["model"] or "")
+            # "~" marks counts that are partly local estimates (no usage metadata from the API)
+            mark = "~" if r["estimated"] else " "
+            print(f"{r['company'].ljust(width)}  {r['llm_calls']:5d}  {mark}{r['prompt_tokens']:9d}  {mark}{r['response_tokens']:11d}  "
+                  f"{ttft:>8}  {r['llm_s']:7.2f}  {model}")
+
+    def print_summary(self):
+        rows = self.summary_rows()
+        if not rows:
+            return
+        width = max(len(r["stage"]) for r in rows)
+        print()
+        print(f"{'Stage'.ljust(width)}  Runs  Failed  Wall (s)  Max (s)  CPU (s)  Cache hits")
+        print("-" * (width + 58))
+        for r in rows:
+            print(f"{r['stage'].ljust(width)}  {r['runs']:4d}  {r['failed']:6d}  {r['wall_s']:8.2f}  "
+                  f"{r['max_wall_s']:7.2f}  {r['cpu_s']:7.2f}  {r['cache_hits']:10d}")
+        peak = peak_rss_bytes()
+        if peak is not None:
+            print(f"\nPeak RSS: {peak / (1024 * 1024):.1f} MB")
+        self.print_usage()
+        usage_path = self.export_usage()
+        if self.enabled:
+            print(f"Trace written to {self.path}")
+        if usage_path:
+            print(f"LLM usage written to {usage_path}")
@@ -0,0 +1,116 @@
+#Checks the LLM's slide JSON against the response schema and the prompt's content rules
+import math
+
+# Sectors the prompt allows (create_ppt picks the layout from these)
+SECTORS = ["Manufacturing", "Consumer", "Tech", "Pharma", "Logistics"]
+
+# Bullet counts the prompt asks for, per list field (min, max)
+BULLET_RANGES = {
+    "business_overview": (4, 5),
+    "at_a_glance": (3, 3),
+    "portfolio_and_products": (3, 3),
+    "investment_highlights": (5, 7),
+}
+
+# Categories per chart, and how many images the "a.png||b.png" fields may list
+CHART_CATEGORIES = (3, 5)
+CHART_FIELDS = ["bar_chart_data", "pie_chart_data"]
+MAX_CERTIFICATIONS = 3
+MAX_ICONS = 5
+
+_TYPES = {"STRING": str, "ARRAY": list, "OBJECT": dict, "NUMBER": (int, float), "BOOLEAN": bool}
+
+
+#Type errors of value against a (Gemini-style) schema node, as "path: problem" strings
+def _schema_errors(value, schema, path):
+    expected = _TYPES.get(schema.get("type"))
+    if expected and (not isinstance(value, expected) or (schema["type"] == "NUMBER" and isinstance(value, bool))):
+        return [f"{path}: expected {schema['type'].lower()}"]
+    errors = []
+    if schema.get("type") == "OBJECT":
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: missing")
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(_schema_errors(value[key], sub, f"{path}.{key}"))
+    elif schema.get("type") == "ARRAY":
+        for i, item in enumerate(value):
+            errors.extend(_schema_errors(item, schema.get("items", {}), f"{path}[{i}]"))
+    return errors
+
+
+def _split_images(value):
+    return [part.strip() for part in (value or "").split("||") if part.strip()]
+
+
+def tidy_slide_text(data, allowed_certifications, allowed_icons):
+    """
+    Fixes what needs no second LLM call, in place: extra bullets are cut to the
+    maximum, and certification / icon names outside the allowed lists (or beyond
+    the limit) are dropped. Returns the list of changes made.
+    """
+    changes = []
+    for field, (_, most) in BULLET_RANGES.items():
+        bullets = data.get(field)
+        if isinstance(bullets, list) and len(bullets) > most:
+            data[field] = bullets[:most]
+            changes.append(f"{field}: cut {len(bullets)} bullets to {most}")
+    for field, allowed, most in [("certifications", allowed_certifications, MAX_CERTIFICATIONS),
+                                 ("icons", allowed_icons, MAX_ICONS)]:
+        if not isinstance(data.get(field), str):
+            continue
+        names = _split_images(data[field])
+        # Names are compared stripped, as create_ppt strips them when it builds the asset paths
+        allowed = {name.strip() for name in allowed}
+        kept = [n for n in names if n in allowed][:most]
+        if kept != names:
+            data[field] = "||".join(kept)
+            changes.append(f"{field}: kept {kept} of {names}")
+    return changes
+
+
+def validate_slide_text(data, schema):
+    """
+    Problems per top-level field ({field: description}); empty when the answer can
+    be rendered as is. Covers the schema (required fields, types) and the content
+    rules (sector, bullet counts, 3-5 chart categories with matching values).
+    """
+    problems = {}
+    if not isinstance(data, dict):
+        return {"*": "response is not a JSON object"}
+
+    for error in _schema_errors(data, schema, "$"):
+        field = error[2:].split(".")[0].split("[")[0].split(":")[0]
+        problems.setdefault(field, error)
+
+    if "sector" not in problems and data.get("sector") not in SECTORS:
+        problems["sector"] = f"sector must be one of {SECTORS}"
+
+    for field, (least, most) in BULLET_RANGES.items():
+        if field in problems:
+            continue
+        bullets = [b for b in data.get(field) or [] if isinstance(b, str) and b.strip()]
+        if not least <= len(bullets) <= most:
+            problems[field] = f"needs {least}-{most} non-empty bullets, got {len(bullets)}"
+
+    for field in CHART_FIELDS:
+        chart = data.get(field)
+        if field in problems or field not in schema.get("properties", {}):
+            continue
+        if not chart:
+            problems[field] = "missing chart data"
+            continue
+        categories, values = chart.get("categories", []), chart.get("values", [])
+        least, most = CHART_CATEGORIES
+        if not least <= len(categories) <= most:
+            problems[field] = f"needs {least}-{most} categories, got {len(categories)}"
+        elif len(values) != len(categories):
+            problems[field] = f"{len(categories)} categories but {len(values)} values"
+        elif any(not math.isfinite(v) for v in values):
+            problems[field] = "values must be finite numbers"
+
+    for field in ["bar_chart_text", "pie_chart_text"]:
+        if field in schema.get("properties", {}) and field not in problems and not (data.get(field) or "").strip():
+            problems[field] = "missing explanation text"
+    return problems
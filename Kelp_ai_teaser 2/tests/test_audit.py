@@ -0,0 +1,70 @@
+#Leak audit of generated decks / citation documents (small files built here with python-pptx / python-docx)
+import json
+
+import pytest
+
+from scripts.anonymize import TermMatcher
+from scripts.audit import audit_file, audit_outputs
+
+pptx = pytest.importorskip("pptx")
+docx = pytest.importorskip("docx")
+
+TERMS = {"Acme Forge": "the Company", "acmeforge.com": "the Company website"}
+
+
+@pytest.fixture
+def deck(tmp_path):
+    presentation = pptx.Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = "Leading forging company in India"
+    box = slide.shapes.add_textbox(0, 0, 100, 100).text_frame.paragraphs[0]
+    # A name split over two runs of one paragraph
+    box.add_run().text = "Built by Acme "
+    box.add_run().text = "Forge Pvt Ltd since 1990"
+    path = str(tmp_path / "deck.pptx")
+    presentation.save(path)
+    return path
+
+
+@pytest.fixture
+def citations(tmp_path):
+    from scripts.citations import add_hyperlink
+    document = docx.Document()
+    document.add_paragraph("Sources")
+    add_hyperlink(document.add_paragraph(), "https://www.acmeforge.com/about", "https://www.acmeforge.com/about")
+    add_hyperlink(document.add_paragraph(), "https://www.acmeforge.com/team", "About acmeforge.com")
+    path = str(tmp_path / "citations.docx")
+    document.save(path)
+    return path
+
+
+def test_deck_hits(deck):
+    entry = audit_file(deck, TermMatcher(TERMS, rules=False))
+    assert entry["errors"] == []
+    assert [(hit["match"], hit["replacement"]) for hit in entry["hits"]] == [("Acme Forge", "the Company")]
+    assert entry["hits"][0]["part"].startswith("ppt/slides/")
+    assert entry["skipped_parts"] > 0
+
+
+def test_url_links_are_skipped(citations):
+    entry = audit_file(citations, TermMatcher(TERMS, rules=False))
+    assert entry["skipped_links"] == 1
+    # The link showing other text than its URL is still checked
+    assert [hit["match"] for hit in entry["hits"]] == ["acmeforge.com"]
+
+
+def test_report_leaves_generic_rules_out(deck, citations, tmp_path):
+    report_path = str(tmp_path / "audit" / "report.json")
+    report = audit_outputs([deck, None, citations], TERMS, report_path)
+    assert report["terms"] == 2 and report["hits"] == 2
+    matches = {hit["match"] for entry in report["files"] for hit in entry["hits"]}
+    assert "India" not in matches and "Ltd" not in matches
+    with open(report_path, encoding="utf-8") as f:
+        assert json.load(f) == report
+
+
+def test_unreadable_file_is_reported(tmp_path):
+    path = tmp_path / "broken.pptx"
+    path.write_bytes(b"not a zip")
+    entry = audit_file(str(path), TermMatcher(TERMS, rules=False))
+    assert entry["hits"] == [] and len(entry["errors"]) == 1
@@ -0,0 +1,113 @@
+#StageCache: lookups, expiry, eviction and the running size total
+import os
+import time
+
+from scripts.cache import StageCache, make_key
+
+
+def _age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_make_key_separates_parts():
+    assert make_key("ab", "c") != make_key("a", "bc")
+    assert make_key({"a": 1, "b": 2}) == make_key({"b": 2, "a": 1})
+
+
+def test_put_get_roundtrip_and_stats(tmp_path):
+    cache = StageCache(root=str(tmp_path))
+    assert cache.get("text", "k") is None
+    cache.put("text", "k", {"sector": "Tech", "bullets": ["a", "b"]})
+    assert cache.get("text", "k") == {"sector": "Tech", "bullets": ["a", "b"]}
+    assert cache.stage_stats["text"] == {"hits": 1, "misses": 1}
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = StageCache(root=str(tmp_path), enabled=False)
+    cache.put("text", "k", 1)
+    assert cache.get("text", "k") is None
+    assert not os.listdir(tmp_path)
+
+
+def test_get_any_returns_first_hit(tmp_path):
+    cache = StageCache(root=str(tmp_path))
+    cache.put("text", "b", "from b")
+    assert cache.get_any("text", ["a", "b"]) == ("b", "from b")
+    assert cache.get_any("text", ["x", "y"]) == (None, None)
+
+
+def test_max_age_and_touch(tmp_path):
+    cache = StageCache(root=str(tmp_path))
+    cache.put("scrape", "k", "pages")
+    path = os.path.join(tmp_path, "scrape", "k.json")
+    _age(path, 100)
+    assert cache.get("scrape", "k", max_age=50) is None
+    # Without touching, a hit leaves the entry's age alone
+    assert cache.get("scrape", "k", touch=False) == "pages"
+    assert time.time() - os.path.getmtime(path) > 50
+    assert cache.get("scrape", "k") == "pages"
+    assert time.time() - os.path.getmtime(path) < 50
+
+
+def test_put_file_get_file(tmp_path):
+    cache = StageCache(root=str(tmp_path / "cache"))
+    src = tmp_path / "deck.pptx"
+    src.write_bytes(b"pptx bytes")
+    cache.put_file("ppt", "k", "pptx", str(src))
+    dest = tmp_path / "copy.pptx"
+    assert cache.get_file("ppt", "k", "pptx", str(dest))
+    assert dest.read_bytes() == b"pptx bytes"
+    assert not cache.get_file("ppt", "missing", "pptx", str(dest))
+
+
+def test_evicts_least_recently_used_below_limit(tmp_path):
+    cache = StageCache(root=str(tmp_path), max_bytes=1000)
+    for i in range(5):
+        cache.put("text", f"k{i}", "x" * 150)
+        _age(os.path.join(tmp_path, "text", f"k{i}.json"), 100 - i)
+    # Reading k0 makes it the most recently used entry
+    assert cache.get("text", "k0") is not None
+    for i in range(5, 8):
+        cache.put("text", f"k{i}", "x" * 150)
+    kept = sorted(os.listdir(tmp_path / "text"))
+    assert "k0.json" in kept and "k1.json" not in kept
+    assert sum(os.path.getsize(tmp_path / "text" / name) for name in kept) <= 1000
+
+
+def test_size_is_tracked_without_walking(tmp_path, monkeypatch):
+    cache = StageCache(root=str(tmp_path), max_bytes=10_000)
+    cache.put("text", "a", "x" * 100)
+    walks = []
+    real_walk = os.walk
+    monkeypatch.setattr(os, "walk", lambda *args, **kw: walks.append(1) or real_walk(*args, **kw))
+    cache.put("text", "b", "x" * 100)
+    # Replacing an entry counts the difference only
+    cache.put("text", "a", "x" * 50)
+    assert walks == []
+    on_disk = sum(os.path.getsize(tmp_path / "text" / name) for name in os.listdir(tmp_path / "text"))
+    assert cache._bytes == on_disk
+
+
+def test_http_pages_evicted_together_and_memo_kept(tmp_path):
+    cache = StageCache(root=str(tmp_path), max_bytes=1000)
+    (tmp_path / "nlp").mkdir()
+    (tmp_path / "nlp" / "memo.json").write_bytes(b"m" * 5000)
+    (tmp_path / "http").mkdir()
+    for ext in ("json", "body"):
+        path = tmp_path / "http" / f"page.{ext}"
+        path.write_bytes(b"p" * 300)
+        _age(str(path), 100)
+    cache.put("text", "k", "x" * 500)
+    assert not (tmp_path / "http").exists() or not os.listdir(tmp_path / "http")
+    assert (tmp_path / "nlp" / "memo.json").exists()
+    assert cache.get("text", "k") is not None
+
+
+def test_invalidate_one_stage(tmp_path):
+    cache = StageCache(root=str(tmp_path))
+    cache.put("text", "k", 1)
+    cache.put("ppt", "k", 2)
+    cache.invalidate("text")
+    assert cache.get("text", "k") is None
+    assert cache.get("ppt", "k") == 2
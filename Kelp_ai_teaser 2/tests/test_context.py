@@ -0,0 +1,58 @@
+#Context packing: token budget, duplicate removal and document order
+from scripts.context import pack_context, estimate_tokens, _chunk
+from scripts.load_private_data import parse_onepager
+
+ONEPAGER = parse_onepager("""## Business Description
+
+Acme Forge is a leading manufacturer of forged parts for automotive customers across India.
+
+## Financials Status
+
+Revenue grew 20% to 1,400 with EBITDA margin of 18% in FY24.
+
+## SWOT
+
+Strength: export approvals and a recurring customer base drive growth and margin expansion.
+""")
+
+UNIQUE = "The company operates three plants with a combined capacity of 60,000 tonnes per year for global clients."
+DUPLICATE = "Acme Forge is a leading manufacturer of forged parts for automotive customers across India."
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 10
+
+
+def test_chunk_respects_unit_size():
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 60 for i in range(10))
+    pieces = _chunk(text, max_tokens=100)
+    assert len(pieces) > 1
+    assert all(estimate_tokens(p) <= 100 for p in pieces)
+
+
+def test_everything_fits_a_large_budget():
+    private, public, report = pack_context(ONEPAGER, {"blocks": [UNIQUE]}, budget_tokens=10_000)
+    assert private.index("## Business Description") < private.index("## Financials Status") < private.index("## SWOT")
+    assert public == UNIQUE
+    assert report["dropped"] == []
+    assert report["used_tokens"] <= report["budget_tokens"]
+
+
+def test_public_duplicates_of_private_data_are_removed():
+    _, public, report = pack_context(ONEPAGER, {"blocks": [DUPLICATE, UNIQUE, UNIQUE]}, budget_tokens=10_000)
+    assert report["duplicates_removed"] == 2
+    assert public == UNIQUE
+
+
+def test_budget_is_never_exceeded():
+    blocks = [f"Block {i}: the company serves customers in {i} new markets with growing revenue and margin." for i in range(40)]
+    private, public, report = pack_context(ONEPAGER, {"blocks": blocks}, budget_tokens=120)
+    assert report["used_tokens"] <= 120
+    assert estimate_tokens(private) + estimate_tokens(public) <= 130
+    assert any(d["reason"] == "budget" for d in report["dropped"])
+
+
+def test_exclude_drops_sections():
+    private, _, _ = pack_context(ONEPAGER, {"raw_text": ""}, exclude=["SWOT"])
+    assert "## SWOT" not in private
@@ -0,0 +1,77 @@
+#Per-document forbidden terms and the single-pass TermMatcher that replaces them
+from scripts.anonymize import TermMatcher
+from scripts.document_terms import (document_terms, COMPANY_REPLACEMENT, SHAREHOLDER_REPLACEMENT,
+                                    PERSON_REPLACEMENT, WEBSITE_REPLACEMENT)
+from scripts.load_private_data import parse_onepager
+
+ONEPAGER = """# 📄 Template: Pharma
+
+## Business Description
+
+Ind-Swift Laboratories Ltd is a leading maker of active pharmaceutical ingredients.
+
+## Website
+
+www.indswiftlabs.com
+
+## Board Members
+
+- Mr. Navrattan Munjal Gupta (Chairman)
+- Himanshu Jain (Managing Director)
+
+## Shareholders
+
+| SHAREHOLDER NAME | VALUE (%) |
+|---|---|
+| Promoters | 40 |
+| Mutual Funds | 20 |
+| HDFC Mutual Fund | 10 |
+| Essix Biosciences Limited | 25 |
+| Bodies Corporate | 5 |
+"""
+
+
+def test_terms_from_a_onepager():
+    terms = document_terms(parse_onepager(ONEPAGER), company="Ind-Swift Laboratories")
+    assert terms["Ind-Swift Laboratories Ltd"] == COMPANY_REPLACEMENT
+    assert terms["Ind-Swift Laboratories"] == COMPANY_REPLACEMENT
+    assert terms["indswiftlabs.com"] == WEBSITE_REPLACEMENT
+    assert terms["Navrattan Munjal Gupta"] == PERSON_REPLACEMENT
+    assert terms["Navrattan Gupta"] == PERSON_REPLACEMENT
+    assert terms["Himanshu Jain"] == PERSON_REPLACEMENT
+    # Named institutions are terms, whole category labels and generic holders are not
+    assert terms["HDFC Mutual Fund"] == SHAREHOLDER_REPLACEMENT
+    assert terms["Essix Biosciences"] == SHAREHOLDER_REPLACEMENT
+    assert not {"Promoters", "Mutual Funds", "Bodies Corporate"} & set(terms)
+
+
+def test_generic_names_give_no_terms():
+    onepager = parse_onepager("## Business Description\n\nThe Company is a maker of parts.\n")
+    assert document_terms(onepager, company="company") == {}
+    assert document_terms(onepager, company="OnePager") == {}
+
+
+def test_matcher_matches_whole_words_with_any_separator():
+    matcher = TermMatcher({"Ind-Swift": COMPANY_REPLACEMENT}, rules=False)
+    assert matcher.sub("Ind Swift, IND-SWIFT and Ind\nSwift") == "the Company, the Company and the Company"
+    assert matcher.sub("Ind-Swiftly and Hind-Swift") == "Ind-Swiftly and Hind-Swift"
+
+
+def test_matcher_prefers_the_longest_term():
+    matcher = TermMatcher({"Kalyani": COMPANY_REPLACEMENT, "Kalyani Forge": COMPANY_REPLACEMENT,
+                           "Kalyani Forge Ltd": "FULL"}, rules=False)
+    assert matcher.sub("Kalyani Forge Ltd and Kalyani Forge and Kalyani") == "FULL and the Company and the Company"
+
+
+def test_matcher_rules():
+    terms = {"Acme": COMPANY_REPLACEMENT}
+    assert TermMatcher(terms).sub("Acme exports from India") == "the Company exports from Domestic Market"
+    assert TermMatcher(terms, rules=False).sub("Acme exports from India") == "the Company exports from India"
+    hits = [(m.group(), m.lastgroup, r) for m, r in TermMatcher(terms).finditer("Acme Pvt in India")]
+    assert hits == [("Acme", "term", COMPANY_REPLACEMENT), ("Pvt", "rule0", ""), ("India", "rule2", "Domestic Market")]
+
+
+def test_matcher_without_anything_to_find():
+    matcher = TermMatcher(rules=False)
+    assert matcher.sub("Acme in India") == "Acme in India"
+    assert list(matcher.finditer("Acme in India")) == []
@@ -0,0 +1,54 @@
+#Streaming HTML block extraction, the shared site budget and near-duplicate removal
+from scripts.extract import BlockExtractor, TextBudget, extract_blocks, simhash, dedupe_blocks
+
+PARAGRAPH = "Acme Forge makes forged and machined parts for automotive and industrial customers."
+
+
+def test_blocks_links_and_skipped_tags():
+    html = (f"<html><nav><p>{PARAGRAPH} (menu)</p></nav><a href='/about'>About</a>"
+            f"<h2>Precision forging since 1979</h2><script>var p = '{PARAGRAPH}';</script>"
+            f"<p>{PARAGRAPH}</p><li>Short item</li></html>")
+    extractor = extract_blocks(html)
+    assert extractor.blocks == ["Precision forging since 1979", PARAGRAPH]
+    assert extractor.links == ["/about"]
+
+
+def test_chunked_feed_matches_whole_page():
+    html = f"<p>{PARAGRAPH}</p><ul><li>{PARAGRAPH} Second list item text.</li></ul>" * 3
+    whole = extract_blocks(html).blocks
+    extractor = BlockExtractor()
+    for i in range(0, len(html), 7):
+        extractor.feed(html[i:i + 7])
+    extractor.close()
+    assert extractor.blocks == whole
+    # Repeats on the same page are kept once
+    assert len(whole) == 2
+
+
+def test_nested_block_ends_outer_one():
+    extractor = extract_blocks(f"<li>{PARAGRAPH}<p>{PARAGRAPH} Nested paragraph.</p></li>")
+    assert extractor.blocks == [PARAGRAPH, f"{PARAGRAPH} Nested paragraph."]
+
+
+def test_budget_is_shared_and_stops_extraction():
+    budget = TextBudget(limit=100)
+    first = extract_blocks(f"<p>{PARAGRAPH}</p><p>{PARAGRAPH} Again.</p>", budget)
+    assert first.full and budget.spent
+    second = extract_blocks(f"<p>{PARAGRAPH} On another page.</p>", budget)
+    assert second.blocks == []
+
+
+def test_simhash_is_close_for_near_duplicates():
+    base = "We use cookies to improve your experience on our website. By continuing you accept our cookie policy."
+    near = base.replace("improve", "enhance")
+    other = "Acme Forge supplies crankshafts and connecting rods to passenger vehicle makers in Europe and Asia."
+    assert simhash(base) == simhash(base)
+    assert bin(simhash(base) ^ simhash(near)).count("1") < bin(simhash(base) ^ simhash(other)).count("1")
+    assert 0 <= simhash("") < 2 ** 64
+
+
+def test_dedupe_blocks_keeps_first_occurrence():
+    banner = "We use cookies to improve your experience on our website. By continuing you accept our cookie policy."
+    blocks = [banner, PARAGRAPH, banner, "Contact our sales team for export enquiries and technical data sheets.", banner]
+    assert dedupe_blocks(blocks) == [banner, PARAGRAPH, blocks[3]]
+    assert dedupe_blocks(blocks, distance=0) == [banner, PARAGRAPH, blocks[3]]
@@ -0,0 +1,94 @@
+#Chart data from OnePager statements and shareholding tables
+import pytest
+
+from scripts.financials import (parse_number, financial_series, bar_chart, is_holder_category, shareholding_chart,
+                                extract_charts)
+from scripts.load_private_data import parse_onepager
+
+ONEPAGER = """# 📄 Template: Manufacturing & Industrials
+
+## Financials Status
+
+### Income Statement
+- Revenue From Operations | 2021: None | 2022: 7800 | 2023: 9230 | 2024: 10908 | 2025: 11554
+   - Revenue From Sale of Products | 2024: 7730 | 2025: 9045
+   - Revenue From Sale of Services | 2024: 2751 | 2025: 2508
+- Operating EBITDA | 2022: 740 | 2023: 760 | 2024: 1200 | 2025: 1355.5
+- PAT | 2024: 300 | 2025: 410
+
+### Ratios
+- Operating EBITDA | 2025: 11.7
+
+## Shareholders
+
+| SHAREHOLDER NAME | VALUE (%) |
+|---|---|
+| HDFC Mutual Fund | 12 |
+| Acme Holdings | 88 |
+
+| CATEGORY | VALUE (%) |
+|---|---|
+| Promoters | 0.6 |
+| FII/FPI | 0.3 |
+| Non-Promoters | 0.1 |
+"""
+
+
+def test_parse_number():
+    assert parse_number(12) == 12.0
+    assert parse_number("1,303") == 1303.0
+    assert parse_number("50.2%") == 50.2
+    assert parse_number("₹ 1,303 crore") == 1303.0
+    assert parse_number("25 lakh") == pytest.approx(0.25)
+    assert parse_number("2 bn") == 200.0
+    for empty in (None, True, "None", "n/a", "-", "Not Available"):
+        assert parse_number(empty) is None
+
+
+def test_financial_series_first_occurrence_wins():
+    series = financial_series(parse_onepager(ONEPAGER))
+    # INR million -> INR crore; the Ratios repeat of Operating EBITDA is ignored
+    assert series["Revenue From Operations"] == {2022: 780.0, 2023: 923.0, 2024: 1090.8, 2025: 1155.4}
+    assert series["Operating EBITDA"][2025] == pytest.approx(135.55)
+    assert series["Revenue From Sale of Products"] == {2024: 773.0, 2025: 904.5}
+
+
+def test_bar_chart():
+    chart = bar_chart(financial_series(parse_onepager(ONEPAGER)), "Manufacturing")
+    assert chart["title"] == "Revenue vs EBITDA (₹ Cr)"
+    assert chart["categories"] == ["FY22", "FY23", "FY24", "FY25"]
+    assert chart["series"][0]["values"] == [780, 923, 1091, 1155]
+    assert chart["series"][1]["values"] == [74.0, 76.0, 120, 136]
+    # Consumer prefers PAT, which only covers two of the years: EBITDA is next
+    series = financial_series(parse_onepager(ONEPAGER))
+    assert [s["name"] for s in bar_chart(series, "Consumer")["series"]] == ["Revenue", "EBITDA"]
+    del series["Operating EBITDA"]
+    assert [s["name"] for s in bar_chart(series, "Consumer")["series"]] == ["Revenue"]
+
+
+def test_bar_chart_needs_consecutive_years():
+    assert bar_chart({"Revenue From Operations": {2021: 10, 2023: 12}}) is None
+    assert bar_chart({}) is None
+
+
+def test_holder_categories_are_whole_labels():
+    for category in ("Promoters", "FII/FPI", "FIIs / FPIs", "Non-Promoters", "Mutual Funds", "Banks & Financial Institutions"):
+        assert is_holder_category(category)
+    for holder in ("HDFC Mutual Fund", "Acme Promoters Pvt Ltd", "Life Insurance Corporation of India", ""):
+        assert not is_holder_category(holder)
+
+
+def test_shareholding_chart_uses_the_category_table():
+    chart = shareholding_chart(parse_onepager(ONEPAGER))
+    assert chart["categories"] == ["Promoters", "FII/FPI", "Non-Promoters"]
+    # Fractions are turned into percentages
+    assert chart["values"] == [60.0, 30.0, 10.0]
+
+
+def test_shareholding_chart_skips_forbidden_rows():
+    onepager = parse_onepager(ONEPAGER)
+    assert shareholding_chart(onepager, terms=["FII FPI"]) is None
+    # Without a shareholding pie the revenue mix is used instead
+    charts = extract_charts(onepager, terms=["FII FPI"])
+    assert charts["pie_chart_data"]["title"] == "Revenue Mix FY25 (₹ Cr)"
+    assert charts["bar_chart_data"]["title"] == "Revenue vs EBITDA (₹ Cr)"
@@ -0,0 +1,76 @@
+#generate_slide_text with a fake router: response cache, repair call and logging (no Gemini calls)
+import json
+import types
+
+import pytest
+
+import scripts.generate_text as generate_text
+from scripts.cache import StageCache
+from tests.test_validate import VALID
+
+
+class FakeRouter:
+    """Answers the first request with first, repair requests with repair."""
+
+    def __init__(self, first, repair):
+        self.answers = {"generate": first, "repair": repair}
+        self.calls = []
+
+    def run(self, call, api_key, attempts=None, log=print):
+        kind = "repair" if self.calls else "generate"
+        self.calls.append(kind)
+        answer = self.answers[kind]
+
+        class Model:
+            def generate_content(self, prompt, generation_config=None, stream=False):
+                return types.SimpleNamespace(text=json.dumps(answer), usage_metadata=None)
+
+        # Cached answers are looked up under the configured model names
+        model_name = generate_text.MODELS_TO_TRY[0]
+        attempts.append({"model": model_name, "ok": True, "seconds": 0.0})
+        return model_name, call(Model())
+
+
+@pytest.fixture
+def use_router(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+
+    def install(router):
+        monkeypatch.setattr(generate_text, "model_router", lambda: router)
+        return router
+    return install
+
+
+def test_valid_answer_is_cached(tmp_path, use_router):
+    router = use_router(FakeRouter(VALID, None))
+    cache = StageCache(root=str(tmp_path))
+    stats = {}
+    assert generate_text.generate_slide_text("private", "public", stats=stats, cache=cache) == VALID
+    assert stats["invalid_fields"] == {} and stats["repaired_fields"] == []
+    generate_text.generate_slide_text("private", "public", stats=stats, cache=cache)
+    assert router.calls == ["generate"] and stats["cache_hit"]
+
+
+def test_repaired_fields_are_merged_and_logged(tmp_path, use_router):
+    broken = dict(VALID, investment_highlights=["Only one"])
+    router = use_router(FakeRouter(broken, {"investment_highlights": VALID["investment_highlights"]}))
+    logs = []
+    stats = {}
+    result = generate_text.generate_slide_text("private", "public", stats=stats, cache=StageCache(root=str(tmp_path)),
+                                               log=logs.append)
+    assert router.calls == ["generate", "repair"]
+    assert result["investment_highlights"] == VALID["investment_highlights"]
+    assert stats["repaired_fields"] == ["investment_highlights"]
+    assert logs[0].startswith("Repairing fields ['investment_highlights']")
+
+
+def test_answer_still_invalid_after_repair_is_not_cached(tmp_path, use_router):
+    broken = dict(VALID, investment_highlights=["Only one"])
+    use_router(FakeRouter(broken, {"investment_highlights": ["Still one"]}))
+    cache = StageCache(root=str(tmp_path))
+    stats = {}
+    logs = []
+    generate_text.generate_slide_text("private", "public", stats=stats, cache=cache, log=logs.append)
+    assert "investment_highlights" in stats["invalid_fields"]
+    assert not (tmp_path / "text").exists()
+    assert logs[-1] == "Not caching the response, fields still invalid: ['investment_highlights']"
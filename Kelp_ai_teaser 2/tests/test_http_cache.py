@@ -0,0 +1,54 @@
+#HttpCache: stored pages, freshness and the validators sent on revalidation
+from scripts.http_cache import HttpCache
+
+
+def test_store_and_lookup(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=60)
+    assert cache.lookup("https://acme.example/") is None
+    cache.store("https://acme.example/", 200, {"ETag": '"v1"', "Content-Type": "text/html"}, b"<p>hi</p>", "utf-8")
+    meta, body = cache.lookup("https://acme.example/")
+    assert body == b"<p>hi</p>"
+    assert meta["status"] == 200 and meta["etag"] == '"v1"' and meta["encoding"] == "utf-8"
+
+
+def test_freshness_follows_ttl(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=60)
+    cache.store("https://acme.example/", 200, {}, b"x")
+    meta, _ = cache.lookup("https://acme.example/")
+    assert cache.is_fresh(meta)
+    assert not cache.is_fresh(dict(meta, validated_at=meta["validated_at"] - 61))
+
+
+def test_conditional_headers():
+    cache = HttpCache(ttl=60, enabled=False)
+    assert cache.conditional_headers({"etag": None, "last_modified": None}) == {}
+    headers = cache.conditional_headers({"etag": '"v1"', "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+    assert headers == {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}
+
+
+def test_mark_validated_refreshes_entry(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=60)
+    cache.store("https://acme.example/", 200, {"ETag": '"v1"'}, b"x")
+    meta, _ = cache.lookup("https://acme.example/")
+    stale = dict(meta, validated_at=meta["validated_at"] - 120)
+    refreshed = cache.mark_validated("https://acme.example/", stale)
+    assert cache.is_fresh(refreshed)
+    assert cache.lookup("https://acme.example/")[0]["validated_at"] == refreshed["validated_at"]
+    # The original fetch time is kept
+    assert refreshed["fetched_at"] == meta["fetched_at"]
+
+
+def test_disabled_cache(tmp_path):
+    cache = HttpCache(str(tmp_path), enabled=False)
+    cache.store("https://acme.example/", 200, {}, b"x")
+    assert cache.lookup("https://acme.example/") is None
+
+
+def test_on_write_reports_byte_deltas(tmp_path):
+    deltas = []
+    cache = HttpCache(str(tmp_path), on_write=deltas.append)
+    cache.store("https://acme.example/", 200, {}, b"x" * 100)
+    body_delta, meta_delta = deltas
+    assert body_delta == 100 and meta_delta > 0
+    cache.store("https://acme.example/", 200, {}, b"x" * 40)
+    assert deltas[2] == -60
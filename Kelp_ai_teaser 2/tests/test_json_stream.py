@@ -0,0 +1,47 @@
+#JsonFieldStream: top-level fields handed out as soon as they complete, whatever the chunking
+import json
+
+from scripts.json_stream import JsonFieldStream
+
+RESPONSE = {
+    "sector": "Manufacturing",
+    "business_overview": ["Makes {forged} parts, \"precision\" grade", "Plants in [3] states, 60% exports"],
+    "bar_chart_data": {"title": "Revenue", "values": [1, 2.5, 3]},
+    "icons": "Graph_Growth.png||Delivery_Service.png",
+}
+
+
+def _stream(text, size):
+    stream = JsonFieldStream()
+    fields = []
+    for i in range(0, len(text), size):
+        fields.extend(stream.feed(text[i:i + size]))
+    return fields
+
+
+def test_any_chunk_size_gives_the_same_fields():
+    text = json.dumps(RESPONSE, indent=2)
+    for size in (1, 2, 3, 7, 64, len(text)):
+        assert _stream(text, size) == list(RESPONSE.items())
+
+
+def test_field_is_emitted_when_its_member_ends():
+    stream = JsonFieldStream()
+    assert stream.feed('{"sector": "Te') == []
+    assert stream.feed('ch", "icons": "a.png"') == [("sector", "Tech")]
+    assert stream.feed("}") == [("icons", "a.png")]
+    assert stream.done
+
+
+def test_code_fence_and_trailing_text_are_ignored():
+    text = "```json\n" + json.dumps({"sector": "Pharma", "x": [1]}) + "\n```"
+    assert _stream(text, 5) == [("sector", "Pharma"), ("x", [1])]
+
+
+def test_escaped_quotes_and_brackets_inside_strings():
+    text = json.dumps({"a": 'say \\"}] ,{ "hi"', "b": 1})
+    assert _stream(text, 4) == [("a", 'say \\"}] ,{ "hi"'), ("b", 1)]
+
+
+def test_malformed_member_is_skipped():
+    assert _stream('{"a": 1, "b": tru, "c": 2}', 3) == [("a", 1), ("c", 2)]
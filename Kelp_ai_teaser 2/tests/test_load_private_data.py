@@ -0,0 +1,86 @@
+#OnePager parsing: sections, typed tables, merged headings and the website
+from scripts.load_private_data import parse_cell, parse_onepager, extract_website_from_md, load_onepager
+
+ONEPAGER = """# 📄 Template: Manufacturing
+
+## Business Description
+
+Acme Forge is a leading maker of forged parts.
+
+## Website
+
+Visit www.acmeforge.com/about?ref=x for more.
+
+## Credit Status
+
+Not Available
+
+## Financials Status
+
+| Metric | 2023 | 2024 |
+|---|---|---|
+| Revenue From Operations | 1,200.5 | 1,400 |
+| PAT | - | 90 |
+
+## Financials Status
+
+Figures in INR million.
+
+## Shareholders
+
+| SHAREHOLDER NAME | VALUE (%) |
+|---|---|
+| Promoters | 60 |
+| Non Promoters | 40 |
+"""
+
+
+def test_parse_cell_types():
+    assert parse_cell(" 1,234 ") == 1234
+    assert parse_cell("12.5") == 12.5
+    assert parse_cell("-") is None
+    assert parse_cell("Not Available") is None
+    assert parse_cell("Equity") == "Equity"
+
+
+def test_sections_and_template():
+    onepager = parse_onepager(ONEPAGER)
+    assert onepager.template == "Manufacturing"
+    assert onepager.names() == ["Business Description", "Website", "Financials Status", "Shareholders"]
+    # "Not Available" sections are dropped
+    assert onepager.section("Credit Status") is None
+
+
+def test_tables_are_typed():
+    table = parse_onepager(ONEPAGER).section("Financials Status").tables[0]
+    assert table.headers == ["Metric", "2023", "2024"]
+    assert table.rows[0] == {"Metric": "Revenue From Operations", "2023": 1200.5, "2024": 1400}
+    assert table.rows[1]["2023"] is None
+
+
+def test_repeated_heading_is_merged():
+    section = parse_onepager(ONEPAGER).section("Financials Status")
+    assert len(section.tables) == 1
+    assert section.text().endswith("Figures in INR million.")
+
+
+def test_website_from_section():
+    assert parse_onepager(ONEPAGER).website == "https://www.acmeforge.com/about"
+
+
+def test_website_falls_back_to_any_url():
+    onepager = parse_onepager("## Business Description\n\nSee https://acme.example/#top for details.\n")
+    assert onepager.website == "https://acme.example/"
+    assert extract_website_from_md("no link here") is None
+
+
+def test_text_excludes_sections_and_caps_rows():
+    text = parse_onepager(ONEPAGER).text(exclude=["Website"], max_table_rows=1)
+    assert "## Website" not in text
+    assert "| Promoters | 60 |" in text
+    assert "Non Promoters" not in text
+    assert "(1 more rows omitted)" in text
+
+
+def test_load_onepager_missing_file(tmp_path):
+    assert load_onepager(str(tmp_path / "missing.md")) is None
@@ -0,0 +1,105 @@
+#ModelRouter: preference order, circuit breaker, fallback and hedging (fake clients, no network)
+import time
+
+import pytest
+
+exceptions = pytest.importorskip("google.api_core.exceptions")
+
+from scripts.model_router import ModelRouter, FAILURE_THRESHOLD
+
+
+class FakeClient:
+
+    def __init__(self, name):
+        self.model_name = name
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = ModelRouter(["a", "b", "c"])
+    monkeypatch.setattr(router, "_client", lambda name, api_key: FakeClient(name))
+    yield router
+    router.close()
+
+
+def test_preference_order_by_default(router):
+    assert router.order() == ["a", "b", "c"]
+
+
+def test_falls_back_and_logs(router):
+    logs = []
+
+    def call(client):
+        if client.model_name == "a":
+            raise ValueError("unparseable output")
+        return client.model_name
+
+    attempts = []
+    assert router.run(call, "key", attempts, log=logs.append) == ("b", "b")
+    assert [(a["model"], a["ok"]) for a in attempts] == [("a", False), ("b", True)]
+    assert logs == ["Error with a: unparseable output"]
+
+
+def test_quota_error_opens_circuit_at_once(router):
+    def call(client):
+        if client.model_name == "a":
+            raise exceptions.ResourceExhausted("quota")
+        return "ok"
+
+    router.run(call, "key", log=lambda message: None)
+    assert router.order() == ["b", "c", "a"]
+    assert router.status()["a"]["circuit"] == "open"
+
+
+def test_error_prone_model_moves_back(router):
+    def call(client):
+        if client.model_name == "a":
+            raise RuntimeError("timeout")
+        return "ok"
+
+    for _ in range(FAILURE_THRESHOLD - 1):
+        router.run(call, "key", log=lambda message: None)
+    # Still closed, but failing too often to stay first
+    assert router.status()["a"]["circuit"] == "closed"
+    assert router.order() == ["b", "c", "a"]
+
+
+def test_repeated_failures_open_circuit(router):
+    def call(client):
+        raise RuntimeError("timeout")
+
+    for _ in range(FAILURE_THRESHOLD):
+        assert all(h["circuit"] == "closed" for h in router.status().values())
+        with pytest.raises(RuntimeError):
+            router.run(call, "key", log=lambda message: None)
+    assert all(h["circuit"] == "open" for h in router.status().values())
+
+
+def test_all_models_failing_raises(router):
+    def call(client):
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError, match="All models failed"):
+        router.run(call, "key", log=lambda message: None)
+
+
+def test_hedged_call_returns_the_faster_model(router):
+    router.hedge_after = 0.05
+
+    def call(client):
+        if client.model_name == "a":
+            time.sleep(0.5)
+        return client.model_name
+
+    started = time.perf_counter()
+    model_name, result = router.run(call, "key", log=lambda message: None)
+    assert (model_name, result) == ("b", "b")
+    assert time.perf_counter() - started < 0.4
+
+
+def test_pool_is_sized_from_models_and_recreated_after_close(router):
+    router.run(lambda client: 1, "key")
+    assert router._pool._max_workers == 6
+    router.close()
+    assert router._pool is None
+    assert router.run(lambda client: 2, "key") == ("a", 2)
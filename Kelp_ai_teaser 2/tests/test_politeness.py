@@ -0,0 +1,53 @@
+#Back-off, Retry-After parsing and the per-host scheduler
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from scripts.politeness import (HostScheduler, backoff_delay, retry_after_seconds,
+                                BACKOFF_BASE, BACKOFF_CAP, MAX_RETRY_AFTER)
+
+
+def test_backoff_delay_grows_and_is_capped():
+    random.seed(1)
+    for attempt in range(1, 10):
+        ceiling = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1))
+        delays = [backoff_delay(attempt) for _ in range(200)]
+        assert all(0 <= d <= ceiling for d in delays)
+    assert max(backoff_delay(20) for _ in range(200)) <= BACKOFF_CAP
+
+
+def test_retry_after_seconds_form():
+    assert retry_after_seconds("5") == 5.0
+    assert retry_after_seconds(" 0 ") == 0.0
+    assert retry_after_seconds("100000") == MAX_RETRY_AFTER
+
+
+def test_retry_after_http_date():
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    assert 8 <= retry_after_seconds(when) <= 10
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+    assert retry_after_seconds(past) == 0.0
+
+
+def test_retry_after_missing_or_invalid():
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("") is None
+    assert retry_after_seconds("soon") is None
+
+
+def test_scheduler_limits_connections_per_host():
+    scheduler = HostScheduler(max_connections=1, min_interval=0)
+    deadline = time.monotonic() + 0.2
+    assert scheduler.acquire("https://acme.example/a", deadline)
+    # Same host, no free slot before the deadline; another host is independent
+    assert not scheduler.acquire("https://acme.example/b", time.monotonic() + 0.05)
+    assert scheduler.acquire("https://other.example/", deadline)
+    scheduler.release("https://acme.example/a")
+    assert scheduler.acquire("https://acme.example/b", time.monotonic() + 0.2)
+
+
+def test_defer_pushes_back_past_deadline():
+    scheduler = HostScheduler(max_connections=2, min_interval=0)
+    scheduler.defer("https://acme.example/", 5)
+    assert not scheduler.acquire("https://acme.example/x", time.monotonic() + 0.1)
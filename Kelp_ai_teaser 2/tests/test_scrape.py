@@ -0,0 +1,65 @@
+#fetch_page against a fake session: what reaches the HttpCache
+import time
+
+from scripts.extract import TextBudget
+from scripts.http_cache import HttpCache
+from scripts.scrape import fetch_page
+
+PAGE = "".join(f"<p>Paragraph {i} about the company, its plants and its products.</p>" for i in range(200)).encode()
+
+
+class FakeResponse:
+
+    def __init__(self, body, status=200):
+        self.body = body
+        self.status_code = status
+        self.headers = {"ETag": '"v1"'}
+        self.encoding = "utf-8"
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+
+    def __init__(self, body):
+        self.body = body
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.body)
+
+
+def test_page_is_cached_when_site_budget_fills(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=60)
+    budget = TextBudget(limit=200)
+    record, blocks, _ = fetch_page(FakeSession(PAGE), "https://acme.example/a", time.monotonic() + 10,
+                                   cache, budget, max_bytes=1024 * 1024)
+    assert record["ok"] and not record["truncated"]
+    assert budget.spent and blocks
+    assert cache.lookup("https://acme.example/a")[1] == PAGE
+
+
+def test_body_cut_by_max_bytes_is_not_cached(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=60)
+    record, _, _ = fetch_page(FakeSession(PAGE), "https://acme.example/b", time.monotonic() + 10,
+                              cache, TextBudget(), max_bytes=1000)
+    assert record["truncated"]
+    assert cache.lookup("https://acme.example/b") is None
+
+
+def test_fresh_entry_skips_the_network(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=60)
+    session = FakeSession(PAGE)
+    fetch_page(session, "https://acme.example/c", time.monotonic() + 10, cache, TextBudget())
+    record, blocks, _ = fetch_page(session, "https://acme.example/c", time.monotonic() + 10, cache, TextBudget())
+    assert session.calls == 1
+    assert record["from_cache"] and blocks
@@ -0,0 +1,84 @@
+#Slide JSON checks (schema + content rules) and the local tidy-up before any repair call
+import copy
+
+from scripts.generate_ppt import certifications, icons
+from scripts.generate_text import RESPONSE_SCHEMA, response_schema
+from scripts.validate import validate_slide_text, tidy_slide_text
+
+VALID = {
+    "sector": "Manufacturing",
+    "business_overview": ["One", "Two", "Three", "Four"],
+    "at_a_glance": ["One", "Two", "Three"],
+    "portfolio_and_products": ["One", "Two", "Three"],
+    "investment_highlights": ["One", "Two", "Three", "Four", "Five"],
+    "bar_chart_text": "Revenue grew.",
+    "pie_chart_text": "Promoters hold most.",
+    "certifications": "sedex.png",
+    "icons": "Graph_Growth.png",
+    "bar_chart_data": {"title": "Revenue", "categories": ["FY22", "FY23", "FY24"], "values": [1, 2, 3]},
+    "pie_chart_data": {"title": "Holders", "categories": ["A", "B", "C"], "values": [50, 30, 20]},
+}
+
+
+def _with(**changes):
+    data = copy.deepcopy(VALID)
+    data.update(changes)
+    return data
+
+
+def test_valid_response_has_no_problems():
+    assert validate_slide_text(VALID, RESPONSE_SCHEMA) == {}
+
+
+def test_schema_problems():
+    data = _with(at_a_glance="not a list")
+    del data["sector"]
+    problems = validate_slide_text(data, RESPONSE_SCHEMA)
+    assert set(problems) == {"sector", "at_a_glance"}
+    assert validate_slide_text([], RESPONSE_SCHEMA) == {"*": "response is not a JSON object"}
+
+
+def test_content_rules():
+    problems = validate_slide_text(_with(sector="Retail", investment_highlights=["One", " ", "Two"]), RESPONSE_SCHEMA)
+    assert "sector" in problems
+    assert problems["investment_highlights"] == "needs 5-7 non-empty bullets, got 2"
+
+
+def test_chart_rules():
+    bar = {"title": "Revenue", "categories": ["FY23", "FY24"], "values": [1, 2]}
+    pie = {"title": "Holders", "categories": ["A", "B", "C"], "values": [1, 2]}
+    problems = validate_slide_text(_with(bar_chart_data=bar, pie_chart_data=pie), RESPONSE_SCHEMA)
+    assert problems["bar_chart_data"] == "needs 3-5 categories, got 2"
+    assert problems["pie_chart_data"] == "3 categories but 2 values"
+    nan = {"title": "Revenue", "categories": ["A", "B", "C"], "values": [1, float("nan"), 2]}
+    assert "bar_chart_data" in validate_slide_text(_with(bar_chart_data=nan), RESPONSE_SCHEMA)
+
+
+def test_charts_taken_from_the_onepager_are_not_checked():
+    data = _with()
+    del data["bar_chart_data"]
+    schema = response_schema({"bar_chart_data": VALID["bar_chart_data"]})
+    assert validate_slide_text(data, schema) == {}
+
+
+def test_tidy_cuts_extra_bullets():
+    data = _with(at_a_glance=["1", "2", "3", "4", "5"])
+    changes = tidy_slide_text(data, certifications, icons)
+    assert data["at_a_glance"] == ["1", "2", "3"]
+    assert changes == ["at_a_glance: cut 5 bullets to 3"]
+
+
+def test_tidy_keeps_only_deck_assets():
+    data = _with(certifications="sedex.png||madeup.png||International Safety Award from the British Safety Council.png",
+                 icons="Graph_Growth.png||growth.png")
+    tidy_slide_text(data, certifications, icons)
+    # Names are matched stripped, like create_ppt builds the asset paths
+    assert data["certifications"] == "sedex.png||International Safety Award from the British Safety Council.png"
+    assert data["icons"] == "Graph_Growth.png"
+
+
+def test_tidy_caps_image_counts():
+    data = _with(icons="||".join(icons))
+    tidy_slide_text(data, certifications, icons)
+    assert data["icons"].split("||") == icons[:5]
+    assert tidy_slide_text(copy.deepcopy(VALID), certifications, icons) == []